@@ -1,20 +1,151 @@
-from fastapi import FastAPI, Request
+import asyncio
+import functools
+import gc
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from starlette.concurrency import iterate_in_threadpool
 from starlette.responses import HTMLResponse, RedirectResponse
 from uvicorn import run as app_run
 
 from typing import Optional
 
+import numpy as np
+
 # Importing constants and pipeline modules from the project
-from src.constants import APP_HOST, APP_PORT
-from src.pipline.prediction_pipeline import VehicleData, VehicleDataClassifier
-from src.pipline.training_pipeline import TrainPipeline
+from src.constants import (APP_HOST, APP_PORT, CSV_PREDICTION_CHUNK_ROWS, DATA_INGESTION_COLLECTION_NAME,
+                           MODEL_FEATURE_COLUMNS, MODEL_LOAD_RETRY_INTERVAL_SECONDS, RANKING_CHUNK_ROWS,
+                           RANKING_DEFAULT_K, RANKING_MAX_K)
+from src.entity.api_entity import (BatchPredictionRequest, BatchPredictionResponse, PredictionResponse,
+                                   RankingResponse, VehicleRecord)
+from src.data_access.prediction_capture import PredictionCapture
+from src.entity.config_entity import (InferenceExecutorConfig, PredictionBatcherConfig, PredictionCacheConfig,
+                                      PredictionCaptureConfig, RankingConfig, VehiclePredictorConfig)
+from src.entity.model_holder import ModelHolder
+from src.logger import logging
+from src.pipline.arrow_prediction import ARROW_STREAM_MEDIA_TYPE, arrow_available, score_arrow_body
+from src.pipline.csv_prediction_stream import (CSV_OUTPUT_FORMAT, NDJSON_OUTPUT_FORMAT, UploadStreamingResponse,
+                                               iter_csv_chunks, stream_csv_predictions)
+from src.pipline.inference_executor import InferenceExecutor, InferenceOverloadedError
+from src.pipline.lead_ranking import rank_csv_chunks
+from src.pipline.prediction_batcher import PredictionBatcher
+from src.pipline.prediction_cache import PredictionCache
+from src.pipline.prediction_pipeline import VehicleDataClassifier, VehicleFeatureRow
+from src.pipline.training_job_manager import TrainingJobManager
+from src.utils.metrics import (forest_rows_scored_total, forest_trees_evaluated_total, metrics,
+                               prediction_errors_total, prediction_stage_seconds)
+from src.utils.tracing import TracingMiddleware, tracer
+
+# Process wide model holder shared by every request
+predictor_config = VehiclePredictorConfig()
+model_holder = ModelHolder.shared(prediction_pipeline_config=predictor_config)
+prediction_cache = PredictionCache(cache_config=PredictionCacheConfig())
+model_predictor = VehicleDataClassifier(prediction_pipeline_config=predictor_config, model_holder=model_holder,
+                                        prediction_cache=prediction_cache)
+
+# Runs the training pipeline in a background process, one job at a time across all workers
+training_job_manager = TrainingJobManager()
+
+# Stored collections that may be ranked
+ranking_config = RankingConfig()
+
+# Bounded worker pool keeping CPU-bound model calls off the event loop
+inference_executor = InferenceExecutor(executor_config=InferenceExecutorConfig())
+
+# Coalesces concurrent single predictions into one model call
+prediction_batcher = PredictionBatcher(predict_batch=model_predictor.predict_identified_rows,
+                                       batcher_config=PredictionBatcherConfig(),
+                                       inference_executor=inference_executor)
+
+# Writes served predictions back to MongoDB in the background, when enabled
+prediction_capture = PredictionCapture(capture_config=PredictionCaptureConfig())
+
+# Saturation of the serving path, read at scrape time
+metrics.gauge("vehicle_prediction_batcher_queue_depth", "Single predictions waiting to be batched.",
+              lambda: prediction_batcher.queue_depth)
+metrics.gauge("vehicle_inference_executor_pending", "Model calls running or waiting for an inference worker.",
+              lambda: inference_executor.pending)
+metrics.gauge("vehicle_prediction_cache_entries", "Entries held by the prediction cache.",
+              lambda: prediction_cache.stats()["size"])
+metrics.gauge("vehicle_prediction_capture_buffered_rows", "Served predictions waiting to be written to MongoDB.",
+              lambda: prediction_capture.buffered_rows)
+metrics.gauge("vehicle_forest_trees_evaluated_per_row", "Average trees evaluated per row by the early-exit vote.",
+              lambda: forest_trees_evaluated_total.value() / max(forest_rows_scored_total.value(), 1.0))
+
+
+async def load_model_until_ready():
+    """
+    Keeps trying to load the production model until it is resident in memory.
+    The download runs in a worker thread so the event loop stays free meanwhile.
+    """
+    while not model_holder.is_ready:
+        try:
+            await run_in_threadpool(model_holder.load)
+        except Exception as e:
+            logging.error(f"Model load failed, retrying in {MODEL_LOAD_RETRY_INTERVAL_SECONDS}s: {e}")
+            await asyncio.sleep(MODEL_LOAD_RETRY_INTERVAL_SECONDS)
+
+    # The loaded object graph lives as long as the process, keep it out of the GC's scan set
+    gc.collect()
+    gc.freeze()
+
+
+async def poll_model_registry():
+    """
+    Swaps in the model registry champion whenever a new one is promoted.
+    The new model is downloaded and prepared in a worker thread while the resident one keeps serving,
+    a failed poll is logged and retried at the next interval.
+    """
+    interval = predictor_config.registry_poll_interval_seconds
+    while True:
+        await asyncio.sleep(interval)
+        if not model_holder.is_ready:
+            continue
+        try:
+            if await run_in_threadpool(model_holder.refresh):
+                # Like the first model, the swapped-in one is kept out of the GC's scan set. The frozen
+                # previous model is moved back first, otherwise it could never be collected
+                gc.unfreeze()
+                gc.collect()
+                gc.freeze()
+        except Exception as e:
+            logging.error(f"Model registry poll failed, retrying in {interval}s: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Loads the model once at startup and starts the inference workers and the prediction batcher.
+    Prediction requests are refused until the model is resident, newly promoted models are then hot swapped.
+    """
+    loader = asyncio.create_task(load_model_until_ready())
+    poller = asyncio.create_task(poll_model_registry()) if predictor_config.registry_poll_interval_seconds > 0 else None
+    inference_executor.start()
+    prediction_batcher.start()
+    prediction_capture.start()
+    yield
+    loader.cancel()
+    if poller is not None:
+        poller.cancel()
+    await prediction_batcher.stop()
+    await prediction_capture.stop()
+    inference_executor.shutdown()
+
 
 # Initialize FastAPI application
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# Shed overload with a 503 and a Retry-After hint instead of queueing without bound
+@app.exception_handler(InferenceOverloadedError)
+async def overloaded_exception_handler(request: Request, exc: InferenceOverloadedError):
+    return JSONResponse({"status": False, "error": str(exc)}, status_code=503,
+                        headers={"Retry-After": str(max(1, round(exc.retry_after_seconds)))})
 
 # Mount the 'static' directory for serving static files (like CSS)
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -34,6 +165,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Trace every request, slow ones are kept for the debug endpoint along with a sample of the others
+app.add_middleware(TracingMiddleware, request_tracer=tracer)
+
 class DataForm:
     """
     DataForm class to handle and process incoming form data.
@@ -72,6 +206,32 @@ class DataForm:
         self.Vehicle_Age_gt_2_Years = form.get("Vehicle_Age_gt_2_Years")
         self.Vehicle_Damage_Yes = form.get("Vehicle_Damage_Yes")
 
+    def get_vehicle_record(self) -> VehicleRecord:
+        """
+        Method to validate the form values once and coerce them to the typed record of the JSON API.
+        """
+        return VehicleRecord.model_validate({column: getattr(self, column) for column in MODEL_FEATURE_COLUMNS})
+
+
+async def predict_vehicle_record(vehicle_record: VehicleRecord, source: str) -> int:
+    """
+    Scores one validated record as a contiguous numeric row, batched together with concurrent predictions.
+    """
+    start = time.perf_counter()
+    with prediction_stage_seconds.time("record_build"), tracer.span("record_build"):
+        row = VehicleFeatureRow.from_record(vehicle_record)
+    with prediction_stage_seconds.time("batch_wait"), tracer.span("batch_wait"):
+        value, model_id = await prediction_batcher.predict(row)
+    prediction_capture.capture(row.values, [value], model_id, (time.perf_counter() - start) * 1000, source)
+    return value
+
+
+def get_response_status(prediction: int) -> str:
+    """
+    Interprets the prediction result as 'Response-Yes' or 'Response-No'.
+    """
+    return "Response-Yes" if prediction == 1 else "Response-No"
+
 # Route to render the main page with the form
 @app.get("/", tags=["authentication"])
 async def index(request: Request):
@@ -79,67 +239,270 @@ async def index(request: Request):
     Renders the main HTML form page for vehicle data input.
     """
     return templates.TemplateResponse(
-            "vehicledata.html",{"request": request, "context": "Rendering"})
+            request, "vehicledata.html", {"context": "Rendering"})
+
+# Readiness probe, healthy only once the model is resident in memory
+@app.get("/health")
+async def healthRouteClient():
+    """
+    Reports whether the server is ready to serve predictions.
+    """
+    if not model_holder.is_ready:
+        return JSONResponse({"status": "loading"}, status_code=503)
+    return {"status": "ready", "model_version": model_holder.registry_version}
+
+# Prometheus scrape endpoint with the per-stage latency histograms of the serving path
+@app.get("/metrics")
+async def metricsRouteClient():
+    """
+    Exposes the serving metrics in the Prometheus text format.
+    """
+    return Response(metrics.expose(), media_type="text/plain; version=0.0.4")
+
+# Hit, miss and eviction counters of the prediction cache
+@app.get("/predict/cache")
+async def predictionCacheRouteClient():
+    """
+    Reports the prediction cache counters.
+    """
+    return prediction_cache.stats()
+
+# Kept request traces, to diagnose individual tail-latency outliers
+@app.get("/debug/traces")
+async def tracesRouteClient(limit: int = Query(50, ge=1, le=1000), min_duration_ms: float = Query(0.0, ge=0),
+                            order: str = Query("recent", pattern="^(recent|slowest)$")):
+    """
+    Returns the traces kept in the ring buffer, newest or slowest first, with their spans.
+    """
+    if not tracer.enabled:
+        return JSONResponse({"status": False, "error": "Tracing is disabled"}, status_code=404)
+    return {"traces": tracer.recent(limit=limit, min_duration_ms=min_duration_ms, slowest=order == "slowest")}
 
 # Route to trigger the model training process
 @app.get("/train")
 async def trainRouteClient():
     """
-    Endpoint to initiate the model training pipeline.
+    Endpoint to start the model training pipeline as a background job.
+    Triggers received while a job is running are coalesced into that job.
     """
     try:
-        train_pipeline = TrainPipeline()
-        train_pipeline.run_pipeline()
-        return Response("Training successful!!!")
+        job, coalesced = await run_in_threadpool(training_job_manager.submit)
+        return JSONResponse({"job_id": job.job_id, "status": job.status, "coalesced": coalesced,
+                             "status_url": f"/train/{job.job_id}"}, status_code=202)
 
     except Exception as e:
         return Response(f"Error Occurred! {e}")
 
-# Route to handle form submission and make predictions
+# Route to poll the status of a training job
+@app.get("/train/{job_id}")
+async def trainStatusRouteClient(job_id: str):
+    """
+    Endpoint reporting the status, current stage and stage timings of a training job.
+    """
+    status = training_job_manager.get_status(job_id)
+    if status is None:
+        return JSONResponse({"status": False, "error": f"Unknown training job {job_id}"}, status_code=404)
+    return status
+
+# Typed JSON route scoring a single record, the fast path for API clients
+@app.post("/predict", response_model=PredictionResponse)
+async def predictJsonRouteClient(vehicle_record: VehicleRecord):
+    """
+    Endpoint to receive one typed record, validated once by its schema, and return a compact JSON prediction.
+    """
+    if not model_holder.is_ready:
+        return JSONResponse({"status": False, "error": "Model is not loaded yet"}, status_code=503)
+
+    try:
+        value = await predict_vehicle_record(vehicle_record, source="json")
+        return JSONResponse({"prediction": value, "response": get_response_status(value)})
+
+    except InferenceOverloadedError:
+        prediction_errors_total.inc("json")
+        raise
+    except Exception as e:
+        prediction_errors_total.inc("json")
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=500)
+
+# Route to handle form submission and make predictions, a thin wrapper over the JSON path
 @app.post("/")
 async def predictRouteClient(request: Request):
     """
     Endpoint to receive form data, process it, and make a prediction.
     """
+    if not model_holder.is_ready:
+        return JSONResponse({"status": False, "error": "Model is not loaded yet"}, status_code=503)
+
     try:
         form = DataForm(request)
-        await form.get_vehicle_data()
-        
-        vehicle_data = VehicleData(
-                                Gender= form.Gender,
-                                Age = form.Age,
-                                Driving_License = form.Driving_License,
-                                Region_Code = form.Region_Code,
-                                Previously_Insured = form.Previously_Insured,
-                                Annual_Premium = form.Annual_Premium,
-                                Policy_Sales_Channel = form.Policy_Sales_Channel,
-                                Vintage = form.Vintage,
-                                Vehicle_Age_lt_1_Year = form.Vehicle_Age_lt_1_Year,
-                                Vehicle_Age_gt_2_Years = form.Vehicle_Age_gt_2_Years,
-                                Vehicle_Damage_Yes = form.Vehicle_Damage_Yes
-                                )
-
-        # Convert form data into a DataFrame for the model
-        vehicle_df = vehicle_data.get_vehicle_input_data_frame()
-
-        # Initialize the prediction pipeline
-        model_predictor = VehicleDataClassifier()
-
-        # Make a prediction and retrieve the result
-        value = model_predictor.predict(dataframe=vehicle_df)[0]
-
-        # Interpret the prediction result as 'Response-Yes' or 'Response-No'
-        status = "Response-Yes" if value == 1 else "Response-No"
+        with prediction_stage_seconds.time("form_parse"), tracer.span("form_parse"):
+            await form.get_vehicle_data()
+            vehicle_record = form.get_vehicle_record()
+
+        # Make a prediction, batched together with concurrent submissions, and retrieve the result
+        value = await predict_vehicle_record(vehicle_record, source="form")
 
         # Render the same HTML page with the prediction result
-        return templates.TemplateResponse(
-            "vehicledata.html",
-            {"request": request, "context": status},
-        )
-        
+        with prediction_stage_seconds.time("render"), tracer.span("render"):
+            return templates.TemplateResponse(
+                request, "vehicledata.html", {"context": get_response_status(value)})
+
+    except InferenceOverloadedError:
+        prediction_errors_total.inc("form")
+        raise
     except Exception as e:
+        prediction_errors_total.inc("form")
         return {"status": False, "error": f"{e}"}
 
+# Route to score many JSON records in a single vectorized model call
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predictBatchRouteClient(batch: BatchPredictionRequest):
+    """
+    Endpoint to receive a batch of typed records and return one prediction per record.
+    """
+    if not model_holder.is_ready:
+        return JSONResponse({"status": False, "error": "Model is not loaded yet"}, status_code=503)
+
+    try:
+        start = time.perf_counter()
+        records = [record.model_dump() for record in batch.records]
+        snapshot = model_holder.get_snapshot()
+        predictions, timings = await inference_executor.run(model_predictor.predict_batch, records, snapshot)
+        if prediction_capture.enabled:
+            features = [[record[column] for column in MODEL_FEATURE_COLUMNS] for record in records]
+            prediction_capture.capture(features, predictions, snapshot.model_id,
+                                       (time.perf_counter() - start) * 1000, source="batch")
+        return BatchPredictionResponse(predictions=predictions, count=len(predictions), timings_ms=timings)
+
+    except InferenceOverloadedError:
+        prediction_errors_total.inc("batch")
+        raise
+    except Exception as e:
+        prediction_errors_total.inc("batch")
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=500)
+
+# Route to score a whole raw customer extract uploaded as CSV, streaming predictions back
+@app.post("/predict/csv")
+async def predictCsvRouteClient(request: Request, output_format: str = Query(CSV_OUTPUT_FORMAT, alias="format")):
+    """
+    Endpoint to receive a raw CSV body (same columns as notebook/Data.csv) and stream back
+    one prediction per row as CSV or NDJSON, chunk by chunk while the upload is still being read.
+    """
+    if not model_holder.is_ready:
+        return JSONResponse({"status": False, "error": "Model is not loaded yet"}, status_code=503)
+    if output_format not in (CSV_OUTPUT_FORMAT, NDJSON_OUTPUT_FORMAT):
+        return JSONResponse({"status": False, "error": f"Unsupported format: {output_format}"}, status_code=422)
+
+    # Admission is decided once up front, the chunks of an admitted upload wait for a worker
+    inference_executor.check_capacity()
+    # The whole upload is scored, and labeled, by the model resident when it started
+    snapshot = model_holder.get_snapshot()
+
+    async def score_chunk(chunk):
+        start = time.perf_counter()
+        predictions = await inference_executor.run(snapshot.model.predict, chunk, shed=False)
+        if prediction_capture.enabled:
+            prediction_capture.capture(chunk.to_numpy(dtype=np.float64), predictions, snapshot.model_id,
+                                       (time.perf_counter() - start) * 1000, source="csv")
+        return predictions
+
+    media_type = "text/csv" if output_format == CSV_OUTPUT_FORMAT else "application/x-ndjson"
+    return UploadStreamingResponse(stream_csv_predictions(request.stream(), score_chunk,
+                                                          chunk_rows=CSV_PREDICTION_CHUNK_ROWS,
+                                                          output_format=output_format),
+                                   media_type=media_type)
+
+# Route to score a bulk batch sent as Arrow, the columnar buffers go to the model without per-value parsing
+@app.post("/predict/arrow")
+async def predictArrowRouteClient(request: Request):
+    """
+    Endpoint to receive an Arrow IPC stream (or an Arrow IPC file / Feather body) of engineered records
+    and return their predictions as an Arrow IPC stream, with the id column when the body has one.
+    """
+    if not model_holder.is_ready:
+        return JSONResponse({"status": False, "error": "Model is not loaded yet"}, status_code=503)
+    if not arrow_available():
+        return JSONResponse({"status": False, "error": "pyarrow is not installed on this server"}, status_code=415)
+
+    try:
+        start = time.perf_counter()
+        body = await request.body()
+        snapshot = model_holder.get_snapshot()
+        content, features, predictions = await inference_executor.run(
+            score_arrow_body, body, functools.partial(model_predictor.predict_matrix, snapshot=snapshot))
+        prediction_capture.capture(features, predictions, snapshot.model_id,
+                                   (time.perf_counter() - start) * 1000, source="arrow")
+        return Response(content, media_type=ARROW_STREAM_MEDIA_TYPE)
+
+    except InferenceOverloadedError:
+        prediction_errors_total.inc("arrow")
+        raise
+    except ValueError as e:
+        prediction_errors_total.inc("arrow")
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=422)
+    except Exception as e:
+        prediction_errors_total.inc("arrow")
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=500)
+
+# Route to rank an uploaded customer extract by probability of responding
+@app.post("/rank", response_model=RankingResponse)
+async def rankRouteClient(request: Request, k: int = Query(RANKING_DEFAULT_K, ge=1, le=RANKING_MAX_K)):
+    """
+    Endpoint to receive a raw CSV body (same columns as notebook/Data.csv) and return the k customers
+    most likely to respond with their scores. Only one chunk and the current top k are held in memory.
+    """
+    if not model_holder.is_ready:
+        return JSONResponse({"status": False, "error": "Model is not loaded yet"}, status_code=503)
+
+    # Admission is decided once up front, the chunks of an admitted upload wait for a worker
+    inference_executor.check_capacity()
+    # Every chunk of the upload is scored by the model resident when it started
+    snapshot = model_holder.get_snapshot()
+    try:
+        async def score_chunk(chunk):
+            return await inference_executor.run(model_predictor.predict_scores, chunk, snapshot, shed=False)
+
+        selector = await rank_csv_chunks(iter_csv_chunks(request.stream(), RANKING_CHUNK_ROWS), score_chunk, k)
+        return RankingResponse(k=k, rows_scored=selector.rows_seen, leads=selector.result())
+
+    except Exception as e:
+        prediction_errors_total.inc("rank")
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=500)
+
+# Route to rank the customers stored in a MongoDB collection by probability of responding
+@app.get("/rank/collection", response_model=RankingResponse)
+async def rankCollectionRouteClient(k: int = Query(RANKING_DEFAULT_K, ge=1, le=RANKING_MAX_K),
+                                    collection: str = DATA_INGESTION_COLLECTION_NAME):
+    """
+    Endpoint to rank a whole stored collection, one of the collections allowed by RANKING_ALLOWED_COLLECTIONS.
+    The cursor is read chunk by chunk on the server's threadpool, inference workers only score the chunks.
+    """
+    if collection not in ranking_config.allowed_collections:
+        return JSONResponse({"status": False, "error": f"Collection {collection} cannot be ranked"}, status_code=403)
+    if not model_holder.is_ready:
+        return JSONResponse({"status": False, "error": "Model is not loaded yet"}, status_code=503)
+
+    # Admission is decided once up front, the chunks of an admitted collection wait for a worker
+    inference_executor.check_capacity()
+    # Every chunk of the collection is scored by the model resident when it started
+    snapshot = model_holder.get_snapshot()
+    try:
+        # pymongo is only imported when a stored collection is ranked
+        from src.data_access.proj1_data import Proj1Data
+
+        proj1_data = await run_in_threadpool(Proj1Data)
+        chunks = proj1_data.iter_collection_chunks(collection_name=collection, chunk_rows=RANKING_CHUNK_ROWS)
+
+        async def score_chunk(chunk):
+            return await inference_executor.run(model_predictor.predict_scores, chunk, snapshot, shed=False)
+
+        selector = await rank_csv_chunks(iterate_in_threadpool(chunks), score_chunk, k)
+        return RankingResponse(k=k, rows_scored=selector.rows_seen, leads=selector.result())
+
+    except Exception as e:
+        prediction_errors_total.inc("rank")
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=500)
+
 # Main entry point to start the FastAPI server
 if __name__ == "__main__":
     app_run(app, host=APP_HOST, port=APP_PORT)
\ No newline at end of file
@@ -1,34 +1,74 @@
-import boto3
-from src.configuration.aws_connection import S3Client
+from src.cloud_storage.model_cache import ModelCache
+from src.cloud_storage.object_metadata import NOT_CACHED, ObjectMetadataCache
+from src.cloud_storage.storage_backend import StorageBackend, get_storage_backend
 from io import StringIO
-from typing import Union,List
+from typing import TYPE_CHECKING,List,Optional,Union
 import os,sys
+from src.entity.config_entity import S3TransferConfig, StorageConfig
 from src.logger import logging
-from mypy_boto3_s3.service_resource import Bucket
 from src.exception import MyException
-from botocore.exceptions import ClientError
 from pandas import DataFrame,read_csv
 import pickle
+from src.utils.tracing import tracer
+
+if TYPE_CHECKING:
+    from mypy_boto3_s3.service_resource import Bucket
 
 
 class SimpleStorageService:
     """
     A class for interacting with AWS S3 storage, providing methods for file management, 
     data uploads, and data retrieval in S3 buckets.
+
+    The objects live in the storage backend selected by StorageConfig: AWS S3 or an S3-compatible server
+    such as MinIO (s3), or one directory per bucket on the local filesystem (local), so the pipeline and
+    the server also run, and can be benchmarked, without AWS.
     """
 
-    def __init__(self):
+    # Object metadata shared by every instance of the process (estimator, evaluation and pusher)
+    metadata_cache = ObjectMetadataCache()
+
+    def __init__(self, model_cache: ModelCache = None, transfer_config: S3TransferConfig = S3TransferConfig(),
+                 storage_config: StorageConfig = StorageConfig(), backend: StorageBackend = None):
         """
-        Initializes the SimpleStorageService instance with S3 resource and client
-        from the S3Client class.
+        Initializes the SimpleStorageService instance with the configured storage backend,
+        the S3 one connecting through the S3Client class.
+
+        Args:
+            model_cache (ModelCache): Local disk cache of the models read from S3, the configured one by default.
+            transfer_config (S3TransferConfig): Part size and concurrency of S3 uploads and downloads.
+            storage_config (StorageConfig): Selection of the storage backend.
+            backend (StorageBackend): Storage backend to use instead of the configured one.
+        """
+        self.backend = backend or get_storage_backend(storage_config=storage_config, model_cache=model_cache,
+                                                      transfer_config=transfer_config)
+
+    def get_object_metadata(self, bucket_name: str, s3_key: str) -> Optional[dict]:
+        """
+        Returns the size, ETag and last-modified time of the object stored under exactly s3_key,
+        with one HEAD request at most per metadata cache TTL.
+
+        Args:
+            bucket_name (str): Name of the S3 bucket.
+            s3_key (str): Exact key of the object.
+
+        Returns:
+            Optional[dict]: The object metadata, None when there is no such object.
         """
-        s3_client = S3Client()
-        self.s3_resource = s3_client.s3_resource
-        self.s3_client = s3_client.s3_client
+        metadata = self.metadata_cache.get(bucket_name, s3_key)
+        if metadata is not NOT_CACHED:
+            return metadata
+        try:
+            metadata = self.backend.head_object(bucket_name, s3_key)
+        except Exception as e:
+            raise MyException(e, sys) from e
+        self.metadata_cache.put(bucket_name, s3_key, metadata)
+        return metadata
 
     def s3_key_path_available(self, bucket_name, s3_key) -> bool:
         """
         Checks if a specified S3 key path (file path) is available in the specified bucket.
+        The key must match exactly, model.pkl.bak does not make model.pkl available.
 
         Args:
             bucket_name (str): Name of the S3 bucket.
@@ -38,9 +78,7 @@ class SimpleStorageService:
             bool: True if the file exists, False otherwise.
         """
         try:
-            bucket = self.get_bucket(bucket_name)
-            file_objects = [file_object for file_object in bucket.objects.filter(Prefix=s3_key)]
-            return len(file_objects) > 0
+            return self.get_object_metadata(bucket_name, s3_key) is not None
         except Exception as e:
             raise MyException(e, sys)
 
@@ -71,9 +109,9 @@ class SimpleStorageService:
         except Exception as e:
             raise MyException(e, sys) from e
 
-    def get_bucket(self, bucket_name: str) -> Bucket:
+    def get_bucket(self, bucket_name: str) -> "Bucket":
         """
-        Retrieves the S3 bucket object based on the provided bucket name.
+        Retrieves the S3 bucket object based on the provided bucket name, S3 backend only.
 
         Args:
             bucket_name (str): The name of the S3 bucket.
@@ -83,37 +121,36 @@ class SimpleStorageService:
         """
         logging.info("Entered the get_bucket method of SimpleStorageService class")
         try:
-            bucket = self.s3_resource.Bucket(bucket_name)
+            bucket = self.backend.get_bucket(bucket_name)
             logging.info("Exited the get_bucket method of SimpleStorageService class")
             return bucket
         except Exception as e:
             raise MyException(e, sys) from e
 
-    def get_file_object(self, filename: str, bucket_name: str) -> Union[List[object], object]:
+    def get_file_object(self, filename: str, bucket_name: str) -> object:
         """
-        Retrieves the file object(s) from the specified bucket based on the filename.
+        Retrieves the file object stored under exactly filename in the specified bucket.
 
         Args:
             filename (str): The name of the file to retrieve.
             bucket_name (str): The name of the S3 bucket.
 
         Returns:
-            Union[List[object], object]: The S3 file object or list of file objects.
+            object: The S3 file object.
         """
         logging.info("Entered the get_file_object method of SimpleStorageService class")
         try:
-            bucket = self.get_bucket(bucket_name)
-            file_objects = [file_object for file_object in bucket.objects.filter(Prefix=filename)]
-            func = lambda x: x[0] if len(x) == 1 else x
-            file_objs = func(file_objects)
+            if not self.s3_key_path_available(bucket_name, filename):
+                raise FileNotFoundError(f"s3://{bucket_name}/{filename} does not exist")
+            file_obj = self.backend.get_object(bucket_name, filename)
             logging.info("Exited the get_file_object method of SimpleStorageService class")
-            return file_objs
+            return file_obj
         except Exception as e:
             raise MyException(e, sys) from e
 
     def load_model(self, model_name: str, bucket_name: str, model_dir: str = None) -> object:
         """
-        Loads a serialized model from the specified S3 bucket.
+        Loads a serialized model from the specified S3 bucket, through the local model cache.
 
         Args:
             model_name (str): Name of the model file in the bucket.
@@ -125,9 +162,12 @@ class SimpleStorageService:
         """
         try:
             model_file = model_dir + "/" + model_name if model_dir else model_name
-            file_object = self.get_file_object(model_file, bucket_name)
-            model_obj = self.read_object(file_object, decode=False)
-            model = pickle.loads(model_obj)
+            with tracer.span("s3.get", key=model_file) as span:
+                local_path = self.get_cached_file(model_file, bucket_name)
+                span.set("bytes", os.path.getsize(local_path))
+            with tracer.span("unpickle"):
+                with open(local_path, "rb") as file_obj:
+                    model = pickle.load(file_obj)
             logging.info("Production model loaded from S3 bucket.")
             return model
         except Exception as e:
@@ -143,18 +183,15 @@ class SimpleStorageService:
         """
         logging.info("Entered the create_folder method of SimpleStorageService class")
         try:
-            # Check if folder exists by attempting to load it
-            self.s3_resource.Object(bucket_name, folder_name).load()
-        except ClientError as e:
-            # If folder does not exist, create it
-            if e.response["Error"]["Code"] == "404":
-                folder_obj = folder_name + "/"
-                self.s3_client.put_object(Bucket=bucket_name, Key=folder_obj)
+            self.backend.create_folder(bucket_name, folder_name)
             logging.info("Exited the create_folder method of SimpleStorageService class")
+        except Exception as e:
+            raise MyException(e, sys) from e
 
     def upload_file(self, from_filename: str, to_filename: str, bucket_name: str, remove: bool = True):
         """
         Uploads a local file to the specified S3 bucket with an optional file deletion.
+        On S3, files above the multipart threshold are uploaded as concurrent parts.
 
         Args:
             from_filename (str): Path of the local file.
@@ -165,7 +202,8 @@ class SimpleStorageService:
         logging.info("Entered the upload_file method of SimpleStorageService class")
         try:
             logging.info(f"Uploading {from_filename} to {to_filename} in {bucket_name}")
-            self.s3_resource.meta.client.upload_file(from_filename, bucket_name, to_filename)
+            self.backend.upload_file(from_filename, bucket_name, to_filename)
+            self.metadata_cache.invalidate(bucket_name, to_filename)
             logging.info(f"Uploaded {from_filename} to {to_filename} in {bucket_name}")
 
             # Delete the local file if remove is True
@@ -176,6 +214,88 @@ class SimpleStorageService:
         except Exception as e:
             raise MyException(e, sys) from e
 
+    def get_cached_file(self, s3_key: str, bucket_name: str) -> str:
+        """
+        Returns the path of a local copy of an object. On S3 the object is read through the model cache,
+        revalidated by a conditional GET on its ETag and downloaded as parallel ranged GETs when it changed.
+        The local backend returns the stored file itself.
+
+        Args:
+            s3_key (str): Key of the object in the bucket.
+            bucket_name (str): Name of the S3 bucket.
+
+        Returns:
+            str: Path of the local file, never modified in place.
+        """
+        try:
+            return self.backend.get_local_path(bucket_name, s3_key)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def delete_file(self, s3_key: str, bucket_name: str) -> None:
+        """
+        Deletes an object from the specified S3 bucket, deleting a missing key is not an error.
+
+        Args:
+            s3_key (str): Key of the object in the bucket.
+            bucket_name (str): Name of the S3 bucket.
+        """
+        try:
+            self.backend.delete_object(bucket_name, s3_key)
+            self.metadata_cache.invalidate(bucket_name, s3_key)
+            logging.info(f"Deleted {s3_key} from {bucket_name}")
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def list_keys(self, prefix: str, bucket_name: str) -> List[str]:
+        """
+        Lists the keys of the objects stored under a prefix, following pagination.
+
+        Args:
+            prefix (str): Key prefix to list.
+            bucket_name (str): Name of the S3 bucket.
+
+        Returns:
+            List[str]: The keys, in the lexicographic order S3 returns them.
+        """
+        try:
+            return self.backend.list_keys(bucket_name, prefix)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def upload_json(self, data: dict, s3_key: str, bucket_name: str) -> None:
+        """
+        Writes a small JSON document to the specified S3 bucket in a single PUT (an atomic rename on the
+        local backend): readers get either the previous document or the new one.
+
+        Args:
+            data (dict): Document to write.
+            s3_key (str): Key of the object in the bucket.
+            bucket_name (str): Name of the S3 bucket.
+        """
+        try:
+            self.backend.put_json(data, bucket_name, s3_key)
+            self.metadata_cache.invalidate(bucket_name, s3_key)
+            logging.info(f"Wrote {s3_key} to {bucket_name}")
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def read_json(self, s3_key: str, bucket_name: str) -> Optional[dict]:
+        """
+        Reads a JSON document from the specified S3 bucket with one GET, bypassing the metadata cache.
+
+        Args:
+            s3_key (str): Key of the object in the bucket.
+            bucket_name (str): Name of the S3 bucket.
+
+        Returns:
+            Optional[dict]: The document, None when there is no such object.
+        """
+        try:
+            return self.backend.get_json(bucket_name, s3_key)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
     def upload_df_as_csv(self, data_frame: DataFrame, local_filename: str, bucket_filename: str, bucket_name: str) -> None:
         """
         Uploads a DataFrame as a CSV file to the specified S3 bucket.
@@ -0,0 +1,228 @@
+import glob
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from typing import Callable, List, Optional
+
+from src.entity.config_entity import ModelCacheConfig
+from src.exception import MyException
+from src.logger import logging
+from src.utils.metrics import metrics
+
+COPY_CHUNK_BYTES = 8 * 1024 * 1024
+# Server-side encryptions under which the ETag of a single part upload is the MD5 of the object,
+# SSE-KMS and SSE-C objects get an opaque ETag
+MD5_ETAG_ENCRYPTIONS = (None, "AES256")
+ENTRY_FIELDS = ("bucket", "key", "etag", "file", "size", "mtime_ns", "sha256")
+
+model_cache_hits_total = metrics.counter(
+    "vehicle_model_cache_hits_total", "Objects served from the local model cache after S3 confirmed their ETag.")
+model_cache_misses_total = metrics.counter(
+    "vehicle_model_cache_misses_total", "Objects downloaded from S3 into the local model cache.")
+model_cache_evictions_total = metrics.counter(
+    "vehicle_model_cache_evictions_total", "Entries evicted from the local model cache to stay under its size bound.")
+
+
+def file_sha256(file_path: str) -> str:
+    """
+    Hashes a file in chunks, without reading it into memory as a whole.
+    """
+    return file_digests(file_path, md5=False)[0]
+
+
+def file_digests(file_path: str, md5: bool = True) -> tuple:
+    """
+    Returns the sha256 and, when asked, the MD5 of a file in one chunked pass.
+    """
+    sha256_digest = hashlib.sha256()
+    md5_digest = hashlib.md5(usedforsecurity=False) if md5 else None
+    with open(file_path, "rb") as file_obj:
+        for chunk in iter(lambda: file_obj.read(COPY_CHUNK_BYTES), b""):
+            sha256_digest.update(chunk)
+            if md5_digest is not None:
+                md5_digest.update(chunk)
+    return sha256_digest.hexdigest(), md5_digest.hexdigest() if md5_digest is not None else None
+
+
+class ModelCache:
+    """
+    Read-through disk cache of S3 objects, keyed by bucket, key and ETag.
+
+    Every cached object is a data file named after its key and ETag plus a JSON entry recording the bucket,
+    key, ETag, size, modification time and sha256 of that file. Files are written next to their destination
+    and renamed into place, and a new version of an object gets a new data file, so readers (including
+    processes that memory-map a cached model) never see a partial or changed file. Serving an entry only
+    checks the size and modification time of its file, the sha256 is computed when the file is stored and
+    again only when those changed. The least recently used entries are evicted once the cache holds more
+    than max_bytes.
+    """
+
+    def __init__(self, cache_config: ModelCacheConfig = ModelCacheConfig()):
+        """
+        :param cache_config: Configuration of the cache directory, size bound and checksum verification
+        """
+        self.cache_config = cache_config
+        self.cache_dir = cache_config.cache_dir
+
+    @staticmethod
+    def _name(bucket_name: str, s3_key: str) -> str:
+        return hashlib.sha256(f"{bucket_name}/{s3_key}".encode()).hexdigest()[:32]
+
+    def _entry_path(self, bucket_name: str, s3_key: str) -> str:
+        return os.path.join(self.cache_dir, self._name(bucket_name, s3_key) + ".json")
+
+    def _remove(self, entry: dict) -> None:
+        for path in (entry["entry_path"], entry["path"]):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _read_entry(self, entry_path: str) -> Optional[dict]:
+        try:
+            with open(entry_path, encoding="utf-8") as file_obj:
+                entry = json.load(file_obj)
+        except (FileNotFoundError, ValueError):
+            return None
+        return dict(entry, entry_path=entry_path, path=os.path.join(self.cache_dir, entry["file"]))
+
+    def lookup(self, bucket_name: str, s3_key: str) -> Optional[dict]:
+        """
+        Returns the entry cached for an object, None when there is none or its file is damaged.
+        A file whose size and modification time are the recorded ones is taken as intact. When only the
+        modification time moved, the file is hashed again (if verify_checksum is set) and the entry repaired
+        if the sha256 still matches. Damaged entries are removed so the object is downloaded again.
+        """
+        entry = self._read_entry(self._entry_path(bucket_name, s3_key))
+        if entry is None or entry["bucket"] != bucket_name or entry["key"] != s3_key:
+            return None
+        try:
+            stat = os.stat(entry["path"])
+            intact = stat.st_size == entry["size"] and (stat.st_mtime_ns == entry.get("mtime_ns") or
+                                                        self._repair(entry, stat.st_mtime_ns))
+        except FileNotFoundError:
+            intact = False
+        if not intact:
+            logging.warning(f"Cached copy of s3://{bucket_name}/{s3_key} is damaged, discarding it")
+            self._remove(entry)
+            return None
+        return entry
+
+    def _repair(self, entry: dict, mtime_ns: int) -> bool:
+        """
+        Hashes a file touched since it was stored, and records its new modification time when it is intact.
+        """
+        if not self.cache_config.verify_checksum or file_sha256(entry["path"]) != entry["sha256"]:
+            return False
+        logging.info(f"Cached copy of s3://{entry['bucket']}/{entry['key']} was touched but is intact")
+        entry["mtime_ns"] = mtime_ns
+        self._write_entry(entry["entry_path"], {key: entry[key] for key in ENTRY_FIELDS})
+        return True
+
+    def hit(self, entry: dict) -> None:
+        """
+        Records that an entry was confirmed fresh and served, for the least recently used eviction.
+        """
+        try:
+            os.utime(entry["entry_path"])
+        except FileNotFoundError:
+            pass
+        model_cache_hits_total.inc()
+
+    def store(self, bucket_name: str, s3_key: str, etag: str, fill: Callable[[str], None], size: int = None,
+              encryption: Optional[str] = None) -> dict:
+        """
+        Downloads an object into the cache and returns its entry.
+        The file is checked against the object size, and against the ETag when the ETag is a plain MD5:
+        single part uploads stored unencrypted or with SSE-S3. A mismatch raises and leaves the cache unchanged.
+
+        :param bucket_name: Bucket of the object
+        :param s3_key: Key of the object
+        :param etag: ETag of the object being downloaded
+        :param fill: Function writing the object into the (empty) file path it is given
+        :param size: Size of the object in bytes, not checked when None
+        :param encryption: Server-side encryption of the object as S3 reports it, None when unencrypted
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            name = self._name(bucket_name, s3_key)
+            etag = etag.strip('"')
+            data_file = f"{name}-{hashlib.sha256(etag.encode()).hexdigest()[:16]}.bin"
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp-")
+            os.close(fd)
+            try:
+                fill(tmp_path)
+                if size is not None and os.path.getsize(tmp_path) != size:
+                    raise ValueError(f"Downloaded s3://{bucket_name}/{s3_key} is {os.path.getsize(tmp_path)} "
+                                     f"bytes instead of {size}")
+                sha256, md5 = file_digests(tmp_path, md5="-" not in etag and encryption in MD5_ETAG_ENCRYPTIONS)
+                if md5 is not None and md5 != etag:
+                    raise ValueError(f"Downloaded s3://{bucket_name}/{s3_key} does not match its ETag {etag}")
+                data_path = os.path.join(self.cache_dir, data_file)
+                os.replace(tmp_path, data_path)
+                stat = os.stat(data_path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+
+            entry_path = self._entry_path(bucket_name, s3_key)
+            previous = self._read_entry(entry_path)
+            self._write_entry(entry_path, {"bucket": bucket_name, "key": s3_key, "etag": etag, "file": data_file,
+                                           "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256})
+            if previous is not None and previous["file"] != data_file:
+                # Processes still mapping the previous version keep their open file
+                try:
+                    os.remove(previous["path"])
+                except FileNotFoundError:
+                    pass
+            model_cache_misses_total.inc()
+            self.evict(keep=entry_path)
+            return self._read_entry(entry_path)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def _write_entry(self, entry_path: str, entry: dict) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file_obj:
+                json.dump(entry, file_obj)
+            os.replace(tmp_path, entry_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def entries(self) -> List[dict]:
+        """
+        Returns every cached entry, least recently used first.
+        """
+        entries = []
+        for entry_path in glob.glob(os.path.join(self.cache_dir, "*.json")):
+            entry = self._read_entry(entry_path)
+            if entry is None:
+                continue
+            try:
+                entry["last_used"] = os.path.getmtime(entry_path)
+            except FileNotFoundError:
+                continue
+            entries.append(entry)
+        return sorted(entries, key=lambda entry: entry["last_used"])
+
+    def evict(self, keep: str = None) -> None:
+        """
+        Evicts the least recently used entries until the cache holds at most max_bytes.
+
+        :param keep: Entry path never evicted, the one just stored
+        """
+        entries = self.entries()
+        total = sum(entry["size"] for entry in entries)
+        for entry in entries:
+            if total <= self.cache_config.max_bytes:
+                break
+            if entry["entry_path"] == keep:
+                continue
+            logging.info(f"Evicting s3://{entry['bucket']}/{entry['key']} ({entry['size']} bytes) from the model cache")
+            self._remove(entry)
+            total -= entry["size"]
+            model_cache_evictions_total.inc()
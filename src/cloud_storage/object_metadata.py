@@ -0,0 +1,53 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from src.entity.config_entity import S3MetadataCacheConfig
+from src.utils.metrics import metrics
+
+# Returned by ObjectMetadataCache.get when nothing (not even a miss) is cached for a key
+NOT_CACHED = object()
+
+metadata_lookups_total = metrics.counter(
+    "vehicle_s3_metadata_lookups_total", "S3 object metadata lookups, answered from the cache (hit) or by a HEAD (miss).",
+    label_name="result")
+
+
+class ObjectMetadataCache:
+    """
+    Process wide cache of the metadata of S3 objects (size, ETag, last modified) for ttl_seconds.
+    Missing objects are cached too, as None, so repeated existence checks cost one HEAD per TTL.
+    Writes through SimpleStorageService invalidate the keys they touch.
+    """
+
+    def __init__(self, cache_config: S3MetadataCacheConfig = S3MetadataCacheConfig()):
+        """
+        :param cache_config: Configuration of the time to live and number of entries
+        """
+        self.cache_config = cache_config
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, bucket_name: str, s3_key: str):
+        """
+        Returns the cached metadata of an object, None when it is known to be missing, NOT_CACHED otherwise.
+        """
+        with self._lock:
+            entry = self._entries.get((bucket_name, s3_key))
+            if entry is None or entry[0] < time.monotonic():
+                metadata_lookups_total.inc("miss")
+                return NOT_CACHED
+            metadata_lookups_total.inc("hit")
+            return entry[1]
+
+    def put(self, bucket_name: str, s3_key: str, metadata: Optional[dict]) -> None:
+        with self._lock:
+            self._entries[(bucket_name, s3_key)] = (time.monotonic() + self.cache_config.ttl_seconds, metadata)
+            self._entries.move_to_end((bucket_name, s3_key))
+            while len(self._entries) > self.cache_config.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, bucket_name: str, s3_key: str) -> None:
+        with self._lock:
+            self._entries.pop((bucket_name, s3_key), None)
@@ -0,0 +1,178 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+from mypy_boto3_s3.service_resource import Bucket
+
+from src.cloud_storage.model_cache import COPY_CHUNK_BYTES, ModelCache
+from src.cloud_storage.storage_backend import StorageBackend
+from src.configuration.aws_connection import S3Client
+from src.entity.config_entity import S3TransferConfig
+from src.logger import logging
+
+S3_MISSING_KEY_ERROR_CODES = ("404", "NoSuchKey", "NotFound")
+
+
+class S3StorageBackend(StorageBackend):
+    """
+    Storage backend of AWS S3 or any S3-compatible server (MinIO, moto) reached through endpoint_url.
+    Objects are read through a local model cache kept fresh by conditional GETs on their ETag.
+    """
+
+    name = "s3"
+
+    def __init__(self, model_cache: ModelCache = None, transfer_config: S3TransferConfig = S3TransferConfig(),
+                 endpoint_url: str = None):
+        """
+        :param model_cache: Local disk cache of the objects read, the configured one by default
+        :param transfer_config: Part size and concurrency of uploads and downloads
+        :param endpoint_url: Endpoint of an S3-compatible server, AWS S3 when empty
+        """
+        s3_client = S3Client(endpoint_url=endpoint_url)
+        self.s3_resource = s3_client.s3_resource
+        self.s3_client = s3_client.s3_client
+        self.model_cache = model_cache or ModelCache()
+        self.transfer_config = transfer_config
+
+    def head_object(self, bucket_name: str, key: str) -> Optional[dict]:
+        try:
+            response = self.s3_client.head_object(Bucket=bucket_name, Key=key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in S3_MISSING_KEY_ERROR_CODES:
+                return None
+            raise
+        return {"size": response["ContentLength"], "etag": response["ETag"].strip('"'),
+                "last_modified": response["LastModified"]}
+
+    def get_object(self, bucket_name: str, key: str) -> object:
+        return self.s3_resource.Object(bucket_name, key)
+
+    def get_bucket(self, bucket_name: str) -> Bucket:
+        return self.s3_resource.Bucket(bucket_name)
+
+    def create_folder(self, bucket_name: str, folder_name: str) -> None:
+        try:
+            # Check if folder exists by attempting to load it
+            self.s3_resource.Object(bucket_name, folder_name).load()
+        except ClientError as e:
+            # If folder does not exist, create it
+            if e.response["Error"]["Code"] == "404":
+                self.s3_client.put_object(Bucket=bucket_name, Key=folder_name + "/")
+
+    def upload_file(self, from_filename: str, bucket_name: str, key: str) -> None:
+        """
+        Files above the multipart threshold are uploaded as concurrent parts.
+        """
+        self.s3_resource.meta.client.upload_file(from_filename, bucket_name, key, Config=self.get_transfer_config())
+
+    def get_transfer_config(self) -> TransferConfig:
+        """
+        Returns the boto3 transfer settings of multipart uploads.
+        """
+        return TransferConfig(multipart_threshold=self.transfer_config.multipart_threshold_bytes,
+                              multipart_chunksize=self.transfer_config.part_size_bytes,
+                              max_concurrency=self.transfer_config.max_concurrency,
+                              use_threads=True)
+
+    def get_local_path(self, bucket_name: str, key: str) -> str:
+        """
+        Returns the path of a local copy of the object, read through the model cache.
+
+        The first request asks for the first part of the object, conditionally on the ETag of the cached copy
+        (If-None-Match): S3 answers 304 without a body when the copy is current. Otherwise the answer carries
+        the first part along with the object size and ETag, and the other parts are fetched by parallel ranged
+        GETs pinned to that ETag (If-Match), each written at its offset in a preallocated file.
+        """
+        cached = self.model_cache.lookup(bucket_name, key)
+        request = {"Bucket": bucket_name, "Key": key, "Range": f"bytes=0-{self.transfer_config.part_size_bytes - 1}"}
+        if cached is not None:
+            request["IfNoneMatch"] = f'"{cached["etag"]}"'
+        try:
+            response = self.s3_client.get_object(**request)
+        except ClientError as e:
+            code = e.response["Error"]["Code"]
+            if cached is not None and code in ("304", "NotModified"):
+                logging.info(f"Cached copy of {key} from {bucket_name} is current")
+                self.model_cache.hit(cached)
+                return cached["path"]
+            if code != "InvalidRange":
+                raise
+            # Empty objects have no byte range to ask for
+            del request["Range"]
+            response = self.s3_client.get_object(**request)
+        logging.info(f"Downloading {key} from {bucket_name} into the model cache")
+        return self.model_cache.store(bucket_name, key, response["ETag"],
+                                      lambda file_path: self.download_parts(response, key, bucket_name, file_path),
+                                      size=self._object_size(response),
+                                      encryption=response.get("ServerSideEncryption"))["path"]
+
+    @staticmethod
+    def _object_size(response: dict) -> int:
+        """
+        Size of the whole object, given a get_object response for a byte range of it or for all of it.
+        """
+        content_range = response.get("ContentRange")
+        return int(content_range.rsplit("/", 1)[1]) if content_range else response["ContentLength"]
+
+    @staticmethod
+    def _write_body(body, file_path: str, offset: int) -> None:
+        with open(file_path, "r+b") as file_obj:
+            file_obj.seek(offset)
+            for chunk in iter(lambda: body.read(COPY_CHUNK_BYTES), b""):
+                file_obj.write(chunk)
+
+    def download_parts(self, first_response: dict, key: str, bucket_name: str, file_path: str) -> None:
+        """
+        Writes an object into a preallocated local file, given the response carrying its first part.
+        The remaining parts are fetched concurrently by ranged GETs, max_concurrency at a time.
+
+        :param first_response: get_object response for the first byte range (or the whole object)
+        :param key: Key of the object in the bucket
+        :param bucket_name: Name of the S3 bucket
+        :param file_path: Existing local file the object is written into
+        """
+        content_range = first_response.get("ContentRange")
+        size = self._object_size(first_response)
+        with open(file_path, "r+b") as file_obj:
+            file_obj.truncate(size)
+        part_size = self.transfer_config.part_size_bytes
+        ranges = [(start, min(start + part_size, size) - 1)
+                  for start in range(part_size, size, part_size)] if content_range else []
+
+        def fetch(byte_range):
+            start, end = byte_range
+            response = self.s3_client.get_object(Bucket=bucket_name, Key=key, Range=f"bytes={start}-{end}",
+                                                 IfMatch=first_response["ETag"])
+            self._write_body(response["Body"], file_path, start)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.transfer_config.max_concurrency, len(ranges) + 1)),
+                                thread_name_prefix="s3-download") as pool:
+            futures = [pool.submit(self._write_body, first_response["Body"], file_path, 0)]
+            futures += [pool.submit(fetch, byte_range) for byte_range in ranges]
+            for future in futures:
+                future.result()
+        logging.info(f"Downloaded {size} bytes of {key} in {len(ranges) + 1} parts")
+
+    def put_json(self, data: dict, bucket_name: str, key: str) -> None:
+        self.s3_client.put_object(Bucket=bucket_name, Key=key, Body=json.dumps(data, default=str).encode(),
+                                  ContentType="application/json")
+
+    def get_json(self, bucket_name: str, key: str) -> Optional[dict]:
+        try:
+            response = self.s3_client.get_object(Bucket=bucket_name, Key=key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in S3_MISSING_KEY_ERROR_CODES:
+                return None
+            raise
+        return json.loads(response["Body"].read())
+
+    def delete_object(self, bucket_name: str, key: str) -> None:
+        self.s3_client.delete_object(Bucket=bucket_name, Key=key)
+
+    def list_keys(self, bucket_name: str, prefix: str) -> List[str]:
+        keys = []
+        for page in self.s3_client.get_paginator("list_objects_v2").paginate(Bucket=bucket_name, Prefix=prefix):
+            keys.extend(obj["Key"] for obj in page.get("Contents", []))
+        return keys
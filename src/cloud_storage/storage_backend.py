@@ -0,0 +1,209 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from stat import S_ISREG
+from typing import List, Optional
+
+from src.constants import LOCAL_STORAGE_BACKEND, S3_STORAGE_BACKEND
+from src.entity.config_entity import S3TransferConfig, StorageConfig
+
+TMP_FILE_PREFIX = ".tmp-"
+
+
+class StorageBackend(ABC):
+    """
+    Object store behind SimpleStorageService, addressed by bucket and key like S3.
+    SimpleStorageService adds logging, error wrapping and the metadata cache on top of it.
+    """
+
+    name: str = None
+
+    @abstractmethod
+    def head_object(self, bucket_name: str, key: str) -> Optional[dict]:
+        """
+        Returns the size, ETag and last modified time of the object stored under exactly key, None when missing.
+        """
+
+    @abstractmethod
+    def get_object(self, bucket_name: str, key: str) -> object:
+        """
+        Returns a handle of the object whose get() answers {"Body": readable}, like a boto3 resource Object.
+        """
+
+    def get_bucket(self, bucket_name: str) -> object:
+        raise NotImplementedError(f"The {self.name} storage backend has no bucket objects")
+
+    @abstractmethod
+    def create_folder(self, bucket_name: str, folder_name: str) -> None:
+        """
+        Creates an empty folder, creating an existing one is not an error.
+        """
+
+    @abstractmethod
+    def upload_file(self, from_filename: str, bucket_name: str, key: str) -> None:
+        """
+        Stores a local file under key, replacing the object stored there.
+        """
+
+    @abstractmethod
+    def get_local_path(self, bucket_name: str, key: str) -> str:
+        """
+        Returns the path of a local file holding the object, never modified in place.
+        """
+
+    @abstractmethod
+    def put_json(self, data: dict, bucket_name: str, key: str) -> None:
+        """
+        Writes a small JSON document atomically: readers get either the previous document or the new one.
+        """
+
+    @abstractmethod
+    def get_json(self, bucket_name: str, key: str) -> Optional[dict]:
+        """
+        Returns a JSON document written by put_json, None when missing.
+        """
+
+    @abstractmethod
+    def delete_object(self, bucket_name: str, key: str) -> None:
+        """
+        Deletes an object, deleting a missing key is not an error.
+        """
+
+    @abstractmethod
+    def list_keys(self, bucket_name: str, prefix: str) -> List[str]:
+        """
+        Returns the keys stored under a prefix in lexicographic order.
+        """
+
+
+class LocalObject:
+    """
+    Object of the local filesystem backend, with the get() of a boto3 resource Object.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def get(self) -> dict:
+        with open(self.path, "rb") as file_obj:
+            data = file_obj.read()
+        return {"Body": io.BytesIO(data), "ContentLength": len(data)}
+
+
+class LocalStorageBackend(StorageBackend):
+    """
+    Storage backend keeping every bucket as a directory of root_dir, for offline runs, single-box
+    performance tests and deployments co-located with their artifacts.
+
+    Objects are written to a temporary file next to their destination and renamed into place, so readers
+    (including processes that memory-map a model) never see a partial file, and models are served from
+    their stored file directly instead of being copied into the model cache.
+    """
+
+    name = LOCAL_STORAGE_BACKEND
+
+    def __init__(self, root_dir: str):
+        """
+        :param root_dir: Directory holding one sub-directory per bucket
+        """
+        self.root_dir = os.path.abspath(root_dir)
+
+    def _path(self, bucket_name: str, key: str) -> str:
+        bucket_dir = os.path.join(self.root_dir, bucket_name)
+        path = os.path.normpath(os.path.join(bucket_dir, key))
+        if not path.startswith(bucket_dir + os.sep):
+            raise ValueError(f"Key {key} points outside of bucket {bucket_name}")
+        return path
+
+    def _write(self, path: str, write) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=TMP_FILE_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as file_obj:
+                write(file_obj)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def head_object(self, bucket_name: str, key: str) -> Optional[dict]:
+        try:
+            stat = os.stat(self._path(bucket_name, key))
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        if not S_ISREG(stat.st_mode):
+            return None
+        # Changes with every write, like the ETag of an S3 object, without hashing the file
+        return {"size": stat.st_size, "etag": f"{stat.st_mtime_ns:x}-{stat.st_size:x}",
+                "last_modified": datetime.fromtimestamp(stat.st_mtime, timezone.utc)}
+
+    def get_object(self, bucket_name: str, key: str) -> LocalObject:
+        return LocalObject(self._path(bucket_name, key))
+
+    def create_folder(self, bucket_name: str, folder_name: str) -> None:
+        os.makedirs(self._path(bucket_name, folder_name), exist_ok=True)
+
+    def upload_file(self, from_filename: str, bucket_name: str, key: str) -> None:
+        with open(from_filename, "rb") as source:
+            self._write(self._path(bucket_name, key), lambda file_obj: shutil.copyfileobj(source, file_obj))
+
+    def get_local_path(self, bucket_name: str, key: str) -> str:
+        path = self._path(bucket_name, key)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"{key} does not exist in bucket {bucket_name} of {self.root_dir}")
+        return path
+
+    def put_json(self, data: dict, bucket_name: str, key: str) -> None:
+        self._write(self._path(bucket_name, key),
+                    lambda file_obj: file_obj.write(json.dumps(data, default=str).encode()))
+
+    def get_json(self, bucket_name: str, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(bucket_name, key), encoding="utf-8") as file_obj:
+                return json.load(file_obj)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+
+    def delete_object(self, bucket_name: str, key: str) -> None:
+        try:
+            os.remove(self._path(bucket_name, key))
+        except FileNotFoundError:
+            pass
+
+    def list_keys(self, bucket_name: str, prefix: str) -> List[str]:
+        bucket_dir = os.path.join(self.root_dir, bucket_name)
+        # Only the directory of the prefix can hold matching keys
+        start_dir = os.path.join(bucket_dir, os.path.dirname(prefix))
+        keys = []
+        for dir_path, _, file_names in os.walk(start_dir):
+            for file_name in file_names:
+                if file_name.startswith(TMP_FILE_PREFIX):
+                    continue
+                key = os.path.relpath(os.path.join(dir_path, file_name), bucket_dir).replace(os.sep, "/")
+                if key.startswith(prefix):
+                    keys.append(key)
+        return sorted(keys)
+
+
+def get_storage_backend(storage_config: StorageConfig = StorageConfig(), model_cache=None,
+                        transfer_config: S3TransferConfig = S3TransferConfig()) -> StorageBackend:
+    """
+    Returns the storage backend selected by the configuration.
+    boto3 is only imported when the S3 backend is selected.
+
+    :param storage_config: Configuration of the backend, local root directory and S3 endpoint
+    :param model_cache: Local disk cache of the objects read from S3
+    :param transfer_config: Part size and concurrency of S3 uploads and downloads
+    """
+    if storage_config.backend == LOCAL_STORAGE_BACKEND:
+        return LocalStorageBackend(storage_config.local_root_dir)
+    if storage_config.backend == S3_STORAGE_BACKEND:
+        from src.cloud_storage.s3_backend import S3StorageBackend
+
+        return S3StorageBackend(model_cache=model_cache, transfer_config=transfer_config,
+                                endpoint_url=storage_config.s3_endpoint_url or None)
+    raise ValueError(f"Unknown storage backend: {storage_config.backend}")
@@ -10,6 +10,7 @@ from sklearn.compose import ColumnTransformer
 from src.constants import TARGET_COLUMN, SCHEMA_FILE_PATH, CURRENT_YEAR
 from src.entity.config_entity import DataTransformationConfig
 from src.entity.artifact_entity import DataTransformationArtifact, DataIngestionArtifact, DataValidationArtifact
+from src.entity.fused_preprocessor import FusedPreprocessor
 from src.exception import MyException
 from src.logger import logging
 from src.utils.main_utils import save_object, save_numpy_array_data, read_yaml_file
@@ -141,10 +142,14 @@ class DataTransformation:
             preprocessor = self.get_data_transformer_object()
             logging.info("Got the preprocessor object")
 
+            logging.info("Fitting the preprocessor on Training-data")
+            preprocessor.fit(input_feature_train_df)
+            # Transform through the same fused scale/offset vectors the served model uses
+            fused_preprocessor = FusedPreprocessor.from_pipeline(preprocessor) or preprocessor
             logging.info("Initializing transformation for Training-data")
-            input_feature_train_arr = preprocessor.fit_transform(input_feature_train_df)
+            input_feature_train_arr = fused_preprocessor.transform(input_feature_train_df)
             logging.info("Initializing transformation for Testing-data")
-            input_feature_test_arr = preprocessor.transform(input_feature_test_df)
+            input_feature_test_arr = fused_preprocessor.transform(input_feature_test_df)
             logging.info("Transformation done end to end to train-test df.")
 
             logging.info("Applying SMOTEENN for handling imbalanced dataset.")
@@ -8,6 +8,7 @@ from src.utils.main_utils import load_object
 import sys
 import pandas as pd
 from typing import Optional
+from src.entity.model_registry import ModelRegistry
 from src.entity.s3_estimator import Proj1Estimator
 from dataclasses import dataclass
 
@@ -27,20 +28,28 @@ class ModelEvaluation:
             self.model_eval_config = model_eval_config
             self.data_ingestion_artifact = data_ingestion_artifact
             self.model_trainer_artifact = model_trainer_artifact
+            self.best_model_version: Optional[str] = None
         except Exception as e:
             raise MyException(e, sys) from e
 
     def get_best_model(self) -> Optional[Proj1Estimator]:
         """
         Method Name :   get_best_model
-        Description :   This function is used to get model from production stage.
+        Description :   This function is used to get model from production stage,
+                        the champion of the model registry or the model pushed before the registry existed.
         
         Output      :   Returns model object if available in s3 storage
         On Failure  :   Write an exception log and then raise an exception
         """
         try:
             bucket_name = self.model_eval_config.bucket_name
-            model_path=self.model_eval_config.s3_model_key_path
+            champion = ModelRegistry(bucket_name=bucket_name,
+                                     registry_prefix=self.model_eval_config.registry_prefix).get_champion()
+            if champion is not None:
+                self.best_model_version = champion["version"]
+                model_path = champion["model_path"]
+            else:
+                model_path = self.model_eval_config.s3_model_key_path
             proj1_estimator = Proj1Estimator(bucket_name=bucket_name,
                                                model_path=model_path)
 
@@ -144,7 +153,10 @@ class ModelEvaluation:
                 is_model_accepted=evaluate_model_response.is_model_accepted,
                 s3_model_path=s3_model_path,
                 trained_model_path=self.model_trainer_artifact.trained_model_file_path,
-                changed_accuracy=evaluate_model_response.difference)
+                changed_accuracy=evaluate_model_response.difference,
+                trained_model_metric_artifact=self.model_trainer_artifact.metric_artifact,
+                best_model_f1_score=evaluate_model_response.best_model_f1_score,
+                best_model_version=self.best_model_version)
 
             logging.info(f"Model evaluation artifact: {model_evaluation_artifact}")
             return model_evaluation_artifact
@@ -1,11 +1,12 @@
 import sys
+from dataclasses import asdict
 
 from src.cloud_storage.aws_storage import SimpleStorageService
 from src.exception import MyException
 from src.logger import logging
 from src.entity.artifact_entity import ModelPusherArtifact, ModelEvaluationArtifact
 from src.entity.config_entity import ModelPusherConfig
-from src.entity.s3_estimator import Proj1Estimator
+from src.entity.model_registry import ModelRegistry
 
 
 class ModelPusher:
@@ -18,15 +19,30 @@ class ModelPusher:
         self.s3 = SimpleStorageService()
         self.model_evaluation_artifact = model_evaluation_artifact
         self.model_pusher_config = model_pusher_config
-        self.proj1_estimator = Proj1Estimator(bucket_name=model_pusher_config.bucket_name,
-                                model_path=model_pusher_config.s3_model_key_path)
+        self.model_registry = ModelRegistry(bucket_name=model_pusher_config.bucket_name,
+                                            registry_prefix=model_pusher_config.registry_prefix, s3=self.s3)
+
+    def get_version_metrics(self) -> dict:
+        """
+        Method Name :   get_version_metrics
+        Description :   This function collects the metrics stored with the pushed model version
+
+        Output      :   Returns the test metrics of the model and how it compared with the previous champion
+        """
+        evaluation = self.model_evaluation_artifact
+        metrics = asdict(evaluation.trained_model_metric_artifact) if evaluation.trained_model_metric_artifact else {}
+        return {**metrics, "changed_accuracy": evaluation.changed_accuracy,
+                "previous_champion_f1_score": evaluation.best_model_f1_score}
 
     def initiate_model_pusher(self) -> ModelPusherArtifact:
         """
         Method Name :   initiate_model_evaluation
         Description :   This function is used to initiate all steps of the model pusher
         
-        Output      :   Returns model evaluation artifact
+        Registers the accepted model as a new immutable version of the model registry and promotes it to
+        champion. Prediction servers pick the new champion up in the background.
+
+        Output      :   Returns model pusher artifact
         On Failure  :   Write an exception log and then raise an exception
         """
         logging.info("Entered initiate_model_pusher method of ModelTrainer class")
@@ -35,10 +51,15 @@ class ModelPusher:
             print("------------------------------------------------------------------------------------------------")
             logging.info("Uploading artifacts folder to s3 bucket")
             
-            logging.info("Uploading new model to S3 bucket....")
-            self.proj1_estimator.save_model(from_file=self.model_evaluation_artifact.trained_model_path)
+            logging.info("Registering new model version in S3 bucket....")
+            version = self.model_registry.register_version(
+                model_file_path=self.model_evaluation_artifact.trained_model_path,
+                metrics=self.get_version_metrics(),
+                metadata={"previous_champion_version": self.model_evaluation_artifact.best_model_version})
+            self.model_registry.promote(version)
             model_pusher_artifact = ModelPusherArtifact(bucket_name=self.model_pusher_config.bucket_name,
-                                                        s3_model_path=self.model_pusher_config.s3_model_key_path)
+                                                        s3_model_path=self.model_registry.model_path(version),
+                                                        model_version=version)
 
             logging.info("Uploaded artifacts folder to s3 bucket")
             logging.info(f"Model pusher artifact: [{model_pusher_artifact}]")
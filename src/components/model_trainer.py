@@ -1,4 +1,5 @@
 import sys
+from datetime import datetime, timezone
 from typing import Tuple
 
 import numpy as np
@@ -11,6 +12,7 @@ from src.utils.main_utils import load_numpy_array_data, load_object, save_object
 from src.entity.config_entity import ModelTrainerConfig
 from src.entity.artifact_entity import DataTransformationArtifact, ModelTrainerArtifact, ClassificationMetricArtifact
 from src.entity.estimator import MyModel
+from src.entity.model_artifact import array_model_path, can_write_array_model, write_array_model
 
 class ModelTrainer:
     def __init__(self, data_transformation_artifact: DataTransformationArtifact,
@@ -66,6 +68,24 @@ class ModelTrainer:
         except Exception as e:
             raise MyException(e, sys) from e
 
+    def get_array_model_metadata(self, trained_model: RandomForestClassifier,
+                                 metric_artifact: ClassificationMetricArtifact) -> dict:
+        """
+        Method Name :   get_array_model_metadata
+        Description :   This function describes the trained model in the JSON header of its array model
+
+        Output      :   Returns the creation time, hyperparameters and test metrics of the model
+        """
+        return {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "model_type": type(trained_model).__name__,
+            "params": {name: value for name, value in trained_model.get_params().items()
+                       if isinstance(value, (int, float, str, bool, type(None)))},
+            "metrics": {"f1_score": float(metric_artifact.f1_score),
+                        "precision_score": float(metric_artifact.precision_score),
+                        "recall_score": float(metric_artifact.recall_score)},
+        }
+
     def initiate_model_trainer(self) -> ModelTrainerArtifact:
         logging.info("Entered initiate_model_trainer method of ModelTrainer class")
         """
@@ -99,9 +119,17 @@ class ModelTrainer:
             # Save the final model object that includes both preprocessing and the trained model
             logging.info("Saving new model as performace is better than previous one.")
             my_model = MyModel(preprocessing_object=preprocessing_obj, trained_model_object=trained_model)
+            my_model.fuse_preprocessing()
             save_object(self.model_trainer_config.trained_model_file_path, my_model)
             logging.info("Saved final model object that includes both preprocessing and the trained model")
 
+            # Save the same model as an array model, mapped by the serving side instead of being unpickled
+            if can_write_array_model(my_model):
+                write_array_model(my_model, array_model_path(self.model_trainer_config.trained_model_file_path),
+                                  metadata=self.get_array_model_metadata(trained_model, metric_artifact))
+            else:
+                logging.info("Model cannot be written as an array model, only the pickled model is saved")
+
             # Create and return the ModelTrainerArtifact
             model_trainer_artifact = ModelTrainerArtifact(
                 trained_model_file_path=self.model_trainer_config.trained_model_file_path,
@@ -7,10 +7,11 @@ class S3Client:
 
     s3_client=None
     s3_resource = None
-    def __init__(self, region_name=REGION_NAME):
+    def __init__(self, region_name=REGION_NAME, endpoint_url=None):
         """ 
         This Class gets aws credentials from env_variable and creates an connection with s3 bucket 
         and raise exception when environment variable is not set
+        endpoint_url points the connection at an S3-compatible server (MinIO, moto) instead of AWS
         """
 
         if S3Client.s3_resource==None or S3Client.s3_client==None:
@@ -24,12 +25,14 @@ class S3Client:
             S3Client.s3_resource = boto3.resource('s3',
                                             aws_access_key_id=__access_key_id,
                                             aws_secret_access_key=__secret_access_key,
-                                            region_name=region_name
+                                            region_name=region_name,
+                                            endpoint_url=endpoint_url
                                             )
             S3Client.s3_client = boto3.client('s3',
                                         aws_access_key_id=__access_key_id,
                                         aws_secret_access_key=__secret_access_key,
-                                        region_name=region_name
+                                        region_name=region_name,
+                                        endpoint_url=endpoint_url
                                         )
         self.s3_resource = S3Client.s3_resource
         self.s3_client = S3Client.s3_client
\ No newline at end of file
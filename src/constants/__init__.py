@@ -69,7 +69,141 @@ MODEL Evaluation related constants
 MODEL_EVALUATION_CHANGED_THRESHOLD_SCORE: float = 0.02
 MODEL_BUCKET_NAME = "vehicle-insurance-analysis"
 MODEL_PUSHER_S3_KEY = "model-registry"
+# Registry layout under MODEL_PUSHER_S3_KEY: versions/<version>/ holds the immutable files of every pushed model,
+# champion.json points at the version served
+MODEL_REGISTRY_VERSIONS_DIR: str = "versions"
+MODEL_REGISTRY_METADATA_FILE_NAME: str = "metadata.json"
+MODEL_REGISTRY_CHAMPION_FILE_NAME: str = "champion.json"
 
 
 APP_HOST = "0.0.0.0"
-APP_PORT = 5000
\ No newline at end of file
+APP_PORT = 5000
+
+"""
+Prediction serving related constants
+"""
+MODEL_LOAD_RETRY_INTERVAL_SECONDS: float = 30.0
+# How often the server looks for a newly promoted champion in the model registry, 0 to disable hot reload
+MODEL_REGISTRY_POLL_INTERVAL_SECONDS_KEY = "MODEL_REGISTRY_POLL_INTERVAL_SECONDS"
+MODEL_REGISTRY_POLL_INTERVAL_SECONDS: float = 60.0
+SKLEARN_INFERENCE_BACKEND: str = "sklearn"
+COMPILED_INFERENCE_BACKEND: str = "compiled"
+# Compiled forest voting tree by tree until the remaining trees cannot flip the label. Only batches of
+# CompiledForest.early_exit_min_rows rows or more exit early: bulk routes and batcher batches under load
+EARLY_EXIT_INFERENCE_BACKEND: str = "compiled_early_exit"
+MODEL_INFERENCE_BACKEND_KEY = "MODEL_INFERENCE_BACKEND"
+MODEL_INFERENCE_BACKEND: str = COMPILED_INFERENCE_BACKEND
+# Directory of the memory-mapped model segments shared by the workers of a server, empty to disable
+SHARED_MODEL_DIR_KEY = "SHARED_MODEL_DIR"
+SHARED_MODEL_DIR: str = os.path.join("/dev/shm", "vehicle-insurance-model") if os.path.isdir("/dev/shm") else ""
+PREDICTION_BATCH_MAX_RECORDS: int = 10000
+CSV_PREDICTION_CHUNK_ROWS: int = 5000
+MODEL_FEATURE_COLUMNS: list = ["Gender", "Age", "Driving_License", "Region_Code", "Previously_Insured",
+                               "Annual_Premium", "Policy_Sales_Channel", "Vintage", "Vehicle_Age_lt_1_Year",
+                               "Vehicle_Age_gt_2_Years", "Vehicle_Damage_Yes"]
+
+# Micro-batching of concurrent single-row predictions, overridable per deployment through env variables
+PREDICTION_BATCHER_MAX_BATCH_SIZE_KEY = "PREDICTION_BATCHER_MAX_BATCH_SIZE"
+PREDICTION_BATCHER_MAX_WAIT_MS_KEY = "PREDICTION_BATCHER_MAX_WAIT_MS"
+PREDICTION_BATCHER_MAX_QUEUE_SIZE_KEY = "PREDICTION_BATCHER_MAX_QUEUE_SIZE"
+PREDICTION_BATCHER_MAX_BATCH_SIZE: int = 64
+PREDICTION_BATCHER_MAX_WAIT_MS: float = 5.0
+PREDICTION_BATCHER_MAX_QUEUE_SIZE: int = 1024
+
+# Bounded worker pool for CPU-bound inference, overload is shed with a 503
+INFERENCE_MAX_WORKERS_KEY = "INFERENCE_MAX_WORKERS"
+INFERENCE_MAX_QUEUE_SIZE_KEY = "INFERENCE_MAX_QUEUE_SIZE"
+INFERENCE_MAX_WORKERS: int = min(4, os.cpu_count() or 1)
+INFERENCE_MAX_QUEUE_SIZE: int = 32
+INFERENCE_RETRY_AFTER_SECONDS: float = 1.0
+
+# Background training jobs, their status is shared by every worker of the server through the job directory
+TRAINING_JOB_DIR_KEY = "TRAINING_JOB_DIR"
+TRAINING_JOB_HISTORY_SIZE: int = 20
+TRAINING_JOB_DIR: str = os.path.join(ARTIFACT_DIR, "training_jobs")
+
+# Memoization of predictions for repeated feature vectors
+PREDICTION_CACHE_MAX_ENTRIES_KEY = "PREDICTION_CACHE_MAX_ENTRIES"
+PREDICTION_CACHE_TTL_SECONDS_KEY = "PREDICTION_CACHE_TTL_SECONDS"
+PREDICTION_CACHE_MAX_ENTRIES: int = 100000
+PREDICTION_CACHE_TTL_SECONDS: float = 3600.0
+
+# Cold start of the serving process: import time budget of app.py and modules it must never import
+SERVING_IMPORT_TIME_BUDGET_SECONDS_KEY = "SERVING_IMPORT_TIME_BUDGET_SECONDS"
+SERVING_IMPORT_TIME_BUDGET_SECONDS: float = 1.5
+SERVING_FORBIDDEN_IMPORTS: list = ["imblearn", "sklearn.ensemble", "boto3", "pymongo",
+                                   "src.pipline.training_pipeline", "src.components"]
+
+# Serving benchmark harness
+BENCHMARK_DIR: str = "benchmarks"
+BENCHMARK_DATA_FILE_PATH: str = os.path.join("notebook", "Data.csv")
+BENCHMARK_MODEL_FILE_NAME: str = "model.pkl"
+
+# Capture of served predictions back into MongoDB, off unless enabled
+PREDICTION_CAPTURE_ENABLED_KEY = "PREDICTION_CAPTURE_ENABLED"
+PREDICTION_CAPTURE_MAX_BATCH_SIZE_KEY = "PREDICTION_CAPTURE_MAX_BATCH_SIZE"
+PREDICTION_CAPTURE_FLUSH_INTERVAL_SECONDS_KEY = "PREDICTION_CAPTURE_FLUSH_INTERVAL_SECONDS"
+PREDICTION_CAPTURE_MAX_BUFFERED_ROWS_KEY = "PREDICTION_CAPTURE_MAX_BUFFERED_ROWS"
+PREDICTION_CAPTURE_ENABLED: str = "false"
+PREDICTION_CAPTURE_COLLECTION_NAME: str = "Proj1-Predictions"
+PREDICTION_CAPTURE_MAX_BATCH_SIZE: int = 1000
+PREDICTION_CAPTURE_FLUSH_INTERVAL_SECONDS: float = 1.0
+PREDICTION_CAPTURE_MAX_BUFFERED_ROWS: int = 100000
+
+# Ranking of the customers most likely to respond
+RANKING_DEFAULT_K: int = 500
+RANKING_MAX_K: int = 100000
+RANKING_CHUNK_ROWS: int = 10000
+RANKING_POSITIVE_CLASS: int = 1
+# Stored collections /rank/collection may read, comma separated
+RANKING_ALLOWED_COLLECTIONS_KEY = "RANKING_ALLOWED_COLLECTIONS"
+RANKING_ALLOWED_COLLECTIONS: str = DATA_INGESTION_COLLECTION_NAME
+
+# Request tracing: slow traces are always kept, the others sampled, into a ring buffer and optionally a JSON lines file
+TRACING_ENABLED_KEY = "TRACING_ENABLED"
+TRACING_SAMPLE_RATE_KEY = "TRACING_SAMPLE_RATE"
+TRACING_SLOW_THRESHOLD_MS_KEY = "TRACING_SLOW_THRESHOLD_MS"
+TRACING_BUFFER_SIZE_KEY = "TRACING_BUFFER_SIZE"
+TRACING_EXPORT_FILE_PATH_KEY = "TRACING_EXPORT_FILE_PATH"
+TRACING_ENABLED: str = "true"
+TRACING_SAMPLE_RATE: float = 0.01
+TRACING_SLOW_THRESHOLD_MS: float = 500.0
+TRACING_BUFFER_SIZE: int = 1000
+TRACING_MAX_SPANS_PER_TRACE: int = 256
+TRACING_EXPORT_FILE_PATH: str = ""
+TRACING_EXCLUDED_PATHS: list = ["/metrics", "/health", "/static", "/debug/traces"]
+TRACING_TRACE_ID_HEADER: str = "X-Trace-Id"
+
+# Compact array model written next to the pickled one, memory-mapped instead of unpickled when present
+ARRAY_MODEL_FILE_EXTENSION: str = ".vimodel"
+
+# Read-through local disk cache of the models fetched from s3, kept fresh by conditional GETs on their ETag
+MODEL_CACHE_DIR_KEY = "MODEL_CACHE_DIR"
+MODEL_CACHE_MAX_BYTES_KEY = "MODEL_CACHE_MAX_BYTES"
+MODEL_CACHE_VERIFY_CHECKSUM_KEY = "MODEL_CACHE_VERIFY_CHECKSUM"
+MODEL_CACHE_DIR: str = os.path.join(ARTIFACT_DIR, "model_cache")
+MODEL_CACHE_MAX_BYTES: int = 2 * 1024 ** 3
+MODEL_CACHE_VERIFY_CHECKSUM: str = "true"
+
+# S3 transfers: multipart uploads and ranged parallel downloads
+S3_TRANSFER_PART_SIZE_BYTES_KEY = "S3_TRANSFER_PART_SIZE_BYTES"
+S3_TRANSFER_MAX_CONCURRENCY_KEY = "S3_TRANSFER_MAX_CONCURRENCY"
+S3_TRANSFER_MULTIPART_THRESHOLD_BYTES_KEY = "S3_TRANSFER_MULTIPART_THRESHOLD_BYTES"
+S3_TRANSFER_PART_SIZE_BYTES: int = 16 * 1024 * 1024
+S3_TRANSFER_MAX_CONCURRENCY: int = 8
+S3_TRANSFER_MULTIPART_THRESHOLD_BYTES: int = 16 * 1024 * 1024
+
+# Short-lived cache of S3 object metadata (HEAD answers), shared by every SimpleStorageService of a process
+S3_METADATA_CACHE_TTL_SECONDS_KEY = "S3_METADATA_CACHE_TTL_SECONDS"
+S3_METADATA_CACHE_TTL_SECONDS: float = 30.0
+S3_METADATA_CACHE_MAX_ENTRIES: int = 1024
+
+# Object store behind SimpleStorageService: AWS S3 / an S3-compatible server (MinIO, moto) or a local directory
+STORAGE_BACKEND_KEY = "STORAGE_BACKEND"
+STORAGE_LOCAL_ROOT_DIR_KEY = "STORAGE_LOCAL_ROOT_DIR"
+S3_ENDPOINT_URL_KEY = "S3_ENDPOINT_URL"
+S3_STORAGE_BACKEND: str = "s3"
+LOCAL_STORAGE_BACKEND: str = "local"
+STORAGE_BACKEND: str = S3_STORAGE_BACKEND
+STORAGE_LOCAL_ROOT_DIR: str = os.path.join(ARTIFACT_DIR, "object_store")
+S3_ENDPOINT_URL: str = ""
@@ -0,0 +1,193 @@
+import asyncio
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+
+import numpy as np
+from pandas import DataFrame
+
+from src.constants import MODEL_FEATURE_COLUMNS
+from src.entity.config_entity import PredictionCaptureConfig
+from src.exception import MyException
+from src.logger import logging
+from src.utils.metrics import metrics
+
+captured_rows_total = metrics.counter(
+    "vehicle_prediction_capture_rows_total", "Served predictions handed to the capture buffer.")
+dropped_rows_total = metrics.counter(
+    "vehicle_prediction_capture_dropped_rows_total", "Served predictions dropped because the capture buffer was full.")
+inserted_rows_total = metrics.counter(
+    "vehicle_prediction_capture_inserted_rows_total", "Captured predictions inserted into MongoDB.")
+failed_rows_total = metrics.counter(
+    "vehicle_prediction_capture_failed_rows_total", "Captured predictions MongoDB failed to insert.")
+
+
+def mongo_collection_factory(capture_config: PredictionCaptureConfig) -> Callable[[], object]:
+    """
+    Returns a function opening the capture collection through MongoDBClient.
+    pymongo is only imported when the first batch is flushed.
+    """
+    def open_collection():
+        from src.configuration.mongo_db_connection import MongoDBClient
+
+        mongo_client = MongoDBClient(database_name=capture_config.database_name)
+        return mongo_client.database[capture_config.collection_name]
+    return open_collection
+
+
+class PredictionCapture:
+    """
+    Buffers served predictions in memory and writes them to MongoDB in the background.
+
+    capture() only appends the scored feature matrix and its predictions to a buffer, nothing is converted
+    or written on the request path. A background task flushes the buffer with unordered insert_many calls
+    of at most max_batch_size documents, as soon as that many rows are buffered or every
+    flush_interval_seconds. Writes run one at a time on a dedicated thread: while MongoDB is slow the buffer
+    grows, and once max_buffered_rows are waiting new predictions are dropped and counted
+    instead of slowing requests down.
+    """
+
+    def __init__(self, capture_config: PredictionCaptureConfig = PredictionCaptureConfig(),
+                 collection_factory: Callable[[], object] = None):
+        """
+        :param capture_config: Configuration of the batch size, flush interval and buffer limit
+        :param collection_factory: Function returning the collection to insert into (anything with insert_many,
+                                   e.g. a mongomock collection), the MongoDB capture collection by default
+        """
+        self.capture_config = capture_config
+        self.collection_factory = collection_factory or mongo_collection_factory(capture_config)
+        self._collection = None
+        self._buffer: deque = deque()
+        self.buffered_rows = 0
+        self._flush_requested: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._writer: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.capture_config.enabled
+
+    def start(self) -> None:
+        """
+        Starts the flushing task on the running event loop.
+        """
+        if self.enabled and self._worker is None:
+            self._flush_requested = asyncio.Event()
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prediction-capture")
+            self._worker = asyncio.create_task(self._run())
+            logging.info(f"Prediction capture started into {self.capture_config.collection_name} with "
+                         f"max_batch_size={self.capture_config.max_batch_size} and "
+                         f"flush_interval_seconds={self.capture_config.flush_interval_seconds}")
+
+    async def stop(self) -> None:
+        """
+        Stops the flushing task after writing what is still buffered.
+        """
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        try:
+            await self.flush()
+        finally:
+            self._writer.shutdown(wait=True)
+            self._worker = None
+            self._writer = None
+
+    def capture(self, features: np.ndarray, predictions, model_id: Optional[str], latency_ms: float,
+                source: str) -> bool:
+        """
+        Buffers scored rows, called on the event loop and never blocking.
+        Returns False when the rows were dropped because the buffer is full.
+
+        :param features: Scored rows in MODEL_FEATURE_COLUMNS order, shape (rows, features)
+        :param predictions: Prediction per row
+        :param model_id: Registry version of the model that scored the rows (key and ETag for a model pushed
+                         before the registry), read together with the model itself
+        :param latency_ms: Time spent serving the request the rows belong to
+        :param source: Route the rows were served by
+        """
+        if self._worker is None:
+            return False
+        features = np.asarray(features, dtype=np.float64).reshape(-1, len(MODEL_FEATURE_COLUMNS))
+        n_rows = features.shape[0]
+        if self.buffered_rows + n_rows > self.capture_config.max_buffered_rows:
+            dropped_rows_total.inc(amount=n_rows)
+            return False
+        self._buffer.append((features, np.asarray(predictions), model_id, latency_ms, source,
+                             datetime.now(timezone.utc)))
+        self.buffered_rows += n_rows
+        captured_rows_total.inc(amount=n_rows)
+        if self.buffered_rows >= self.capture_config.max_batch_size:
+            self._flush_requested.set()
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.capture_config.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """
+        Takes everything buffered so far and writes it to MongoDB on the capture thread.
+        Rows being written still count against max_buffered_rows until the write is over.
+        """
+        if not self._buffer:
+            return
+        entries = list(self._buffer)
+        self._buffer.clear()
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._writer, self._write, entries)
+        finally:
+            self.buffered_rows -= sum(entry[0].shape[0] for entry in entries)
+
+    @staticmethod
+    def to_documents(entries: list) -> List[dict]:
+        """
+        Turns buffered entries into one document per served prediction.
+        """
+        documents = []
+        for features, predictions, model_id, latency_ms, source, captured_at in entries:
+            frame = DataFrame(features, columns=MODEL_FEATURE_COLUMNS)
+            frame["prediction"] = predictions.astype(np.int64)
+            frame["model_id"] = model_id
+            frame["latency_ms"] = float(latency_ms)
+            frame["source"] = source
+            documents.extend(dict(document, captured_at=captured_at) for document in frame.to_dict(orient="records"))
+        return documents
+
+    def _write(self, entries: list) -> None:
+        """
+        Inserts the entries in unordered batches, runs on the capture thread.
+        A failed batch is counted and logged, never retried, so a MongoDB outage cannot pile up memory.
+        """
+        try:
+            documents = self.to_documents(entries)
+            if self._collection is None:
+                self._collection = self.collection_factory()
+            for start in range(0, len(documents), self.capture_config.max_batch_size):
+                batch = documents[start:start + self.capture_config.max_batch_size]
+                started_at = time.perf_counter()
+                try:
+                    result = self._collection.insert_many(batch, ordered=False)
+                    inserted = len(result.inserted_ids)
+                except Exception as e:
+                    # Unordered bulk writes report how many documents made it despite the errors
+                    inserted = (getattr(e, "details", None) or {}).get("nInserted", 0)
+                    logging.error(f"Capturing {len(batch)} predictions failed, {inserted} inserted: {e}")
+                inserted_rows_total.inc(amount=inserted)
+                failed_rows_total.inc(amount=len(batch) - inserted)
+                logging.debug(f"Captured {inserted} predictions in {(time.perf_counter() - started_at) * 1000:.1f}ms")
+        except Exception as e:
+            failed_rows_total.inc(amount=sum(entry[0].shape[0] for entry in entries))
+            logging.error(f"Capturing predictions failed: {MyException(e, sys)}")
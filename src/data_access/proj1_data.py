@@ -1,7 +1,7 @@
 import sys
 import pandas as pd
 import numpy as np
-from typing import Optional
+from typing import Iterator, Optional
 
 from src.configuration.mongo_db_connection import MongoDBClient
 from src.constants import DATABASE_NAME
@@ -54,4 +54,42 @@ class Proj1Data:
             return df
 
         except Exception as e:
-            raise MyException(e, sys)
\ No newline at end of file
+            raise MyException(e, sys)
+
+    def iter_collection_chunks(self, collection_name: str, chunk_rows: int,
+                               database_name: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        """
+        Streams a MongoDB collection as DataFrames of at most chunk_rows documents,
+        so a whole collection can be scored without holding it in memory.
+
+        Parameters:
+        ----------
+        collection_name : str
+            The name of the MongoDB collection to read.
+        chunk_rows : int
+            Maximum number of documents per DataFrame.
+        database_name : Optional[str]
+            Name of the database (optional). Defaults to DATABASE_NAME.
+
+        Returns:
+        -------
+        Iterator[pd.DataFrame]
+            DataFrames with the documents' fields as columns (id kept), 'na' values replaced with NaN.
+        """
+        try:
+            if database_name is None:
+                collection = self.mongo_client.database[collection_name]
+            else:
+                collection = self.mongo_client.client[database_name][collection_name]
+
+            documents = []
+            for document in collection.find().batch_size(chunk_rows):
+                documents.append(document)
+                if len(documents) >= chunk_rows:
+                    yield pd.DataFrame(documents).replace({"na": np.nan})
+                    documents = []
+            if documents:
+                yield pd.DataFrame(documents).replace({"na": np.nan})
+
+        except Exception as e:
+            raise MyException(e, sys)
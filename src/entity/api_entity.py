@@ -0,0 +1,48 @@
+from typing import Dict, List, Union
+
+from pydantic import BaseModel, Field
+
+from src.constants import PREDICTION_BATCH_MAX_RECORDS
+
+
+class VehicleRecord(BaseModel):
+    """
+    One customer with all features of the trained model, already feature engineered.
+    """
+    Gender: int = Field(ge=0, le=1)
+    Age: int
+    Driving_License: int = Field(ge=0, le=1)
+    Region_Code: float
+    Previously_Insured: int = Field(ge=0, le=1)
+    Annual_Premium: float
+    Policy_Sales_Channel: float
+    Vintage: int
+    Vehicle_Age_lt_1_Year: int = Field(ge=0, le=1)
+    Vehicle_Age_gt_2_Years: int = Field(ge=0, le=1)
+    Vehicle_Damage_Yes: int = Field(ge=0, le=1)
+
+
+class PredictionResponse(BaseModel):
+    prediction: int
+    response: str
+
+
+class RankedLead(BaseModel):
+    id: Union[int, str]
+    score: float
+
+
+class RankingResponse(BaseModel):
+    k: int
+    rows_scored: int
+    leads: List[RankedLead]
+
+
+class BatchPredictionRequest(BaseModel):
+    records: List[VehicleRecord] = Field(min_length=1, max_length=PREDICTION_BATCH_MAX_RECORDS)
+
+
+class BatchPredictionResponse(BaseModel):
+    predictions: List[int]
+    count: int
+    timings_ms: Dict[str, float]
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 
 
 @dataclass
@@ -35,15 +36,13 @@ class ModelEvaluationArtifact:
     changed_accuracy:float
     s3_model_path:str 
     trained_model_path:str
+    trained_model_metric_artifact:Optional[ClassificationMetricArtifact] = None
+    best_model_f1_score:Optional[float] = None
+    best_model_version:Optional[str] = None
 
 
 @dataclass
 class ModelPusherArtifact:
     bucket_name:str
     s3_model_path:str
-
-
-@dataclass
-class ModelPusherArtifact:
-    bucket_name:str
-    s3_model_path:str
\ No newline at end of file
+    model_version:Optional[str] = None
\ No newline at end of file
@@ -61,17 +61,106 @@ class ModelEvaluationConfig:
     changed_threshold_score: float = MODEL_EVALUATION_CHANGED_THRESHOLD_SCORE
     bucket_name: str = MODEL_BUCKET_NAME
     s3_model_key_path: str = MODEL_FILE_NAME
+    registry_prefix: str = MODEL_PUSHER_S3_KEY
 
 
 @dataclass
 class ModelPusherConfig:
     bucket_name: str = MODEL_BUCKET_NAME
     s3_model_key_path: str = MODEL_FILE_NAME
+    registry_prefix: str = MODEL_PUSHER_S3_KEY
 
 @dataclass
 class VehiclePredictorConfig:
     model_file_path: str = MODEL_FILE_NAME
     model_bucket_name: str = MODEL_BUCKET_NAME
+    inference_backend: str = os.getenv(MODEL_INFERENCE_BACKEND_KEY, MODEL_INFERENCE_BACKEND)
+    shared_model_dir: str = os.getenv(SHARED_MODEL_DIR_KEY, SHARED_MODEL_DIR)
+    registry_prefix: str = MODEL_PUSHER_S3_KEY
+    registry_poll_interval_seconds: float = float(os.getenv(MODEL_REGISTRY_POLL_INTERVAL_SECONDS_KEY,
+                                                            MODEL_REGISTRY_POLL_INTERVAL_SECONDS))
 
-    
-    
+
+@dataclass
+class PredictionBatcherConfig:
+    max_batch_size: int = int(os.getenv(PREDICTION_BATCHER_MAX_BATCH_SIZE_KEY, PREDICTION_BATCHER_MAX_BATCH_SIZE))
+    max_wait_ms: float = float(os.getenv(PREDICTION_BATCHER_MAX_WAIT_MS_KEY, PREDICTION_BATCHER_MAX_WAIT_MS))
+    max_queue_size: int = int(os.getenv(PREDICTION_BATCHER_MAX_QUEUE_SIZE_KEY, PREDICTION_BATCHER_MAX_QUEUE_SIZE))
+
+
+@dataclass
+class TrainingJobConfig:
+    job_dir: str = os.getenv(TRAINING_JOB_DIR_KEY, TRAINING_JOB_DIR)
+    history_size: int = TRAINING_JOB_HISTORY_SIZE
+
+
+@dataclass
+class PredictionCacheConfig:
+    max_entries: int = int(os.getenv(PREDICTION_CACHE_MAX_ENTRIES_KEY, PREDICTION_CACHE_MAX_ENTRIES))
+    ttl_seconds: float = float(os.getenv(PREDICTION_CACHE_TTL_SECONDS_KEY, PREDICTION_CACHE_TTL_SECONDS))
+
+
+@dataclass
+class InferenceExecutorConfig:
+    max_workers: int = int(os.getenv(INFERENCE_MAX_WORKERS_KEY, INFERENCE_MAX_WORKERS))
+    max_queue_size: int = int(os.getenv(INFERENCE_MAX_QUEUE_SIZE_KEY, INFERENCE_MAX_QUEUE_SIZE))
+    retry_after_seconds: float = INFERENCE_RETRY_AFTER_SECONDS
+
+
+@dataclass
+class PredictionCaptureConfig:
+    enabled: bool = os.getenv(PREDICTION_CAPTURE_ENABLED_KEY, PREDICTION_CAPTURE_ENABLED).lower() in ("1", "true", "yes")
+    database_name: str = DATABASE_NAME
+    collection_name: str = PREDICTION_CAPTURE_COLLECTION_NAME
+    max_batch_size: int = int(os.getenv(PREDICTION_CAPTURE_MAX_BATCH_SIZE_KEY, PREDICTION_CAPTURE_MAX_BATCH_SIZE))
+    flush_interval_seconds: float = float(os.getenv(PREDICTION_CAPTURE_FLUSH_INTERVAL_SECONDS_KEY,
+                                                    PREDICTION_CAPTURE_FLUSH_INTERVAL_SECONDS))
+    max_buffered_rows: int = int(os.getenv(PREDICTION_CAPTURE_MAX_BUFFERED_ROWS_KEY,
+                                           PREDICTION_CAPTURE_MAX_BUFFERED_ROWS))
+
+
+@dataclass
+class RankingConfig:
+    allowed_collections: tuple = tuple(name.strip() for name in
+                                       os.getenv(RANKING_ALLOWED_COLLECTIONS_KEY, RANKING_ALLOWED_COLLECTIONS).split(",")
+                                       if name.strip())
+
+
+@dataclass
+class TracingConfig:
+    enabled: bool = os.getenv(TRACING_ENABLED_KEY, TRACING_ENABLED).lower() in ("1", "true", "yes")
+    sample_rate: float = float(os.getenv(TRACING_SAMPLE_RATE_KEY, TRACING_SAMPLE_RATE))
+    slow_threshold_ms: float = float(os.getenv(TRACING_SLOW_THRESHOLD_MS_KEY, TRACING_SLOW_THRESHOLD_MS))
+    buffer_size: int = int(os.getenv(TRACING_BUFFER_SIZE_KEY, TRACING_BUFFER_SIZE))
+    max_spans_per_trace: int = TRACING_MAX_SPANS_PER_TRACE
+    export_file_path: str = os.getenv(TRACING_EXPORT_FILE_PATH_KEY, TRACING_EXPORT_FILE_PATH)
+    excluded_paths: tuple = tuple(TRACING_EXCLUDED_PATHS)
+
+
+@dataclass
+class ModelCacheConfig:
+    cache_dir: str = os.getenv(MODEL_CACHE_DIR_KEY, MODEL_CACHE_DIR)
+    max_bytes: int = int(os.getenv(MODEL_CACHE_MAX_BYTES_KEY, MODEL_CACHE_MAX_BYTES))
+    verify_checksum: bool = os.getenv(MODEL_CACHE_VERIFY_CHECKSUM_KEY,
+                                      MODEL_CACHE_VERIFY_CHECKSUM).lower() in ("1", "true", "yes")
+
+
+@dataclass
+class S3TransferConfig:
+    part_size_bytes: int = int(os.getenv(S3_TRANSFER_PART_SIZE_BYTES_KEY, S3_TRANSFER_PART_SIZE_BYTES))
+    max_concurrency: int = int(os.getenv(S3_TRANSFER_MAX_CONCURRENCY_KEY, S3_TRANSFER_MAX_CONCURRENCY))
+    multipart_threshold_bytes: int = int(os.getenv(S3_TRANSFER_MULTIPART_THRESHOLD_BYTES_KEY,
+                                                   S3_TRANSFER_MULTIPART_THRESHOLD_BYTES))
+
+
+@dataclass
+class S3MetadataCacheConfig:
+    ttl_seconds: float = float(os.getenv(S3_METADATA_CACHE_TTL_SECONDS_KEY, S3_METADATA_CACHE_TTL_SECONDS))
+    max_entries: int = S3_METADATA_CACHE_MAX_ENTRIES
+
+
+@dataclass
+class StorageConfig:
+    backend: str = os.getenv(STORAGE_BACKEND_KEY, STORAGE_BACKEND)
+    local_root_dir: str = os.getenv(STORAGE_LOCAL_ROOT_DIR_KEY, STORAGE_LOCAL_ROOT_DIR)
+    s3_endpoint_url: str = os.getenv(S3_ENDPOINT_URL_KEY, S3_ENDPOINT_URL)
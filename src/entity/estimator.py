@@ -1,11 +1,20 @@
 import sys
+from typing import TYPE_CHECKING
 
 import pandas as pd
 from pandas import DataFrame
-from sklearn.pipeline import Pipeline
 
+from src.constants import SKLEARN_INFERENCE_BACKEND, COMPILED_INFERENCE_BACKEND, EARLY_EXIT_INFERENCE_BACKEND
+from src.entity.forest_engine import CompiledForest
+from src.entity.fused_preprocessor import FusedPreprocessor
 from src.exception import MyException
 from src.logger import logging
+from src.utils.metrics import prediction_batch_rows, prediction_stage_seconds
+from src.utils.tracing import tracer
+
+if TYPE_CHECKING:
+    # Only needed for annotations, sklearn is imported by unpickling a fitted model when it is needed at all
+    from sklearn.pipeline import Pipeline
 
 class TargetValueMapping:
     def __init__(self):
@@ -18,13 +27,78 @@ class TargetValueMapping:
         return dict(zip(mapping_response.values(),mapping_response.keys()))
 
 class MyModel:
-    def __init__(self, preprocessing_object: Pipeline, trained_model_object: object):
+    def __init__(self, preprocessing_object: "Pipeline", trained_model_object: object,
+                 inference_backend: str = SKLEARN_INFERENCE_BACKEND):
         """
         :param preprocessing_object: Input Object of preprocesser
         :param trained_model_object: Input Object of trained model 
+        :param inference_backend: "sklearn" to score with the trained model object itself,
+                                  "compiled" to score with its array-compiled CompiledForest,
+                                  "compiled_early_exit" to let the CompiledForest stop voting once the label is decided,
+                                  for batches of at least CompiledForest.early_exit_min_rows rows
         """
         self.preprocessing_object = preprocessing_object
         self.trained_model_object = trained_model_object
+        self.inference_backend = inference_backend
+        self.compiled_model_object = None
+        self.fused_preprocessing_object = None
+
+    def fuse_preprocessing(self) -> None:
+        """
+        Folds the fitted preprocessing object into a FusedPreprocessor used by predict from now on.
+        Preprocessing that cannot be fused keeps going through the sklearn transform.
+        """
+        try:
+            if isinstance(self.preprocessing_object, FusedPreprocessor):
+                self.fused_preprocessing_object = self.preprocessing_object
+            else:
+                self.fused_preprocessing_object = FusedPreprocessor.from_pipeline(self.preprocessing_object)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def get_preprocessing_object(self) -> object:
+        """
+        Returns the fused preprocessing when available, the sklearn preprocessing object otherwise.
+        """
+        fused_preprocessing_object = getattr(self, "fused_preprocessing_object", None)
+        if fused_preprocessing_object is not None:
+            return fused_preprocessing_object
+        return self.preprocessing_object
+
+    def set_inference_backend(self, inference_backend: str) -> None:
+        """
+        Selects the backend used by predict, compiling the forest right away when needed.
+        Models that cannot be compiled keep using sklearn.
+        """
+        try:
+            if inference_backend not in (SKLEARN_INFERENCE_BACKEND, COMPILED_INFERENCE_BACKEND,
+                                         EARLY_EXIT_INFERENCE_BACKEND):
+                raise ValueError(f"Unknown inference backend: {inference_backend}")
+            if inference_backend != SKLEARN_INFERENCE_BACKEND and getattr(self, "compiled_model_object", None) is None:
+                if isinstance(self.trained_model_object, CompiledForest):
+                    self.compiled_model_object = self.trained_model_object
+                elif not hasattr(self.trained_model_object, "estimators_"):
+                    logging.info(f"{self} cannot be compiled, keeping the sklearn backend")
+                    inference_backend = SKLEARN_INFERENCE_BACKEND
+                else:
+                    self.compiled_model_object = CompiledForest.from_sklearn(self.trained_model_object)
+            self.inference_backend = inference_backend
+            logging.info(f"Inference backend set to {inference_backend}")
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def get_inference_model(self) -> object:
+        """
+        Returns the object scoring the transformed features for the selected backend.
+        Models pickled before backends existed have no backend attributes and use sklearn.
+        """
+        inference_backend = getattr(self, "inference_backend", SKLEARN_INFERENCE_BACKEND)
+        if inference_backend != SKLEARN_INFERENCE_BACKEND:
+            if getattr(self, "compiled_model_object", None) is None:
+                self.set_inference_backend(inference_backend)
+            if self.compiled_model_object is not None:
+                return self.compiled_model_object
+        return self.trained_model_object
 
     def predict(self, dataframe: pd.DataFrame) -> DataFrame:
         """
@@ -34,12 +108,22 @@ class MyModel:
         try:
             logging.info("Starting prediction process.")
 
+            prediction_batch_rows.observe(len(dataframe))
+
             # Step 1: Apply scaling transformations using the pre-trained preprocessing object
-            transformed_feature = self.preprocessing_object.transform(dataframe)
+            with prediction_stage_seconds.time("transform"), tracer.span("model.transform", rows=len(dataframe)):
+                transformed_feature = self.get_preprocessing_object().transform(dataframe)
 
             # Step 2: Perform prediction using the trained model
             logging.info("Using the trained model to get predictions")
-            predictions = self.trained_model_object.predict(transformed_feature)
+            with prediction_stage_seconds.time("predict"), tracer.span("model.predict", rows=len(dataframe)) as span:
+                inference_model = self.get_inference_model()
+                span.set("model", type(inference_model).__name__)
+                if getattr(self, "inference_backend", None) == EARLY_EXIT_INFERENCE_BACKEND and \
+                        isinstance(inference_model, CompiledForest):
+                    predictions = inference_model.predict_early_exit(transformed_feature)
+                else:
+                    predictions = inference_model.predict(transformed_feature)
 
             return predictions
 
@@ -48,6 +132,30 @@ class MyModel:
             raise MyException(e, sys) from e
 
 
+    def predict_proba(self, dataframe: pd.DataFrame):
+        """
+        Function accepts the same inputs as predict and returns the class probabilities,
+        one column per class in the order of the trained model's classes_.
+        """
+        try:
+            logging.info("Starting probability prediction process.")
+            prediction_batch_rows.observe(len(dataframe))
+
+            with prediction_stage_seconds.time("transform"), tracer.span("model.transform", rows=len(dataframe)):
+                transformed_feature = self.get_preprocessing_object().transform(dataframe)
+            with prediction_stage_seconds.time("predict_proba"), tracer.span("model.predict_proba", rows=len(dataframe)):
+                return self.get_inference_model().predict_proba(transformed_feature)
+
+        except Exception as e:
+            logging.error("Error occurred in predict_proba method", exc_info=True)
+            raise MyException(e, sys) from e
+
+    def get_classes(self):
+        """
+        Returns the class labels of the trained model, the column order of predict_proba.
+        """
+        return self.get_inference_model().classes_
+
     def __repr__(self):
         return f"{type(self.trained_model_object).__name__}()"
 
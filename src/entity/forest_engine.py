@@ -0,0 +1,237 @@
+import sys
+from typing import Tuple
+
+import numpy as np
+
+from src.exception import MyException
+from src.logger import logging
+from src.utils.metrics import forest_rows_scored_total, forest_trees_evaluated_total
+
+
+class CompiledForest:
+    """
+    Array-compiled form of a fitted sklearn RandomForestClassifier.
+
+    All trees' nodes are flattened into contiguous arrays (feature, threshold, left, right, leaf value)
+    and the whole ensemble is evaluated with a vectorized level-by-level traversal: every (row, tree) pair
+    moves one level down per step. Leaves point to themselves so finished pairs simply stay in place.
+    Probabilities are accumulated tree after tree exactly like sklearn does, so predictions are identical.
+    """
+
+    # Rows evaluated at once, bounds the (rows x trees) working arrays
+    chunk_size: int = 4096
+    # Trees evaluated between two decision checks of the early-exit vote
+    early_exit_block_size: int = 16
+    # Below this many rows the vote is fully evaluated. Every check costs one level-by-level traversal of
+    # its block (about 0.1 ms on a 200 tree, depth 10 forest whatever the row count), measured to outweigh
+    # the trees saved below 24 to 32 rows, so single records and small batcher batches score like "compiled"
+    early_exit_min_rows: int = 32
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 value: np.ndarray, roots: np.ndarray, max_depth: int, classes: np.ndarray, n_features: int,
+                 tree_order: np.ndarray = None):
+        """
+        :param feature: Split feature per node, 0 for leaves
+        :param threshold: Split threshold per node, +inf for leaves
+        :param left: Absolute index of the left child per node, the node itself for leaves
+        :param right: Absolute index of the right child per node, the node itself for leaves
+        :param value: Normalized class probabilities per node
+        :param roots: Absolute index of every tree's root node
+        :param max_depth: Depth of the deepest tree
+        :param classes: Class labels of the forest
+        :param n_features: Number of input features
+        :param tree_order: Order the early-exit vote evaluates the trees in, most decisive first
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.n_features_in_ = n_features
+        self.tree_order = tree_order if tree_order is not None else np.arange(roots.shape[0], dtype=np.int64)
+
+    @classmethod
+    def from_sklearn(cls, forest) -> "CompiledForest":
+        """
+        Flattens the tree_ structures of a fitted RandomForestClassifier.
+        """
+        try:
+            logging.info(f"Compiling {len(forest.estimators_)} trees into contiguous arrays")
+            features, thresholds, lefts, rights, values, roots, decisiveness = [], [], [], [], [], [], []
+            offset = 0
+            max_depth = 0
+            for estimator in forest.estimators_:
+                tree = estimator.tree_
+                node_ids = np.arange(tree.node_count, dtype=np.int64)
+                is_leaf = tree.children_left == -1
+
+                features.append(np.where(is_leaf, 0, tree.feature).astype(np.int64))
+                thresholds.append(np.where(is_leaf, np.inf, tree.threshold).astype(np.float64))
+                lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+                rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+
+                # Same normalization as DecisionTreeClassifier.predict_proba
+                value = tree.value[:, 0, :forest.n_classes_].astype(np.float64)
+                normalizer = value.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                values.append(value / normalizer)
+
+                # How far the tree's vote usually is from a tie, leaves weighted by their training samples
+                if forest.n_classes_ == 2:
+                    leaf_weight = np.where(is_leaf, tree.weighted_n_node_samples, 0.0)
+                    margin = np.abs(values[-1][:, 1] - values[-1][:, 0])
+                    decisiveness.append(float((leaf_weight * margin).sum() / max(leaf_weight.sum(), 1e-12)))
+
+                roots.append(offset)
+                offset += tree.node_count
+                max_depth = max(max_depth, tree.max_depth)
+
+            return cls(feature=np.concatenate(features),
+                       threshold=np.concatenate(thresholds),
+                       left=np.concatenate(lefts),
+                       right=np.concatenate(rights),
+                       value=np.concatenate(values),
+                       roots=np.asarray(roots, dtype=np.int64),
+                       max_depth=int(max_depth),
+                       classes=np.asarray(forest.classes_),
+                       n_features=int(forest.n_features_in_),
+                       # Stable sort keeps the fitted order among equally decisive trees
+                       tree_order=np.argsort(-np.asarray(decisiveness), kind="stable").astype(np.int64)
+                       if decisiveness else None)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def _leaves(self, X: np.ndarray, roots: np.ndarray = None) -> np.ndarray:
+        """
+        Returns the absolute leaf index reached by every row in every tree (or in the trees of the given roots),
+        shape (rows, trees).
+        """
+        roots = self.roots if roots is None else roots
+        nodes = np.broadcast_to(roots, (X.shape[0], roots.shape[0])).copy()
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def _validate(self, X) -> np.ndarray:
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected input with {self.n_features_in_} features, got shape {X.shape}")
+        return X
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Returns the class probabilities averaged over all trees, shape (rows, classes).
+        """
+        X = self._validate(X)
+        proba = np.empty((X.shape[0], self.classes_.shape[0]), dtype=np.float64)
+        for start in range(0, X.shape[0], self.chunk_size):
+            chunk = X[start:start + self.chunk_size]
+            leaf_values = self.value[self._leaves(chunk)]
+            # Sequential accumulation over trees keeps the sums bit-identical to sklearn
+            proba[start:start + chunk.shape[0]] = np.cumsum(leaf_values, axis=1)[:, -1]
+        proba /= self.roots.shape[0]
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        """
+        Returns the predicted class label per row.
+        """
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    def _margin_bounds(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the class 1 minus class 0 probability of every node, and the lowest and highest
+        such margin any leaf of each tree can vote, computed once and kept.
+        """
+        bounds = getattr(self, "_margin_bounds_cache", None)
+        if bounds is None:
+            node_margin = self.value[:, 1] - self.value[:, 0]
+            is_leaf = self.left == np.arange(self.left.shape[0])
+            lowest = np.minimum.reduceat(np.where(is_leaf, node_margin, np.inf), self.roots)
+            highest = np.maximum.reduceat(np.where(is_leaf, node_margin, -np.inf), self.roots)
+            bounds = self._margin_bounds_cache = (node_margin, lowest, highest)
+        return bounds
+
+    def predict_early_exit(self, X) -> np.ndarray:
+        """
+        Returns the same labels as predict while evaluating fewer trees.
+
+        Trees are evaluated in tree_order, a block at a time, on the rows still undecided. A row is decided
+        once the margin summed so far stays on the same side of the tie whatever the remaining trees vote,
+        bounded by their lowest and highest leaf margins. Rows left undecided after the last tree, i.e.
+        votes too close to call with the bounds, are scored exactly like predict. Only binary forests exit
+        early, others are fully evaluated.
+        """
+        X = self._validate(X)
+        n_rows, n_trees = X.shape[0], self.roots.shape[0]
+        if self.classes_.shape[0] != 2 or n_rows < self.early_exit_min_rows:
+            forest_rows_scored_total.inc(amount=n_rows)
+            forest_trees_evaluated_total.inc(amount=n_rows * n_trees)
+            return self.predict(X)
+
+        node_margin, lowest, highest = self._margin_bounds()
+        order = getattr(self, "tree_order", None)
+        if order is None:
+            order = np.arange(n_trees)
+        # Margin the trees after the first k can still add at least / at most, for every k
+        lowest_remaining = np.append(np.cumsum(lowest[order][::-1])[::-1], 0.0)
+        highest_remaining = np.append(np.cumsum(highest[order][::-1])[::-1], 0.0)
+        ordered_roots = self.roots[order]
+        # No row can be decided before the strongest possible votes so far outweigh the remaining trees,
+        # the first check happens there
+        decidable = (np.cumsum(highest[order]) > -lowest_remaining[1:]) | \
+                    (-np.cumsum(lowest[order]) > highest_remaining[1:])
+        first_check = int(np.argmax(np.append(decidable, True))) + 1
+        # Rounding slack of the summation order, rows this close to a tie get the exact path
+        tolerance = 1e-9 * n_trees
+
+        class_index = np.empty(n_rows, dtype=np.intp)
+        trees_evaluated = 0
+        checks = list(range(min(first_check, n_trees), n_trees, self.early_exit_block_size)) + [n_trees]
+        # Rows are voted a chunk at a time, like predict_proba, to bound the (rows x trees) working arrays
+        for chunk_start in range(0, n_rows, self.chunk_size):
+            chunk = X[chunk_start:chunk_start + self.chunk_size]
+            class_index[chunk_start:chunk_start + chunk.shape[0]], chunk_trees = self._vote_early_exit(
+                chunk, ordered_roots, checks, node_margin, lowest_remaining, highest_remaining, tolerance)
+            trees_evaluated += chunk_trees
+        forest_rows_scored_total.inc(amount=n_rows)
+        forest_trees_evaluated_total.inc(amount=trees_evaluated)
+        return self.classes_.take(class_index, axis=0)
+
+    def _vote_early_exit(self, X: np.ndarray, ordered_roots: np.ndarray, checks: list, node_margin: np.ndarray,
+                         lowest_remaining: np.ndarray, highest_remaining: np.ndarray,
+                         tolerance: float) -> Tuple[np.ndarray, int]:
+        """
+        Runs the early-exit vote of predict_early_exit on one chunk of rows.
+        Returns the class index of every row and the number of (row, tree) pairs evaluated.
+        """
+        n_rows, n_trees = X.shape[0], ordered_roots.shape[0]
+        class_index = np.zeros(n_rows, dtype=np.intp)
+        margin = np.zeros(n_rows, dtype=np.float64)
+        active = np.arange(n_rows)
+        trees_evaluated = 0
+        start = 0
+        for stop in checks:
+            if not active.size or stop <= start:
+                break
+            leaves = self._leaves(X[active], ordered_roots[start:stop])
+            margin[active] += node_margin[leaves].sum(axis=1)
+            trees_evaluated += active.size * (stop - start)
+
+            active_margin = margin[active]
+            decided_positive = active_margin + lowest_remaining[stop] > tolerance
+            decided_negative = active_margin + highest_remaining[stop] < -tolerance
+            class_index[active[decided_positive]] = 1
+            active = active[~(decided_positive | decided_negative)]
+            start = stop
+
+        if active.size:
+            class_index[active] = np.argmax(self.predict_proba(X[active]), axis=1)
+            trees_evaluated += active.size * n_trees
+        return class_index, trees_evaluated
@@ -0,0 +1,112 @@
+import sys
+from typing import List, Optional
+
+import numpy as np
+from pandas import DataFrame
+
+from src.exception import MyException
+from src.logger import logging
+
+
+class FusedPreprocessor:
+    """
+    Fitted preprocessing folded into per-column vectors applied to one contiguous float array.
+
+    The ColumnTransformer built by DataTransformation only standard-scales, min-max scales or passes columns
+    through, so its output column j is input column column_order[j] put through
+    (x - center) / scale * multiplier + offset. Keeping sklearn's own order of operations
+    (subtract then divide for StandardScaler, multiply then add for MinMaxScaler) keeps the result
+    bit-identical to ColumnTransformer.transform.
+    """
+
+    def __init__(self, feature_columns: List[str], column_order: np.ndarray, center: np.ndarray,
+                 scale: np.ndarray, multiplier: np.ndarray, offset: np.ndarray):
+        """
+        :param feature_columns: Input columns in the order the transformer was fitted on
+        :param column_order: Input column index of every output column
+        :param center: Value subtracted per output column
+        :param scale: Divisor per output column
+        :param multiplier: Factor per output column
+        :param offset: Value added per output column
+        """
+        self.feature_columns = list(feature_columns)
+        self.column_order = column_order
+        self.center = center
+        self.scale = scale
+        self.multiplier = multiplier
+        self.offset = offset
+
+    @classmethod
+    def from_pipeline(cls, preprocessing_object) -> Optional["FusedPreprocessor"]:
+        """
+        Folds a fitted preprocessing Pipeline/ColumnTransformer.
+        Returns None when it holds steps that are not plain scalers or passthrough columns.
+        """
+        # Imported here so scoring with an already fused model does not load sklearn
+        from sklearn.compose import ColumnTransformer
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import FunctionTransformer, MinMaxScaler, StandardScaler
+
+        try:
+            column_transformer = preprocessing_object
+            if isinstance(column_transformer, Pipeline):
+                if len(column_transformer.steps) != 1:
+                    return None
+                column_transformer = column_transformer.steps[0][1]
+            if not isinstance(column_transformer, ColumnTransformer) or \
+                    not hasattr(column_transformer, "feature_names_in_"):
+                return None
+
+            feature_columns = list(column_transformer.feature_names_in_)
+            column_order, center, scale, multiplier, offset = [], [], [], [], []
+            for _, transformer, columns in column_transformer.transformers_:
+                if isinstance(transformer, str) and transformer == "drop" or len(columns) == 0:
+                    continue
+                indices = [feature_columns.index(column) if isinstance(column, str) else int(column)
+                           for column in columns]
+                n_columns = len(indices)
+                if isinstance(transformer, StandardScaler):
+                    center.append(transformer.mean_ if transformer.mean_ is not None else np.zeros(n_columns))
+                    scale.append(transformer.scale_ if transformer.scale_ is not None else np.ones(n_columns))
+                    multiplier.append(np.ones(n_columns))
+                    offset.append(np.zeros(n_columns))
+                elif isinstance(transformer, MinMaxScaler) and not transformer.clip:
+                    center.append(np.zeros(n_columns))
+                    scale.append(np.ones(n_columns))
+                    multiplier.append(transformer.scale_)
+                    offset.append(transformer.min_)
+                elif isinstance(transformer, str) and transformer == "passthrough" or \
+                        (isinstance(transformer, FunctionTransformer) and transformer.func is None):
+                    center.append(np.zeros(n_columns))
+                    scale.append(np.ones(n_columns))
+                    multiplier.append(np.ones(n_columns))
+                    offset.append(np.zeros(n_columns))
+                else:
+                    logging.info(f"Cannot fuse preprocessing step {transformer}, keeping the sklearn transform")
+                    return None
+                column_order.extend(indices)
+
+            logging.info(f"Fused preprocessing of {len(column_order)} columns into scale and offset vectors")
+            return cls(feature_columns=feature_columns,
+                       column_order=np.asarray(column_order, dtype=np.intp),
+                       center=np.concatenate(center).astype(np.float64),
+                       scale=np.concatenate(scale).astype(np.float64),
+                       multiplier=np.concatenate(multiplier).astype(np.float64),
+                       offset=np.concatenate(offset).astype(np.float64))
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def transform(self, X) -> np.ndarray:
+        """
+        Transforms a DataFrame, or an array whose columns are already in feature_columns order.
+        """
+        if isinstance(X, DataFrame):
+            X = X[self.feature_columns].to_numpy(dtype=np.float64)
+        else:
+            X = np.asarray(X, dtype=np.float64)
+        X = X[:, self.column_order]
+        X -= self.center
+        X /= self.scale
+        X *= self.multiplier
+        X += self.offset
+        return X
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from typing import List
+
+import numpy as np
+
+from src.constants import ARRAY_MODEL_FILE_EXTENSION, COMPILED_INFERENCE_BACKEND, MODEL_FEATURE_COLUMNS
+from src.entity.estimator import MyModel
+from src.entity.forest_engine import CompiledForest
+from src.entity.fused_preprocessor import FusedPreprocessor
+from src.exception import MyException
+from src.logger import logging
+
+ARRAY_MODEL_MAGIC = b"VIMODEL1"
+# Version 2 adds the schema hash of the feature columns, version 1 files are still read
+ARRAY_MODEL_FORMAT_VERSION = 2
+ARRAY_ALIGNMENT = 64
+
+FOREST_ARRAYS = ["feature", "threshold", "left", "right", "value", "roots", "classes_", "tree_order"]
+PREPROCESSOR_ARRAYS = ["column_order", "center", "scale", "multiplier", "offset"]
+
+
+def array_model_path(model_path: str) -> str:
+    """
+    Returns where the array model of a pickled model lives, locally or in s3: model.pkl -> model.vimodel
+    """
+    return os.path.splitext(model_path)[0] + ARRAY_MODEL_FILE_EXTENSION
+
+
+def feature_schema_hash(feature_columns: List[str], n_features: int) -> str:
+    """
+    Hashes the input schema of a model: its feature columns, in order, and the width of its forest input.
+    """
+    schema = json.dumps({"feature_columns": list(feature_columns), "n_features": int(n_features)})
+    return hashlib.sha256(schema.encode()).hexdigest()
+
+
+def can_write_array_model(model: MyModel) -> bool:
+    """
+    Tells whether the model scores through a CompiledForest and a FusedPreprocessor,
+    the only parts an array model is made of.
+    """
+    if getattr(model, "fused_preprocessing_object", None) is None:
+        model.fuse_preprocessing()
+    if getattr(model, "compiled_model_object", None) is None:
+        model.set_inference_backend(COMPILED_INFERENCE_BACKEND)
+    return model.fused_preprocessing_object is not None and model.compiled_model_object is not None
+
+
+def write_array_model(model: MyModel, file_path: str, metadata: dict = None) -> None:
+    """
+    Writes the numeric arrays of a model into a single file:
+    magic, header length, JSON header (format version, feature columns and their schema hash, array dtypes,
+    shapes and offsets plus metadata), then every array as a raw buffer aligned to 64 bytes. The file is written next to its destination and renamed into place,
+    readers never see a partial file.
+    """
+    try:
+        if not can_write_array_model(model):
+            raise ValueError(f"{model} cannot be written as an array model")
+        forest = model.compiled_model_object
+        preprocessor = model.fused_preprocessing_object
+        arrays = {f"forest.{name}": np.ascontiguousarray(getattr(forest, name)) for name in FOREST_ARRAYS}
+        arrays.update({f"preprocessor.{name}": np.ascontiguousarray(getattr(preprocessor, name))
+                       for name in PREPROCESSOR_ARRAYS})
+
+        layout, offset = {}, 0
+        for name, array in arrays.items():
+            layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            offset += -(-array.nbytes // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+        header = {
+            "format_version": ARRAY_MODEL_FORMAT_VERSION,
+            "schema_hash": feature_schema_hash(preprocessor.feature_columns, forest.n_features_in_),
+            "arrays": layout,
+            "forest": {"max_depth": forest.max_depth, "n_features": forest.n_features_in_},
+            "preprocessor": {"feature_columns": preprocessor.feature_columns},
+            "metadata": metadata or {},
+        }
+        header_bytes = json.dumps(header).encode()
+        data_start = -(-(len(ARRAY_MODEL_MAGIC) + 8 + len(header_bytes)) // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+
+        dir_path = os.path.dirname(file_path) or "."
+        os.makedirs(dir_path, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=dir_path, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as file_obj:
+                file_obj.write(ARRAY_MODEL_MAGIC)
+                file_obj.write(len(header_bytes).to_bytes(8, "little"))
+                file_obj.write(header_bytes)
+                for name, array in arrays.items():
+                    file_obj.seek(data_start + layout[name]["offset"])
+                    file_obj.write(array.tobytes())
+                file_obj.truncate(data_start + offset)
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        logging.info(f"Array model written to {file_path} ({data_start + offset} bytes)")
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def read_array_header(file_path: str) -> dict:
+    """
+    Returns the JSON header of an array model file along with the offset its buffers start at.
+    """
+    with open(file_path, "rb") as file_obj:
+        if file_obj.read(len(ARRAY_MODEL_MAGIC)) != ARRAY_MODEL_MAGIC:
+            raise ValueError(f"{file_path} is not an array model file")
+        header_length = int.from_bytes(file_obj.read(8), "little")
+        header = json.loads(file_obj.read(header_length))
+    header["data_start"] = -(-(len(ARRAY_MODEL_MAGIC) + 8 + header_length) // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+    return header
+
+
+def read_array_model(file_path: str, feature_columns: List[str] = MODEL_FEATURE_COLUMNS) -> MyModel:
+    """
+    Memory-maps an array model file read-only and returns a MyModel scoring straight from the mapped pages.
+    Processes mapping the same file share one copy of the arrays in the page cache.
+    Nothing is unpickled, only the JSON header is parsed, so loading takes milliseconds whatever the forest size.
+
+    The model is refused unless it was trained on the feature columns the caller scores, in the same order:
+    both the schema hash stored in the file and the one of its header's columns must match theirs.
+
+    :param file_path: Path of the array model file
+    :param feature_columns: Feature columns of the rows the model will score, MODEL_FEATURE_COLUMNS by default
+    """
+    try:
+        header = read_array_header(file_path)
+        if header["format_version"] > ARRAY_MODEL_FORMAT_VERSION:
+            raise ValueError(f"Unsupported array model format version {header['format_version']}")
+        schema_hash = feature_schema_hash(feature_columns, len(feature_columns))
+        header_schema_hash = feature_schema_hash(header["preprocessor"]["feature_columns"],
+                                                 header["forest"]["n_features"])
+        # Version 1 files carry no schema hash, their header columns are checked alone
+        if header_schema_hash != schema_hash or header.get("schema_hash", schema_hash) != schema_hash:
+            raise ValueError(f"{file_path} was written for feature columns {header['preprocessor']['feature_columns']} "
+                             f"(schema hash {header.get('schema_hash', header_schema_hash)}), not the expected "
+                             f"{list(feature_columns)} (schema hash {schema_hash})")
+        buffer = np.memmap(file_path, dtype=np.uint8, mode="r")
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"], dtype=np.int64))
+            arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count,
+                                         offset=header["data_start"] + spec["offset"]).reshape(spec["shape"])
+
+        forest = CompiledForest(feature=arrays["forest.feature"], threshold=arrays["forest.threshold"],
+                                left=arrays["forest.left"], right=arrays["forest.right"],
+                                value=arrays["forest.value"], roots=arrays["forest.roots"],
+                                max_depth=header["forest"]["max_depth"], classes=arrays["forest.classes_"],
+                                n_features=header["forest"]["n_features"],
+                                # Files written before early-exit voting keep the fitted tree order
+                                tree_order=arrays.get("forest.tree_order"))
+        preprocessor = FusedPreprocessor(feature_columns=header["preprocessor"]["feature_columns"],
+                                         column_order=arrays["preprocessor.column_order"],
+                                         center=arrays["preprocessor.center"],
+                                         scale=arrays["preprocessor.scale"],
+                                         multiplier=arrays["preprocessor.multiplier"],
+                                         offset=arrays["preprocessor.offset"])
+        model = MyModel(preprocessing_object=preprocessor, trained_model_object=forest,
+                        inference_backend=COMPILED_INFERENCE_BACKEND)
+        model.fused_preprocessing_object = preprocessor
+        model.compiled_model_object = forest
+        model.metadata = dict(header["metadata"], format_version=header["format_version"], schema_hash=schema_hash)
+        return model
+    except Exception as e:
+        raise MyException(e, sys) from e
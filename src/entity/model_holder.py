@@ -0,0 +1,341 @@
+import glob
+import os
+import re
+import sys
+import threading
+from typing import NamedTuple, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows, shared model segments are disabled there
+    fcntl = None
+
+from src.entity.config_entity import VehiclePredictorConfig
+from src.entity.estimator import MyModel
+from src.entity.model_artifact import can_write_array_model, read_array_model, write_array_model
+from src.exception import MyException
+from src.logger import logging
+from src.utils.metrics import model_loads_total, prediction_stage_seconds
+from src.utils.tracing import tracer
+
+
+class ModelNotReadyError(Exception):
+    """
+    Raised when a prediction is requested before the production model is resident in memory.
+    """
+
+
+class ModelSnapshot(NamedTuple):
+    """
+    Resident model together with its identity, read as a whole so a request labels its predictions
+    with the model that actually made them even when a new champion is swapped in meanwhile.
+    """
+
+    model: MyModel
+    # Counter bumped every time this process makes a model resident, scopes the prediction cache
+    version: int
+    # Stable identity of the model across processes and restarts: its registry version,
+    # or the key and ETag of the model file for a model pushed before the registry existed
+    model_id: Optional[str]
+    # Model registry version, None for a model pushed before the registry existed
+    registry_version: Optional[str] = None
+
+
+class ModelHolder:
+    """
+    Process wide holder of the production model.
+    The model is downloaded from s3 once and the same MyModel instance is shared by every request.
+
+    The model served is the champion of the model registry, or the single model pushed before the registry
+    existed. refresh swaps in a newly promoted champion once it is fully loaded, requests keep being served
+    by the previous model meanwhile.
+
+    When a shared model directory is configured, the first worker of a server downloads the model and
+    writes its arrays into a memory-mapped segment there, and every other worker maps that segment read-only
+    instead of holding its own unpickled forest. Segments are named after the model key and the ETag of its
+    file, so a worker only ever maps the exact model it was asked for, whatever process started it.
+    """
+
+    _instances: dict = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, prediction_pipeline_config: VehiclePredictorConfig = VehiclePredictorConfig()):
+        """
+        :param prediction_pipeline_config: Configuration of the model location, backend and sharing
+        """
+        self.prediction_pipeline_config = prediction_pipeline_config
+        self.bucket_name = prediction_pipeline_config.model_bucket_name
+        self.model_path = prediction_pipeline_config.model_file_path
+        self.inference_backend = prediction_pipeline_config.inference_backend
+        # Replaced as a whole so readers always see a model with its own version and identity
+        self._resident: Optional[ModelSnapshot] = None
+        # Key of the resident model, None before the first load
+        self._resident_model_path: Optional[str] = None
+        self._generation = 0
+        self._load_lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, prediction_pipeline_config: VehiclePredictorConfig = VehiclePredictorConfig()) -> "ModelHolder":
+        """
+        Returns the holder shared by the whole process for the configured bucket and model path.
+        """
+        key = (prediction_pipeline_config.model_bucket_name, prediction_pipeline_config.model_file_path)
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(prediction_pipeline_config=prediction_pipeline_config)
+            return cls._instances[key]
+
+    @property
+    def is_ready(self) -> bool:
+        return self._resident is not None
+
+    @property
+    def version(self) -> Optional[int]:
+        """
+        Version of the resident model, bumped every time a model is made resident.
+        """
+        resident = self._resident
+        return resident.version if resident is not None else None
+
+    @property
+    def model_id(self) -> Optional[str]:
+        """
+        Stable identity of the resident model, the same in every worker serving it.
+        """
+        resident = self._resident
+        return resident.model_id if resident is not None else None
+
+    @property
+    def registry_version(self) -> Optional[str]:
+        """
+        Model registry version of the resident model, None for a model pushed before the registry existed.
+        """
+        resident = self._resident
+        return resident.registry_version if resident is not None else None
+
+    def set_model(self, model: MyModel, model_path: str = None, registry_version: str = None,
+                  model_id: str = None) -> int:
+        """
+        Prepares a loaded model for serving and makes it the resident one.
+        Returns the version assigned to it.
+
+        :param model: Loaded model
+        :param model_path: Key the model was loaded from
+        :param registry_version: Model registry version of the model
+        :param model_id: Stable identity of the model recorded with its predictions
+        """
+        try:
+            if getattr(model, "fused_preprocessing_object", None) is None:
+                model.fuse_preprocessing()
+            model.set_inference_backend(self.inference_backend)
+            with self._swap_lock:
+                self._generation += 1
+                version = self._generation
+                self._resident = ModelSnapshot(model, version, model_id or registry_version, registry_version)
+                self._resident_model_path = model_path
+            model_loads_total.inc()
+            logging.info(f"Model version {version} ({self._resident.model_id}) is resident in memory")
+            return version
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def load_versioned(self) -> Tuple[MyModel, int]:
+        """
+        Loads the model from s3 if it is not resident yet and returns it with its version.
+        """
+        snapshot = self.load_snapshot()
+        return snapshot.model, snapshot.version
+
+    def load_snapshot(self) -> ModelSnapshot:
+        """
+        Loads the model from s3 if it is not resident yet and returns it with its version and identity.
+        Concurrent callers wait for the single download in progress instead of starting their own.
+        """
+        resident = self._resident
+        if resident is not None:
+            return resident
+        try:
+            with self._load_lock:
+                if self._resident is None:
+                    model_path, registry_version = self.resolve_model_path()
+                    with tracer.trace("model_load", always_keep=True, model_path=model_path):
+                        self.load_model_version(model_path, registry_version)
+                return self._resident
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def load_model_version(self, model_path: str, registry_version: Optional[str]) -> None:
+        """
+        Loads the model stored under model_path and makes it resident, the caller holds the load lock.
+        """
+        etag = self.get_model_etag(model_path)
+        with tracer.span("fetch_model") as span:
+            with prediction_stage_seconds.time("model_load"):
+                if self.shared_segment_path(model_path, etag) is not None:
+                    span.set("source", "shared_segment")
+                    model = self.attach_shared_model(model_path, etag)
+                else:
+                    span.set("source", "s3")
+                    model = self.download_model(model_path)
+        with tracer.span("set_model"):
+            # Registry versions are immutable, their id is enough to tell which model served a row
+            model_id = registry_version or (f"{model_path}@{etag}" if etag else model_path)
+            self.set_model(model, model_path=model_path, registry_version=registry_version, model_id=model_id)
+
+    def get_model_etag(self, model_path: str) -> Optional[str]:
+        """
+        Returns the ETag of the model file stored under model_path, which changes whenever a new model
+        is pushed to the same key. None when there is no such file.
+        """
+        from src.cloud_storage.aws_storage import SimpleStorageService
+
+        metadata = SimpleStorageService().get_object_metadata(self.bucket_name, model_path)
+        return metadata["etag"] if metadata else None
+
+    def get_registry(self):
+        """
+        Returns the model registry of the model bucket, boto3 is only imported when it is first needed.
+        """
+        from src.entity.model_registry import ModelRegistry
+
+        return ModelRegistry(bucket_name=self.bucket_name,
+                             registry_prefix=self.prediction_pipeline_config.registry_prefix)
+
+    def resolve_model_path(self) -> Tuple[str, Optional[str]]:
+        """
+        Returns the key and registry version of the model to serve: the registry champion,
+        or the configured model path (without version) while nothing was promoted yet.
+        """
+        champion = self.get_registry().get_champion()
+        if champion is None:
+            return self.model_path, None
+        return champion["model_path"], champion["version"]
+
+    def refresh(self) -> bool:
+        """
+        Makes a newly promoted registry champion resident, returns whether the model was swapped.
+        The new model is downloaded and prepared while the previous one keeps serving, then swapped in
+        as a whole: no request waits for the download. Does nothing before the first load.
+        """
+        if not self.is_ready:
+            return False
+        try:
+            model_path, registry_version = self.resolve_model_path()
+            if registry_version is None or registry_version == self.registry_version:
+                return False
+            with self._load_lock:
+                if registry_version == self.registry_version:
+                    return False
+                previous_model_path = self._resident_model_path
+                logging.info(f"Model registry champion changed from {self.registry_version} to {registry_version}")
+                with tracer.trace("model_refresh", always_keep=True, model_path=model_path,
+                                  registry_version=registry_version):
+                    self.load_model_version(model_path, registry_version)
+                if previous_model_path is not None and previous_model_path != model_path:
+                    self.release_shared_segment(previous_model_path)
+            return True
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def download_model(self, model_path: str = None) -> MyModel:
+        """
+        Downloads the model from s3, mapping its array model when one was pushed, unpickling it otherwise.
+        boto3 is only imported here, on the first download, not when the server starts.
+        """
+        from src.entity.s3_estimator import Proj1Estimator
+
+        model_path = model_path or self.model_path
+        logging.info(f"Loading model [{model_path}] from bucket [{self.bucket_name}] into memory")
+        estimator = Proj1Estimator(bucket_name=self.bucket_name, model_path=model_path)
+        return estimator.load_model()
+
+    def _segment_name(self, model_path: str) -> str:
+        return re.sub(r"[^A-Za-z0-9_.]+", "_", f"{self.bucket_name}-{model_path or self.model_path}")
+
+    def shared_segment_path(self, model_path: str = None, etag: str = None) -> Optional[str]:
+        """
+        Returns the segment file shared by all workers for the model file with this ETag,
+        None when sharing is disabled or the model file is unknown.
+        A model pushed again under the same key gets a new ETag and so a new segment: a segment found
+        after a restart is only mapped when it holds exactly the model being loaded.
+        """
+        shared_model_dir = self.prediction_pipeline_config.shared_model_dir
+        if not shared_model_dir or fcntl is None or not etag:
+            return None
+        return os.path.join(shared_model_dir, f"{self._segment_name(model_path)}-{re.sub(r'[^A-Za-z0-9]+', '', etag)}.bin")
+
+    @staticmethod
+    def _remove_segment(segment_path: str) -> None:
+        for path in (segment_path, segment_path + ".lock"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def release_shared_segment(self, model_path: str) -> None:
+        """
+        Removes the segments of a model that is no longer served once a new champion is resident.
+        Workers still mapping them keep their mapping, the memory is freed when the last one swaps.
+        """
+        shared_model_dir = self.prediction_pipeline_config.shared_model_dir
+        if not shared_model_dir or fcntl is None:
+            return
+        for segment_path in glob.glob(os.path.join(glob.escape(shared_model_dir),
+                                                   f"{glob.escape(self._segment_name(model_path))}-*.bin")):
+            logging.info(f"Removing shared model segment {segment_path}")
+            self._remove_segment(segment_path)
+
+    def remove_stale_segments(self, keep: str) -> None:
+        """
+        Removes the segments of every other model once a new one is shared, left behind by previous champions
+        or deployments: all the workers sharing the directory converge on the model being loaded.
+        """
+        for segment_path in glob.glob(os.path.join(glob.escape(os.path.dirname(keep)), "*.bin")):
+            if segment_path != keep:
+                logging.info(f"Removing stale shared model segment {segment_path}")
+                self._remove_segment(segment_path)
+
+    def attach_shared_model(self, model_path: str = None, etag: str = None) -> MyModel:
+        """
+        Maps the shared model segment, creating it first when this is the first worker to load the model.
+        A file lock makes exactly one worker download the model while the others wait for its segment.
+        Models that cannot be turned into arrays are loaded privately.
+        """
+        segment_path = self.shared_segment_path(model_path, etag)
+        os.makedirs(os.path.dirname(segment_path), exist_ok=True)
+        with open(segment_path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if not os.path.exists(segment_path):
+                    self.remove_stale_segments(keep=segment_path)
+                    model = self.download_model(model_path)
+                    if not can_write_array_model(model):
+                        return model
+                    write_array_model(model, segment_path)
+                    del model
+                logging.info(f"Mapping shared model segment {segment_path}")
+                return read_array_model(segment_path)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load(self) -> MyModel:
+        """
+        Loads the model from s3 if it is not resident yet and returns it.
+        """
+        return self.load_snapshot().model
+
+    def get_snapshot(self) -> ModelSnapshot:
+        """
+        Returns the resident model with its version and identity without ever triggering a download.
+        """
+        resident = self._resident
+        if resident is None:
+            raise ModelNotReadyError("Model is not loaded yet")
+        return resident
+
+    def get_model(self) -> MyModel:
+        """
+        Returns the resident model without ever triggering a download.
+        """
+        return self.get_snapshot().model
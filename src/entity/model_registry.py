@@ -0,0 +1,144 @@
+import os
+import sys
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from src.cloud_storage.aws_storage import SimpleStorageService
+from src.constants import (MODEL_FILE_NAME, MODEL_PUSHER_S3_KEY, MODEL_REGISTRY_CHAMPION_FILE_NAME,
+                           MODEL_REGISTRY_METADATA_FILE_NAME, MODEL_REGISTRY_VERSIONS_DIR)
+from src.entity.model_artifact import array_model_path
+from src.exception import MyException
+from src.logger import logging
+
+
+class ModelVersionExistsError(Exception):
+    """
+    Raised when a version that was already registered is registered again, versions are immutable.
+    """
+
+
+class ModelRegistry:
+    """
+    Versioned model registry in the model bucket, under the registry prefix.
+
+    Every pushed model gets its own version directory, written once and never modified:
+        <prefix>/versions/<version>/model.pkl
+        <prefix>/versions/<version>/model.vimodel   (when the trainer wrote an array model)
+        <prefix>/versions/<version>/metadata.json   (metrics and provenance, written last)
+    The metadata file is uploaded after the model files, so a version without it is incomplete and cannot
+    be promoted. The champion served by the prediction servers is named by <prefix>/champion.json, replaced
+    by a single PUT: a reader sees either the previous champion or the new one, never a partial model.
+    """
+
+    def __init__(self, bucket_name: str, registry_prefix: str = MODEL_PUSHER_S3_KEY,
+                 s3: SimpleStorageService = None):
+        """
+        :param bucket_name: Name of the model bucket
+        :param registry_prefix: Key prefix of the registry in the bucket
+        :param s3: Storage service used for the registry objects
+        """
+        self.bucket_name = bucket_name
+        self.registry_prefix = registry_prefix.strip("/")
+        self.s3 = s3 or SimpleStorageService()
+
+    @staticmethod
+    def new_version() -> str:
+        """
+        Returns a version id sorting in creation order, unique even for models pushed in the same second.
+        """
+        return f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{os.urandom(3).hex()}"
+
+    def version_prefix(self, version: str) -> str:
+        return f"{self.registry_prefix}/{MODEL_REGISTRY_VERSIONS_DIR}/{version}"
+
+    def model_path(self, version: str) -> str:
+        """
+        Key of the pickled model of a version, its array model sits next to it.
+        """
+        return f"{self.version_prefix(version)}/{MODEL_FILE_NAME}"
+
+    @property
+    def champion_path(self) -> str:
+        return f"{self.registry_prefix}/{MODEL_REGISTRY_CHAMPION_FILE_NAME}"
+
+    def register_version(self, model_file_path: str, metrics: dict, metadata: dict = None,
+                         version: str = None) -> str:
+        """
+        Uploads a trained model as a new immutable version and returns its version id.
+
+        :param model_file_path: Local path of the pickled model, its array model is uploaded too when present
+        :param metrics: Evaluation metrics of the model, stored with the version
+        :param metadata: Any other provenance to store with the version
+        :param version: Version id, a new one by default
+        """
+        try:
+            version = version or self.new_version()
+            model_path = self.model_path(version)
+            metadata_path = f"{self.version_prefix(version)}/{MODEL_REGISTRY_METADATA_FILE_NAME}"
+            if self.s3.s3_key_path_available(self.bucket_name, model_path) or \
+                    self.s3.s3_key_path_available(self.bucket_name, metadata_path):
+                raise ModelVersionExistsError(f"Model version {version} is already registered")
+
+            local_array_model_path = array_model_path(model_file_path)
+            files = [MODEL_FILE_NAME]
+            if os.path.exists(local_array_model_path):
+                self.s3.upload_file(local_array_model_path, array_model_path(model_path), self.bucket_name,
+                                    remove=False)
+                files.append(os.path.basename(array_model_path(model_path)))
+            self.s3.upload_file(model_file_path, model_path, self.bucket_name, remove=False)
+            self.s3.upload_json({**(metadata or {}), "version": version, "model_path": model_path, "files": files,
+                                 "metrics": metrics, "created_at": datetime.now(timezone.utc).isoformat()},
+                                metadata_path, self.bucket_name)
+            logging.info(f"Registered model version {version} under s3://{self.bucket_name}/{self.version_prefix(version)}")
+            return version
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def get_version(self, version: str) -> Optional[dict]:
+        """
+        Returns the metadata of a complete version, None when the version does not exist.
+        """
+        return self.s3.read_json(f"{self.version_prefix(version)}/{MODEL_REGISTRY_METADATA_FILE_NAME}",
+                                 self.bucket_name)
+
+    def list_versions(self) -> List[str]:
+        """
+        Returns the ids of the complete versions, oldest first.
+        """
+        try:
+            prefix = f"{self.registry_prefix}/{MODEL_REGISTRY_VERSIONS_DIR}/"
+            versions = []
+            for key in self.s3.list_keys(prefix, self.bucket_name):
+                version, _, file_name = key[len(prefix):].partition("/")
+                if file_name == MODEL_REGISTRY_METADATA_FILE_NAME:
+                    versions.append(version)
+            return sorted(versions)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def get_champion(self) -> Optional[dict]:
+        """
+        Returns the champion pointer (version, model_path, metrics, promoted_at), None before the first promotion.
+        Always read from S3, the pointer is the one registry object that changes.
+        """
+        return self.s3.read_json(self.champion_path, self.bucket_name)
+
+    def promote(self, version: str) -> dict:
+        """
+        Makes a registered version the champion and returns the new pointer.
+        The previous champion is recorded in the pointer, promoting it again rolls back.
+        """
+        try:
+            metadata = self.get_version(version)
+            if metadata is None:
+                raise ValueError(f"Model version {version} is not registered or is incomplete")
+            previous = self.get_champion()
+            champion = {"version": version, "model_path": metadata["model_path"], "metrics": metadata["metrics"],
+                        "promoted_at": datetime.now(timezone.utc).isoformat(),
+                        "previous_version": previous["version"] if previous else None}
+            self.s3.upload_json(champion, self.champion_path, self.bucket_name)
+            logging.info(f"Promoted model version {version} to champion, previous champion: "
+                         f"{champion['previous_version']}")
+            return champion
+        except Exception as e:
+            raise MyException(e, sys) from e
@@ -1,6 +1,10 @@
 from src.cloud_storage.aws_storage import SimpleStorageService
 from src.exception import MyException
 from src.entity.estimator import MyModel
+from src.entity.model_artifact import array_model_path, read_array_model
+from src.logger import logging
+from src.utils.tracing import tracer
+import os
 import sys
 from pandas import DataFrame
 
@@ -8,6 +12,10 @@ from pandas import DataFrame
 class Proj1Estimator:
     """
     This class is used to save and retrieve our model from s3 bucket and to do prediction
+
+    The pickled model can have an array model (see src.entity.model_artifact) pushed next to it.
+    When it is there it is downloaded and memory-mapped instead of unpickling the pickle,
+    which stays the fallback for models pushed without one.
     """
 
     def __init__(self,bucket_name,model_path,):
@@ -18,6 +26,7 @@ class Proj1Estimator:
         self.bucket_name = bucket_name
         self.s3 = SimpleStorageService()
         self.model_path = model_path
+        self.array_model_path = array_model_path(model_path)
         self.loaded_model:MyModel=None
 
 
@@ -30,20 +39,49 @@ class Proj1Estimator:
 
     def load_model(self,)->MyModel:
         """
-        Load the model from the model_path
+        Load the model from the array model next to model_path when there is one, from the pickle otherwise
         :return:
         """
+        try:
+            with tracer.span("estimator.load_model", bucket=self.bucket_name, model_path=self.model_path) as span:
+                if self.is_model_present(self.array_model_path):
+                    span.set("format", "array")
+                    return self.load_array_model()
+                span.set("format", "pickle")
+                return self.s3.load_model(self.model_path,bucket_name=self.bucket_name)
+        except Exception as e:
+            raise MyException(e, sys) from e
 
-        return self.s3.load_model(self.model_path,bucket_name=self.bucket_name)
+    def load_array_model(self) -> MyModel:
+        """
+        Fetches the array model through the local model cache and maps the cached file read-only
+        :return:
+        """
+        with tracer.span("s3.get", key=self.array_model_path):
+            local_path = self.s3.get_cached_file(self.array_model_path, bucket_name=self.bucket_name)
+        with tracer.span("array_model.map"):
+            model = read_array_model(local_path)
+        logging.info(f"Array model {self.array_model_path} mapped from {local_path}, metadata: {model.metadata}")
+        return model
 
     def save_model(self,from_file,remove:bool=False)->None:
         """
-        Save the model to the model_path
+        Save the model to the model_path, along with its array model when one was written next to from_file
         :param from_file: Your local system model path
         :param remove: By default it is false that mean you will have your model locally available in your system folder
         :return:
         """
         try:
+            local_array_model_path = array_model_path(from_file)
+            if os.path.exists(local_array_model_path):
+                self.s3.upload_file(local_array_model_path,
+                                    to_filename=self.array_model_path,
+                                    bucket_name=self.bucket_name,
+                                    remove=remove
+                                    )
+            elif self.is_model_present(self.array_model_path):
+                # An array model left by a previous push would be loaded instead of the new pickle
+                self.s3.delete_file(self.array_model_path, bucket_name=self.bucket_name)
             self.s3.upload_file(from_file,
                                 to_filename=self.model_path,
                                 bucket_name=self.bucket_name,
@@ -14,8 +14,20 @@ project_root = os.getcwd()
 log_dir_path = os.path.join(project_root, LOG_DIR)
 log_file_path = os.path.join(log_dir_path, LOG_FILE)
 
-# Make sure the logs folder exists
-os.makedirs(log_dir_path, exist_ok=True)
+
+class LazyRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that creates the logs folder and the log file on the first record
+    instead of at import, so importing the package has no filesystem side effect.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs["delay"] = True
+        super().__init__(*args, **kwargs)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
 
 
 def configure_logger():
@@ -30,7 +42,7 @@ def configure_logger():
 
     formatter = logging.Formatter("[ %(asctime)s ] %(name)s - %(levelname)s - %(message)s")
 
-    file_handler = RotatingFileHandler(
+    file_handler = LazyRotatingFileHandler(
         filename=log_file_path,
         maxBytes=MAX_LOG_SIZE,
         backupCount=BACKUP_COUNT,
@@ -0,0 +1,75 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional, the Arrow endpoint answers 415 without it
+    pa = None
+
+from src.constants import MODEL_FEATURE_COLUMNS
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+ARROW_FILE_MAGIC = b"ARROW1"
+
+
+def arrow_available() -> bool:
+    return pa is not None
+
+
+def read_arrow_table(body: bytes) -> "pa.Table":
+    """
+    Opens an Arrow IPC stream, or an Arrow IPC file / Feather v2 body, without copying the buffers.
+    """
+    buffer = pa.py_buffer(body)
+    if body[:len(ARROW_FILE_MAGIC)] == ARROW_FILE_MAGIC:
+        return pa.ipc.open_file(buffer).read_all()
+    return pa.ipc.open_stream(buffer).read_all()
+
+
+def arrow_table_to_features(table: "pa.Table") -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Returns the engineered feature columns as one float64 matrix in MODEL_FEATURE_COLUMNS order,
+    plus the id column when there is one. Every column is converted by numpy as a whole,
+    there is no per-value Python conversion: a float64 column without nulls is read straight from
+    the Arrow buffer, other numeric types are cast while being written into the matrix.
+    """
+    missing = [column for column in MODEL_FEATURE_COLUMNS if column not in table.column_names]
+    if missing:
+        raise ValueError(f"Arrow body is missing the columns {missing}")
+    features = np.empty((table.num_rows, len(MODEL_FEATURE_COLUMNS)), dtype=np.float64)
+    for index, column in enumerate(MODEL_FEATURE_COLUMNS):
+        values = table.column(column)
+        if values.null_count:
+            raise ValueError(f"Column {column} holds {values.null_count} null values")
+        if not (pa.types.is_integer(values.type) or pa.types.is_floating(values.type)
+                or pa.types.is_boolean(values.type)):
+            raise ValueError(f"Column {column} must be numeric, got {values.type}")
+        features[:, index] = values.to_numpy()
+    ids = table.column("id").to_numpy() if "id" in table.column_names else None
+    return features, ids
+
+
+def predictions_to_arrow(predictions: np.ndarray, ids: Optional[np.ndarray] = None) -> bytes:
+    """
+    Serialises the predictions, and the ids they belong to, as an Arrow IPC stream.
+    """
+    columns = {"prediction": pa.array(np.asarray(predictions, dtype=np.int8))}
+    if ids is not None:
+        columns = {"id": pa.array(ids), **columns}
+    table = pa.table(columns)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def score_arrow_body(body: bytes, predict_matrix) -> Tuple[bytes, np.ndarray, np.ndarray]:
+    """
+    Reads an Arrow body, scores its rows with predict_matrix and returns the Arrow IPC stream of predictions,
+    along with the scored feature matrix and the predictions themselves.
+    Blocking, meant to run on an inference worker.
+    """
+    features, ids = arrow_table_to_features(read_arrow_table(body))
+    predictions = predict_matrix(features)
+    return predictions_to_arrow(predictions, ids), features, predictions
@@ -0,0 +1,99 @@
+import io
+import json
+from typing import AsyncIterator, Awaitable, Callable
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from src.logger import logging
+from src.utils.main_utils import engineer_vehicle_features
+
+CSV_OUTPUT_FORMAT = "csv"
+NDJSON_OUTPUT_FORMAT = "ndjson"
+
+
+class UploadStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body is produced while the request body is still being read.
+    Starlette's StreamingResponse listens for a client disconnect by consuming receive(), which would
+    steal the upload's body messages from the generator, so the request stream is left to the generator.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def iter_csv_chunks(byte_stream: AsyncIterator[bytes], chunk_rows: int) -> AsyncIterator[DataFrame]:
+    """
+    Parses a CSV byte stream into DataFrames of at most chunk_rows rows while it is still arriving.
+    Only the current chunk and one partial line are ever held in memory.
+    Quoted fields spanning several lines are not supported.
+    """
+    header = None
+    lines = []
+    pending = b""
+    async for data in byte_stream:
+        if not data:
+            continue
+        *complete, pending = (pending + data).split(b"\n")
+        for line in complete:
+            line = line.rstrip(b"\r")
+            if not line.strip():
+                continue
+            if header is None:
+                header = line
+                continue
+            lines.append(line)
+            if len(lines) >= chunk_rows:
+                yield pd.read_csv(io.BytesIO(b"\n".join([header] + lines)))
+                lines = []
+    pending = pending.rstrip(b"\r")
+    if pending.strip():
+        if header is None:
+            header = pending
+        else:
+            lines.append(pending)
+    if header is not None and lines:
+        yield pd.read_csv(io.BytesIO(b"\n".join([header] + lines)))
+
+
+def format_predictions(ids: np.ndarray, predictions: np.ndarray, output_format: str) -> str:
+    if output_format == NDJSON_OUTPUT_FORMAT:
+        return "".join(json.dumps({"id": row_id, "prediction": int(prediction)}) + "\n"
+                       for row_id, prediction in zip(ids.tolist(), predictions))
+    return "".join(f"{row_id},{int(prediction)}\n" for row_id, prediction in zip(ids.tolist(), predictions))
+
+
+async def stream_csv_predictions(byte_stream: AsyncIterator[bytes],
+                                 score_chunk: Callable[[DataFrame], Awaitable[np.ndarray]],
+                                 chunk_rows: int, output_format: str = CSV_OUTPUT_FORMAT) -> AsyncIterator[str]:
+    """
+    Scores a raw customer CSV (same columns as the MongoDB collection) chunk by chunk
+    and yields the predictions of every chunk as soon as it is scored.
+    Rows are identified by their id column, or by their position in the upload when there is none.
+    A failure ends the stream with an error record since the response status is already sent.
+    """
+    if output_format == CSV_OUTPUT_FORMAT:
+        yield "id,prediction\n"
+    rows_scored = 0
+    try:
+        async for chunk in iter_csv_chunks(byte_stream, chunk_rows):
+            if "id" in chunk.columns:
+                ids = chunk["id"].to_numpy()
+            else:
+                ids = np.arange(rows_scored, rows_scored + len(chunk))
+            predictions = await score_chunk(engineer_vehicle_features(chunk))
+            rows_scored += len(chunk)
+            yield format_predictions(ids, predictions, output_format)
+        logging.info(f"Streamed predictions for {rows_scored} uploaded rows")
+    except Exception as e:
+        logging.error(f"CSV prediction stream failed after {rows_scored} rows: {e}")
+        if output_format == NDJSON_OUTPUT_FORMAT:
+            yield json.dumps({"error": str(e), "rows_scored": rows_scored}) + "\n"
+        else:
+            yield f"# error after {rows_scored} rows: {e}\n"
@@ -0,0 +1,81 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from src.entity.config_entity import InferenceExecutorConfig
+from src.logger import logging
+from src.utils.metrics import inference_rejected_total
+
+
+class InferenceOverloadedError(Exception):
+    """
+    Raised when the inference executor is saturated and sheds the request instead of queueing it.
+    """
+
+    def __init__(self, retry_after_seconds: float):
+        super().__init__("Inference capacity exhausted, retry later")
+        self.retry_after_seconds = retry_after_seconds
+
+
+class InferenceExecutor:
+    """
+    Bounded worker pool running CPU-bound model calls off the event loop.
+
+    At most max_workers calls run at once and at most max_queue_size more wait for a worker.
+    Anything beyond that is rejected right away with InferenceOverloadedError, so overload turns
+    into fast 503 responses instead of an ever growing backlog.
+    """
+
+    def __init__(self, executor_config: InferenceExecutorConfig = InferenceExecutorConfig()):
+        """
+        :param executor_config: Configuration of the pool size and queue limit
+        """
+        self.executor_config = executor_config
+        self._pool: Optional[ThreadPoolExecutor] = None
+        # Only touched from the event loop thread, no lock needed
+        self.pending = 0
+        self.rejected = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.executor_config.max_workers + self.executor_config.max_queue_size
+
+    def start(self) -> None:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.executor_config.max_workers,
+                                            thread_name_prefix="inference")
+            logging.info(f"Inference executor started with max_workers={self.executor_config.max_workers} "
+                         f"and max_queue_size={self.executor_config.max_queue_size}")
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def check_capacity(self) -> None:
+        """
+        Raises InferenceOverloadedError when no more work can be accepted.
+        """
+        if self.pending >= self.capacity:
+            self.rejected += 1
+            inference_rejected_total.inc()
+            raise InferenceOverloadedError(retry_after_seconds=self.executor_config.retry_after_seconds)
+
+    async def run(self, func: Callable, *args, shed: bool = True):
+        """
+        Runs func(*args) on the worker pool and returns its result, or sheds it when the pool is saturated.
+        With shed=False the call waits for a worker instead, for work already admitted such as
+        the next chunk of a streamed upload.
+        func runs in a copy of the caller's context, so the spans it opens belong to the caller's trace.
+        """
+        if shed:
+            self.check_capacity()
+        if self._pool is None:
+            self.start()
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, contextvars.copy_context().run,
+                                                                   func, *args)
+        finally:
+            self.pending -= 1
@@ -0,0 +1,97 @@
+from typing import AsyncIterator, Awaitable, Callable, Iterable, List
+
+import numpy as np
+from pandas import DataFrame
+
+from src.logger import logging
+from src.utils.main_utils import engineer_vehicle_features
+
+
+class TopKSelector:
+    """
+    Keeps the k highest scored ids seen across chunks of scores.
+
+    Every chunk is reduced to its own k best with np.argpartition (linear time, no sort), merged with the
+    current k best and reduced again. Memory stays bounded by one chunk plus 2k entries whatever the number
+    of rows scored, and only the final k are sorted.
+    """
+
+    def __init__(self, k: int):
+        """
+        :param k: Number of ids to keep
+        """
+        if k < 1:
+            raise ValueError(f"k must be at least 1, got {k}")
+        self.k = k
+        self.rows_seen = 0
+        self._ids = np.empty(0, dtype=object)
+        self._scores = np.empty(0, dtype=np.float64)
+
+    def _select(self, ids: np.ndarray, scores: np.ndarray):
+        if scores.shape[0] <= self.k:
+            return ids, scores
+        best = np.argpartition(scores, scores.shape[0] - self.k)[-self.k:]
+        return ids[best], scores[best]
+
+    def update(self, ids, scores) -> None:
+        """
+        Offers a chunk of scored ids.
+        """
+        ids = np.asarray(ids)
+        scores = np.asarray(scores, dtype=np.float64)
+        if ids.shape[0] != scores.shape[0]:
+            raise ValueError(f"Got {ids.shape[0]} ids for {scores.shape[0]} scores")
+        self.rows_seen += scores.shape[0]
+        ids, scores = self._select(ids, scores)
+        # Ids of different chunks may not share a dtype, the kept ones are held as objects
+        self._ids, self._scores = self._select(np.concatenate([self._ids, ids.astype(object)]),
+                                               np.concatenate([self._scores, scores]))
+
+    def result(self) -> List[dict]:
+        """
+        Returns the kept ids with their scores, highest score first.
+        """
+        order = np.argsort(-self._scores, kind="stable")
+        return [{"id": _to_native(row_id), "score": float(score)}
+                for row_id, score in zip(self._ids[order], self._scores[order])]
+
+
+def _to_native(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def chunk_ids(chunk: DataFrame, offset: int) -> np.ndarray:
+    """
+    Identifies rows by their id column, by their MongoDB _id, or by their position among all rows scored.
+    """
+    if "id" in chunk.columns:
+        return chunk["id"].to_numpy()
+    if "_id" in chunk.columns:
+        return chunk["_id"].astype(str).to_numpy()
+    return np.arange(offset, offset + len(chunk))
+
+
+def rank_dataframe_chunks(chunks: Iterable[DataFrame], score_chunk: Callable[[DataFrame], np.ndarray],
+                          k: int) -> TopKSelector:
+    """
+    Ranks raw customer rows (same columns as the MongoDB collection) read chunk by chunk.
+    """
+    selector = TopKSelector(k)
+    for chunk in chunks:
+        selector.update(chunk_ids(chunk, selector.rows_seen), score_chunk(engineer_vehicle_features(chunk)))
+    logging.info(f"Ranked {selector.rows_seen} rows, kept the top {k}")
+    return selector
+
+
+async def rank_csv_chunks(chunks: AsyncIterator[DataFrame], score_chunk: Callable[[DataFrame], Awaitable[np.ndarray]],
+                          k: int) -> TopKSelector:
+    """
+    Same as rank_dataframe_chunks for chunks arriving asynchronously (an upload parsed while it arrives,
+    a cursor read on a thread), scored asynchronously.
+    """
+    selector = TopKSelector(k)
+    async for chunk in chunks:
+        ids = chunk_ids(chunk, selector.rows_seen)
+        selector.update(ids, await score_chunk(engineer_vehicle_features(chunk)))
+    logging.info(f"Ranked {selector.rows_seen} streamed rows, kept the top {k}")
+    return selector
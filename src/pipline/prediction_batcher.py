@@ -0,0 +1,151 @@
+import asyncio
+import time
+from typing import Callable, List, Optional
+
+from src.entity.config_entity import PredictionBatcherConfig
+from src.pipline.inference_executor import InferenceExecutor, InferenceOverloadedError
+from src.logger import logging
+from src.utils.metrics import inference_rejected_total
+from src.utils.tracing import NO_SPAN, current_span, tracer
+
+
+class PredictionBatcher:
+    """
+    Coalesces concurrent single-row prediction requests into one batched model call.
+
+    Requests are queued and a single worker drains them into batches scored as one matrix, every waiting
+    request being resolved with its own prediction. The wait is adaptive: when no batch is being scored the
+    requests already queued are sent at once, so an idle server adds no delay. Only while batches are in
+    flight does the worker keep collecting, until max_batch_size rows are queued or max_wait_ms has passed,
+    and once every inference worker is busy the batch keeps growing until one is free, so the batch size
+    follows the load on its own. Once max_queue_size requests are waiting new ones are shed with
+    InferenceOverloadedError.
+
+    A batch is scored outside of any request, its spans are recorded once and copied into the trace of every
+    traced request it served.
+    """
+
+    def __init__(self, predict_batch: Callable[[list], List[int]],
+                 batcher_config: PredictionBatcherConfig = PredictionBatcherConfig(),
+                 inference_executor: InferenceExecutor = None):
+        """
+        :param predict_batch: Blocking function scoring a list of records (any row type it accepts),
+                              run in a worker thread
+        :param batcher_config: Configuration of the batch size, wait budget and queue limit
+        :param inference_executor: Worker pool scoring the batches, a private one when not given
+        """
+        self.predict_batch = predict_batch
+        self.batcher_config = batcher_config
+        self.inference_executor = inference_executor or InferenceExecutor()
+        self.rejected = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight: set = set()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self) -> None:
+        """
+        Starts the batching worker on the running event loop.
+        """
+        if self._worker is None:
+            self._queue = asyncio.Queue(maxsize=self.batcher_config.max_queue_size)
+            self._worker = asyncio.create_task(self._run())
+            logging.info(f"Prediction batcher started with max_batch_size={self.batcher_config.max_batch_size} "
+                         f"and max_wait_ms={self.batcher_config.max_wait_ms}")
+
+    async def stop(self) -> None:
+        """
+        Stops the batching worker, failing the requests still waiting in the queue.
+        """
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        for task in list(self._in_flight):
+            task.cancel()
+        await asyncio.gather(*self._in_flight, return_exceptions=True)
+        while not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Prediction batcher stopped"))
+        self._worker = None
+        self._queue = None
+
+    async def predict(self, record) -> int:
+        """
+        Queues one record and waits for its prediction.
+        """
+        if self._worker is None:
+            raise RuntimeError("Prediction batcher is not started")
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((record, future, current_span()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            inference_rejected_total.inc()
+            raise InferenceOverloadedError(
+                retry_after_seconds=self.inference_executor.executor_config.retry_after_seconds)
+        return await future
+
+    def _drain(self, batch: list) -> None:
+        while len(batch) < self.batcher_config.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+
+    async def _collect(self) -> list:
+        """
+        Waits for the first queued request and takes the requests already queued with it. While other batches
+        are being scored, gathers more until the batch is full or the wait budget is spent.
+        """
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.batcher_config.max_wait_ms / 1000
+        while len(batch) < self.batcher_config.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            if not self._in_flight:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        # One batch per inference worker at most, later requests keep growing the next batch meanwhile
+        slots = asyncio.Semaphore(self.inference_executor.executor_config.max_workers)
+        while True:
+            batch = await self._collect()
+            await slots.acquire()
+            self._drain(batch)
+            task = asyncio.create_task(self._score(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(lambda done: (self._in_flight.discard(done), slots.release()))
+
+    async def _score(self, batch: list) -> None:
+        records = [record for record, _, _ in batch]
+        parents = [parent for _, _, parent in batch if parent is not None]
+        try:
+            with tracer.collect("batch_score", batch_size=len(records)) if parents else NO_SPAN as collected:
+                predictions = await self.inference_executor.run(self.predict_batch, records)
+            for parent in parents:
+                tracer.attach(parent, collected)
+            for (_, future, _), prediction in zip(batch, predictions):
+                if not future.done():
+                    future.set_result(prediction)
+        except (Exception, asyncio.CancelledError) as e:
+            # An overloaded executor sheds the whole batch, its requests get a 503 like any other
+            logging.error(f"Batched prediction of {len(records)} records failed: {e!r}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e if isinstance(e, Exception) else RuntimeError("Prediction batcher stopped"))
+            if isinstance(e, asyncio.CancelledError):
+                raise
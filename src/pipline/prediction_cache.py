@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from src.constants import MODEL_FEATURE_COLUMNS
+from src.entity.config_entity import PredictionCacheConfig
+from src.logger import logging
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of predictions with a time to live, scoped to one model version.
+
+    Keys are the record's features as a tuple of floats in the model's column order, so "1", 1 and 1.0
+    hit the same entry. Model versions are the increasing versions of the model holder: lookups under
+    another version than the cached one miss, and the entries are only dropped once a newer version stores
+    its first prediction. Requests still holding an older model neither read nor reset the cache.
+    """
+
+    def __init__(self, cache_config: PredictionCacheConfig = PredictionCacheConfig()):
+        """
+        :param cache_config: Configuration of the cache size and time to live
+        """
+        self.cache_config = cache_config
+        self._entries: OrderedDict = OrderedDict()
+        self._model_version: Optional[int] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(record: dict) -> Optional[Tuple[float, ...]]:
+        """
+        Returns the canonical key of a record, None when a feature is not numeric.
+        """
+        try:
+            return tuple(float(record[column]) for column in MODEL_FEATURE_COLUMNS)
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def get(self, key: Tuple[float, ...], model_version: int) -> Optional[int]:
+        """
+        Returns the cached prediction for the key under the given model version, None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key) if model_version == self._model_version else None
+            if entry is not None:
+                prediction, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return prediction
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key: Tuple[float, ...], prediction: int, model_version: int) -> None:
+        """
+        Stores a prediction, evicting the least recently used entries beyond max_entries.
+        A newer model version replaces the cached entries, predictions of an older one are not stored.
+        """
+        with self._lock:
+            if self._model_version is not None and model_version < self._model_version:
+                return
+            if model_version != self._model_version:
+                if self._entries:
+                    logging.info(f"Model version moved to {model_version}, "
+                                 f"dropping {len(self._entries)} cached predictions")
+                    self.invalidations += 1
+                    self._entries.clear()
+                self._model_version = model_version
+            self._entries[key] = (prediction, time.monotonic() + self.cache_config.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.cache_config.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.cache_config.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -1,8 +1,16 @@
 import sys
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.constants import MODEL_FEATURE_COLUMNS, RANKING_POSITIVE_CLASS
 from src.entity.config_entity import VehiclePredictorConfig
-from src.entity.s3_estimator import Proj1Estimator
+from src.entity.model_holder import ModelHolder, ModelSnapshot
+from src.pipline.prediction_cache import PredictionCache
 from src.exception import MyException
 from src.logger import logging
+from src.utils.metrics import prediction_stage_seconds
 from pandas import DataFrame
 
 
@@ -81,13 +89,65 @@ class VehicleData:
         except Exception as e:
             raise MyException(e, sys) from e
 
+    @staticmethod
+    def get_vehicle_input_data_frame_from_records(records: List[dict]) -> DataFrame:
+        """
+        This function returns a single DataFrame holding many vehicle records, one row per record,
+        with the columns in the order the model was trained on
+        """
+        try:
+            columns = {column: [record[column] for record in records] for column in MODEL_FEATURE_COLUMNS}
+            return DataFrame(columns, columns=MODEL_FEATURE_COLUMNS)
+
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+class VehicleFeatureRow:
+    """
+    One vehicle record as a contiguous float64 row in the order the model was trained on.
+    Lighter than VehicleData: a single array and no per-feature attributes, dict or DataFrame.
+    """
+    __slots__ = ("values",)
+
+    def __init__(self, values: Iterable[float]):
+        """
+        :param values: Feature values in MODEL_FEATURE_COLUMNS order
+        """
+        self.values = np.fromiter(values, dtype=np.float64, count=len(MODEL_FEATURE_COLUMNS))
+
+    @classmethod
+    def from_record(cls, record) -> "VehicleFeatureRow":
+        """
+        Builds a row from a dict or from an object (e.g. a validated VehicleRecord) holding every feature.
+        """
+        try:
+            if isinstance(record, dict):
+                return cls(record[column] for column in MODEL_FEATURE_COLUMNS)
+            return cls(getattr(record, column) for column in MODEL_FEATURE_COLUMNS)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    @property
+    def key(self) -> Tuple[float, ...]:
+        """
+        Canonical prediction cache key of the row, same as PredictionCache.make_key of the record.
+        """
+        return tuple(self.values.tolist())
+
 class VehicleDataClassifier:
-    def __init__(self,prediction_pipeline_config: VehiclePredictorConfig = VehiclePredictorConfig(),) -> None:
+    def __init__(self,prediction_pipeline_config: VehiclePredictorConfig = VehiclePredictorConfig(),
+                 model_holder: ModelHolder = None, prediction_cache: PredictionCache = None) -> None:
         """
         :param prediction_pipeline_config: Configuration for prediction the value
+        :param model_holder: Holder of the in-memory model, defaults to the one shared by the process
+        :param prediction_cache: Optional cache of predictions for repeated records
         """
         try:
             self.prediction_pipeline_config = prediction_pipeline_config
+            if model_holder is None:
+                model_holder = ModelHolder.shared(prediction_pipeline_config=prediction_pipeline_config)
+            self.model_holder = model_holder
+            self.prediction_cache = prediction_cache
         except Exception as e:
             raise MyException(e, sys)
 
@@ -98,13 +158,144 @@ class VehicleDataClassifier:
         """
         try:
             logging.info("Entered predict method of VehicleDataClassifier class")
-            model = Proj1Estimator(
-                bucket_name=self.prediction_pipeline_config.model_bucket_name,
-                model_path=self.prediction_pipeline_config.model_file_path,
-            )
+            model = self.model_holder.load()
             result =  model.predict(dataframe)
             
             return result
         
         except Exception as e:
-            raise MyException(e, sys)
\ No newline at end of file
+            raise MyException(e, sys)
+
+    @staticmethod
+    def _model_input(model, matrix: np.ndarray):
+        """
+        Returns the stacked rows as they can be fed to model.predict: the array itself when the model's
+        fused preprocessing takes features in MODEL_FEATURE_COLUMNS order, a DataFrame otherwise.
+        """
+        preprocessing_object = model.get_preprocessing_object() if hasattr(model, "get_preprocessing_object") \
+            else model.preprocessing_object
+        if getattr(preprocessing_object, "feature_columns", None) == MODEL_FEATURE_COLUMNS:
+            return matrix
+        return DataFrame(matrix, columns=MODEL_FEATURE_COLUMNS)
+
+    def predict_matrix(self, matrix: np.ndarray, snapshot: ModelSnapshot = None) -> np.ndarray:
+        """
+        This is the method of VehicleDataClassifier
+        Scores a float matrix whose columns are the features in MODEL_FEATURE_COLUMNS order,
+        with the model of snapshot when given, the resident model otherwise
+        Returns: Predictions in row order
+        """
+        try:
+            logging.info(f"Entered predict_matrix method of VehicleDataClassifier class with {len(matrix)} rows")
+            model = (snapshot or self.model_holder.load_snapshot()).model
+            return model.predict(self._model_input(model, matrix))
+
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def predict_scores(self, features, snapshot: ModelSnapshot = None) -> np.ndarray:
+        """
+        This is the method of VehicleDataClassifier
+        Scores a DataFrame of engineered features, or a float matrix in MODEL_FEATURE_COLUMNS order,
+        with the probability of the positive Response class
+        Returns: Probability per row
+        """
+        try:
+            model = (snapshot or self.model_holder.load_snapshot()).model
+            model_input = self._model_input(model, features) if isinstance(features, np.ndarray) else features
+            positive_index = int(np.flatnonzero(np.asarray(model.get_classes()) == RANKING_POSITIVE_CLASS)[0])
+            return model.predict_proba(model_input)[:, positive_index]
+
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def predict_rows(self, rows: List[VehicleFeatureRow], snapshot: ModelSnapshot = None) -> List[int]:
+        """
+        This is the method of VehicleDataClassifier
+        Scores typed rows by stacking them into one float matrix, without building a DataFrame
+        for models with fused preprocessing; rows already in the prediction cache are not scored again
+        Returns: Predictions in row order
+        """
+        try:
+            start = time.perf_counter()
+            snapshot = snapshot or self.model_holder.load_snapshot()
+            model, model_version = snapshot.model, snapshot.version
+
+            predictions = [None] * len(rows)
+            if self.prediction_cache is not None:
+                for index, row in enumerate(rows):
+                    predictions[index] = self.prediction_cache.get(row.key, model_version)
+            missing = [index for index, prediction in enumerate(predictions) if prediction is None]
+            looked_up = time.perf_counter()
+
+            if missing:
+                matrix = np.stack([rows[index].values for index in missing])
+                model_input = self._model_input(model, matrix)
+                built = time.perf_counter()
+                for index, value in zip(missing, model.predict(model_input)):
+                    predictions[index] = int(value)
+                    if self.prediction_cache is not None:
+                        self.prediction_cache.put(rows[index].key, predictions[index], model_version)
+                prediction_stage_seconds.observe(built - looked_up, "row_stack")
+            prediction_stage_seconds.observe(looked_up - start, "cache_lookup")
+            return predictions
+
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def predict_identified_rows(self, rows: List[VehicleFeatureRow]) -> List[Tuple[int, Optional[str]]]:
+        """
+        This is the method of VehicleDataClassifier
+        Scores typed rows like predict_rows, with one model snapshot for the whole batch
+        Returns: Prediction and identity of the model that made it, in row order
+        """
+        snapshot = self.model_holder.load_snapshot()
+        return [(prediction, snapshot.model_id) for prediction in self.predict_rows(rows, snapshot)]
+
+    def predict_batch(self, records: List[dict], snapshot: ModelSnapshot = None) -> Tuple[List[int], Dict[str, float]]:
+        """
+        This is the method of VehicleDataClassifier
+        Scores many records with a single transform and a single predict call on the model of snapshot
+        (the resident model by default), records already in the prediction cache are answered from it
+        and not scored again
+        Returns: Predictions in record order and the time spent per step in milliseconds
+        """
+        try:
+            logging.info(f"Entered predict_batch method of VehicleDataClassifier class with {len(records)} records")
+            start = time.perf_counter()
+            snapshot = snapshot or self.model_holder.load_snapshot()
+            model, model_version = snapshot.model, snapshot.version
+
+            predictions = [None] * len(records)
+            keys = [None] * len(records)
+            if self.prediction_cache is not None:
+                for index, record in enumerate(records):
+                    keys[index] = self.prediction_cache.make_key(record)
+                    if keys[index] is not None:
+                        predictions[index] = self.prediction_cache.get(keys[index], model_version)
+            missing = [index for index, prediction in enumerate(predictions) if prediction is None]
+            looked_up = time.perf_counter()
+
+            if missing:
+                dataframe = VehicleData.get_vehicle_input_data_frame_from_records([records[index] for index in missing])
+            built = time.perf_counter()
+
+            if missing:
+                for index, value in zip(missing, model.predict(dataframe)):
+                    predictions[index] = int(value)
+                    if keys[index] is not None:
+                        self.prediction_cache.put(keys[index], predictions[index], model_version)
+            predicted = time.perf_counter()
+
+            prediction_stage_seconds.observe(looked_up - start, "cache_lookup")
+            prediction_stage_seconds.observe(built - looked_up, "dataframe_build")
+            timings = {
+                "cache_ms": (looked_up - start) * 1000,
+                "build_ms": (built - looked_up) * 1000,
+                "predict_ms": (predicted - built) * 1000,
+                "total_ms": (predicted - start) * 1000,
+            }
+            return predictions, timings
+
+        except Exception as e:
+            raise MyException(e, sys)
@@ -0,0 +1,275 @@
+import glob
+import json
+import multiprocessing
+import os
+import queue
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows, jobs are then only coordinated within one process
+    fcntl = None
+
+from src.entity.config_entity import TrainingJobConfig
+from src.exception import MyException
+from src.logger import logging
+
+JOB_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+def run_training_job(events) -> None:
+    """
+    Entry point of the training process: runs the whole pipeline and reports stages and outcome on events.
+    Imported lazily so the serving process never loads the training stack.
+    """
+    from src.pipline.training_pipeline import TrainPipeline
+
+    try:
+        train_pipeline = TrainPipeline(stage_listener=lambda stage: events.put(("stage", stage, time.time())))
+        model_pusher_artifact = train_pipeline.run_pipeline()
+        result = {"model_accepted": model_pusher_artifact is not None}
+        if model_pusher_artifact is not None:
+            result.update(bucket_name=model_pusher_artifact.bucket_name,
+                          s3_model_path=model_pusher_artifact.s3_model_path)
+        events.put(("succeeded", result, time.time()))
+    except Exception as e:
+        events.put(("failed", str(e), time.time()))
+
+
+@dataclass
+class TrainingJob:
+    job_id: str
+    status: str = "running"
+    stage: Optional[str] = None
+    stage_timings: Dict[str, float] = field(default_factory=dict)
+    submitted_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    pid: Optional[int] = None
+    _stage_started_at: Optional[float] = field(default=None, repr=False)
+
+    @property
+    def is_active(self) -> bool:
+        return self.status == "running"
+
+    def enter_stage(self, stage: Optional[str], at: float) -> None:
+        """
+        Closes the timing of the current stage and starts the next one.
+        """
+        if self.stage is not None and self._stage_started_at is not None:
+            self.stage_timings[self.stage] = at - self._stage_started_at
+        self.stage = stage
+        self._stage_started_at = at
+
+    def to_dict(self) -> dict:
+        job = asdict(self)
+        job.pop("_stage_started_at")
+        job["duration"] = (self.finished_at or time.time()) - self.submitted_at
+        return job
+
+
+class TrainingJobManager:
+    """
+    Runs the training pipeline as a background job in a separate process.
+
+    Only one job runs at a time across every worker process of the server: submissions are serialized by a
+    file lock in the job directory, where each job's status is kept as a JSON file. Triggering training while
+    a job is running returns that job instead of starting a second pipeline, and any worker can report the
+    status of any job. The worker that started a job follows the stages reported by its training process on
+    a monitor thread and rewrites the job file as they come.
+
+    The monitor holds a lock on <job_id>.lock while it runs. The lock is released by the system when the
+    worker dies, so a job left running by a killed worker is told apart from a live one without trusting
+    pids, which a restarted container reuses.
+    """
+
+    def __init__(self, job_config: TrainingJobConfig = TrainingJobConfig()):
+        """
+        :param job_config: Directory of the job status files and number of finished jobs kept for polling
+        """
+        self.job_config = job_config
+        self.job_dir = job_config.job_dir
+        self._lock = threading.Lock()
+        self._context = multiprocessing.get_context("spawn")
+
+    @contextmanager
+    def _exclusive(self):
+        """
+        Holds the submission lock of the job directory, shared by the threads and the worker processes.
+        """
+        with self._lock:
+            os.makedirs(self.job_dir, exist_ok=True)
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.job_dir, ".lock"), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _job_path(self, job_id: str) -> str:
+        return os.path.join(self.job_dir, f"{job_id}.json")
+
+    def _is_alive(self, job: TrainingJob) -> bool:
+        """
+        Returns whether a running job is still followed by the monitor of a live worker.
+        """
+        if not job.is_active:
+            return False
+        if fcntl is None:
+            return True
+        with open(os.path.join(self.job_dir, f"{job.job_id}.lock"), "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return False
+
+    def _save(self, job: TrainingJob) -> None:
+        """
+        Writes the job file atomically, readers in other workers see either the previous status or the new one.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.job_dir, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as file_obj:
+                json.dump(asdict(job), file_obj)
+            os.replace(tmp_path, self._job_path(job.job_id))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def _read(self, job_id: str) -> Optional[TrainingJob]:
+        if not JOB_ID_PATTERN.fullmatch(job_id):
+            return None
+        try:
+            with open(self._job_path(job_id)) as file_obj:
+                return TrainingJob(**json.load(file_obj))
+        except FileNotFoundError:
+            return None
+
+    def _list_jobs(self) -> List[TrainingJob]:
+        """
+        Returns the jobs of the job directory, oldest first.
+        """
+        jobs = []
+        for path in glob.glob(os.path.join(self.job_dir, "*.json")):
+            job = self._read(os.path.basename(path)[:-len(".json")])
+            if job is not None:
+                jobs.append(job)
+        return sorted(jobs, key=lambda job: job.submitted_at)
+
+    def submit(self) -> Tuple[TrainingJob, bool]:
+        """
+        Starts a training job unless one is already running in any worker.
+        Returns the job and whether the trigger was coalesced into the running one.
+        """
+        try:
+            with self._exclusive():
+                jobs = self._list_jobs()
+                for job in jobs:
+                    if self._is_alive(job):
+                        logging.info(f"Training job {job.job_id} already running, coalescing trigger")
+                        return job, True
+
+                job = TrainingJob(job_id=uuid.uuid4().hex)
+                monitor_lock = open(os.path.join(self.job_dir, f"{job.job_id}.lock"), "a")
+                if fcntl is not None:
+                    fcntl.flock(monitor_lock, fcntl.LOCK_EX)
+                try:
+                    events = self._context.Queue()
+                    process = self._context.Process(target=run_training_job, args=(events,),
+                                                    name=f"training-{job.job_id}", daemon=True)
+                    process.start()
+                except BaseException:
+                    monitor_lock.close()
+                    raise
+                job.pid = process.pid
+                logging.info(f"Started training job {job.job_id} in process {process.pid}")
+
+                self._save(job)
+                for finished in jobs[:max(0, len(jobs) + 1 - self.job_config.history_size)]:
+                    for path in (self._job_path(finished.job_id), os.path.join(self.job_dir, f"{finished.job_id}.lock")):
+                        if os.path.exists(path):
+                            os.remove(path)
+                threading.Thread(target=self._monitor, args=(job, process, events, monitor_lock),
+                                 name=f"training-monitor-{job.job_id}", daemon=True).start()
+                return job, False
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def get_status(self, job_id: str) -> Optional[dict]:
+        """
+        Returns a snapshot of the job's status, stage and timings, None for unknown jobs.
+        A job left running by a worker that is gone is reported as failed.
+        """
+        job = self._read(job_id)
+        if job is None:
+            return None
+        if job.is_active and not self._is_alive(job):
+            with self._exclusive():
+                job = self._read(job_id)
+                if job.is_active and not self._is_alive(job):
+                    at = time.time()
+                    job.enter_stage(job.stage, at)
+                    job.status = "failed"
+                    job.error = f"The server worker following training process {job.pid} is gone"
+                    job.finished_at = at
+                    self._save(job)
+        return job.to_dict()
+
+    def _finish(self, job: TrainingJob, status: str, at: float, result: dict = None, error: str = None) -> None:
+        with self._lock:
+            # A failed job keeps reporting the stage it failed in
+            failed_stage = job.stage if status == "failed" else None
+            job.enter_stage(None, at)
+            job.stage = failed_stage
+            job.status = status
+            job.result = result
+            job.error = error
+            job.finished_at = at
+            self._save(job)
+        logging.info(f"Training job {job.job_id} {status}")
+
+    def _monitor(self, job: TrainingJob, process, events, monitor_lock) -> None:
+        """
+        Follows the events of one training process until it reports its outcome or dies,
+        holding the job's monitor lock until then.
+        """
+        try:
+            self._follow(job, process, events)
+        finally:
+            monitor_lock.close()
+
+    def _follow(self, job: TrainingJob, process, events) -> None:
+        while True:
+            try:
+                kind, payload, at = events.get(timeout=1.0)
+            except queue.Empty:
+                if not process.is_alive():
+                    self._finish(job, "failed", time.time(),
+                                 error=f"Training process exited with code {process.exitcode}")
+                    break
+                continue
+            if kind == "stage":
+                with self._lock:
+                    job.enter_stage(payload, at)
+                    self._save(job)
+            elif kind == "succeeded":
+                self._finish(job, "succeeded", at, result=payload)
+                break
+            else:
+                self._finish(job, "failed", at, error=payload)
+                break
+        process.join()
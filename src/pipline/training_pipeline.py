@@ -1,6 +1,10 @@
 import sys
+from contextlib import contextmanager
+from typing import Callable, Optional
+
 from src.exception import MyException
 from src.logger import logging
+from src.utils.tracing import tracer
 
 from src.components.data_ingestion import DataIngestion
 from src.components.data_validation import DataValidation
@@ -26,7 +30,11 @@ from src.entity.artifact_entity import (DataIngestionArtifact,
 
 
 class TrainPipeline:
-    def __init__(self):
+    def __init__(self, stage_listener: Optional[Callable[[str], None]] = None):
+        """
+        :param stage_listener: Optional callback receiving the name of every stage as it starts
+        """
+        self.stage_listener = stage_listener
         self.data_ingestion_config = DataIngestionConfig()
         self.data_validation_config = DataValidationConfig()
         self.data_transformation_config = DataTransformationConfig()
@@ -133,25 +141,50 @@ class TrainPipeline:
 
     
 
-    def run_pipeline(self, ) -> None:
+    def notify_stage(self, stage: str) -> None:
+        """
+        Reports the stage about to start to the stage listener, if any
+        """
+        logging.info(f"Training pipeline stage: {stage}")
+        if self.stage_listener is not None:
+            self.stage_listener(stage)
+
+    @contextmanager
+    def stage(self, stage: str):
+        """
+        Reports a stage as it starts and traces it as a span of the training run
+        """
+        self.notify_stage(stage)
+        with tracer.span(f"training.{stage}"):
+            yield
+
+    def run_pipeline(self, ) -> Optional[ModelPusherArtifact]:
         """
         This method of TrainPipeline class is responsible for running complete pipeline
+        Returns the model pusher artifact, None when the trained model was not accepted
         """
         try:
-            data_ingestion_artifact = self.start_data_ingestion()
-            data_validation_artifact = self.start_data_validation(data_ingestion_artifact=data_ingestion_artifact)
-            data_transformation_artifact = self.start_data_transformation(
-                data_ingestion_artifact=data_ingestion_artifact, data_validation_artifact=data_validation_artifact)
-            model_trainer_artifact = self.start_model_trainer(data_transformation_artifact=data_transformation_artifact)
-            model_evaluation_artifact = self.start_model_evaluation(data_ingestion_artifact=data_ingestion_artifact,                                  
-            model_trainer_artifact=model_trainer_artifact)
+            with tracer.trace("training_pipeline", always_keep=True):
+                with self.stage("data_ingestion"):
+                    data_ingestion_artifact = self.start_data_ingestion()
+                with self.stage("data_validation"):
+                    data_validation_artifact = self.start_data_validation(data_ingestion_artifact=data_ingestion_artifact)
+                with self.stage("data_transformation"):
+                    data_transformation_artifact = self.start_data_transformation(
+                        data_ingestion_artifact=data_ingestion_artifact, data_validation_artifact=data_validation_artifact)
+                with self.stage("model_trainer"):
+                    model_trainer_artifact = self.start_model_trainer(data_transformation_artifact=data_transformation_artifact)
+                with self.stage("model_evaluation"):
+                    model_evaluation_artifact = self.start_model_evaluation(data_ingestion_artifact=data_ingestion_artifact,
+                                                                            model_trainer_artifact=model_trainer_artifact)
+
+                if not model_evaluation_artifact.is_model_accepted:
+                    logging.info(f"Model not accepted.")
+                    return None
+                with self.stage("model_pusher"):
+                    model_pusher_artifact = self.start_model_pusher(model_evaluation_artifact=model_evaluation_artifact)
+                return model_pusher_artifact
 
-            
-            if not model_evaluation_artifact.is_model_accepted:
-                logging.info(f"Model not accepted.")
-                return None
-            model_pusher_artifact = self.start_model_pusher(model_evaluation_artifact=model_evaluation_artifact)
-            
         except Exception as e:
             raise MyException(e, sys)
             
@@ -0,0 +1,111 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from dataclasses import asdict, dataclass
+from typing import Dict, List
+
+from src.constants import (SERVING_FORBIDDEN_IMPORTS, SERVING_IMPORT_TIME_BUDGET_SECONDS,
+                           SERVING_IMPORT_TIME_BUDGET_SECONDS_KEY)
+
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+@dataclass
+class ImportTiming:
+    module: str
+    self_seconds: float
+    cumulative_seconds: float
+    depth: int
+
+
+def measure_imports(module: str = "app", python: str = sys.executable) -> List[ImportTiming]:
+    """
+    Imports module in a fresh interpreter with -X importtime and returns the cost of every module it pulled in,
+    in import order. A fresh process is the only way to see the cold start cost, modules already imported
+    here would not be timed again.
+    """
+    completed = subprocess.run([python, "-X", "importtime", "-c", f"import {module}"],
+                               capture_output=True, text=True, cwd=os.getcwd())
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+    timings = []
+    for line in completed.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            timings.append(ImportTiming(module=name, self_seconds=int(self_us) / 1e6,
+                                        cumulative_seconds=int(cumulative_us) / 1e6,
+                                        depth=(len(indent) - 1) // 2))
+    return timings
+
+
+def build_import_report(timings: List[ImportTiming], budget_seconds: float = SERVING_IMPORT_TIME_BUDGET_SECONDS,
+                        forbidden_imports: List[str] = SERVING_FORBIDDEN_IMPORTS, top: int = 20) -> dict:
+    """
+    Summarises import timings: total, slowest modules by cumulative and by own time, cost per top level package,
+    and the budget check. Importing any forbidden module (or a submodule of one) fails the check as well.
+    """
+    total_seconds = sum(timing.self_seconds for timing in timings)
+    by_package: Dict[str, float] = {}
+    for timing in timings:
+        package = timing.module.split(".")[0]
+        by_package[package] = by_package.get(package, 0.0) + timing.self_seconds
+    forbidden_imported = sorted({timing.module for timing in timings
+                                 for forbidden in forbidden_imports
+                                 if timing.module == forbidden or timing.module.startswith(forbidden + ".")})
+    return {
+        "total_seconds": total_seconds,
+        "budget_seconds": budget_seconds,
+        "modules": len(timings),
+        "within_budget": total_seconds <= budget_seconds and not forbidden_imported,
+        "forbidden_imported": forbidden_imported,
+        "top_cumulative": [asdict(timing) for timing in
+                           sorted(timings, key=lambda timing: timing.cumulative_seconds, reverse=True)[:top]],
+        "top_self": [asdict(timing) for timing in
+                     sorted(timings, key=lambda timing: timing.self_seconds, reverse=True)[:top]],
+        "by_package": dict(sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]),
+    }
+
+
+def format_import_report(report: dict) -> str:
+    lines = [f"Imported {report['modules']} modules in {report['total_seconds']:.3f}s "
+             f"(budget {report['budget_seconds']:.3f}s): {'OK' if report['within_budget'] else 'OVER BUDGET'}"]
+    if report["forbidden_imported"]:
+        lines.append(f"Forbidden modules imported: {', '.join(report['forbidden_imported'])}")
+    lines.append("")
+    lines.append(f"{'cumulative':>10}  {'self':>8}  module")
+    for timing in report["top_cumulative"]:
+        lines.append(f"{timing['cumulative_seconds']:>10.4f}  {timing['self_seconds']:>8.4f}  "
+                     f"{'  ' * timing['depth']}{timing['module']}")
+    lines.append("")
+    lines.append(f"{'seconds':>10}  package")
+    for package, seconds in report["by_package"].items():
+        lines.append(f"{seconds:>10.4f}  {package}")
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    """
+    Prints the import time report of the serving entry point, exits with 1 when it is over budget.
+    Run from the project root: python -m src.utils.import_report
+    """
+    parser = argparse.ArgumentParser(description="Report the import time of the serving process")
+    parser.add_argument("--module", default="app", help="Module to import, app.py by default")
+    parser.add_argument("--budget", type=float,
+                        default=float(os.getenv(SERVING_IMPORT_TIME_BUDGET_SECONDS_KEY,
+                                                SERVING_IMPORT_TIME_BUDGET_SECONDS)),
+                        help="Import time budget in seconds")
+    parser.add_argument("--top", type=int, default=20, help="Number of modules listed")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = build_import_report(measure_imports(args.module), budget_seconds=args.budget, top=args.top)
+    print(json.dumps(report, indent=2) if args.json else format_import_report(report))
+    return 0 if report["within_budget"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,7 @@ import dill
 import yaml
 from pandas import DataFrame
 
+from src.constants import MODEL_FEATURE_COLUMNS
 from src.exception import MyException
 from src.logger import logging
 
@@ -86,6 +87,32 @@ def save_object(file_path: str, obj: object) -> None:
         raise MyException(e, sys) from e
 
 
+def engineer_vehicle_features(df: DataFrame) -> DataFrame:
+    """
+    Applies the feature engineering of DataTransformation (gender mapping, dummy columns, renaming)
+    to raw customer rows and returns the model features in the trained column order.
+    Dummy columns are derived from explicit category values rather than pd.get_dummies, so the result
+    does not depend on which categories happen to be present in a chunk of rows.
+    df: pandas DataFrame with the raw columns of the collection
+    """
+    try:
+        features = DataFrame(index=df.index)
+        gender = df["Gender"].map({'Female': 0, 'Male': 1})
+        if gender.isna().any():
+            raise ValueError("Gender must be either 'Female' or 'Male'")
+        features["Gender"] = gender.astype(int)
+        for column in ["Age", "Driving_License", "Region_Code", "Previously_Insured",
+                       "Annual_Premium", "Policy_Sales_Channel", "Vintage"]:
+            features[column] = df[column]
+        # pd.get_dummies(drop_first=True) drops "1-2 Year" and "No", the first categories in sort order
+        features["Vehicle_Age_lt_1_Year"] = (df["Vehicle_Age"] == "< 1 Year").astype(int)
+        features["Vehicle_Age_gt_2_Years"] = (df["Vehicle_Age"] == "> 2 Years").astype(int)
+        features["Vehicle_Damage_Yes"] = (df["Vehicle_Damage"] == "Yes").astype(int)
+        return features[MODEL_FEATURE_COLUMNS]
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
 # def drop_columns(df: DataFrame, cols: list)-> DataFrame:
 
 #     """
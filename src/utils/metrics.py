@@ -0,0 +1,184 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Latency buckets in seconds, from 50 microseconds up to 10 seconds
+DEFAULT_LATENCY_BUCKETS: Tuple[float, ...] = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                                              0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (name + '="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+               for name, value in labels.items())
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+
+class Counter:
+    """
+    Monotonic counter, optionally split by the value of one label.
+    """
+
+    def __init__(self, name: str, documentation: str, label_name: str = None):
+        self.name = name
+        self.documentation = documentation
+        self.label_name = label_name
+        self._values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_value: str = "", amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0.0) + amount
+
+    def value(self, label_value: str = "") -> float:
+        with self._lock:
+            return self._values.get(label_value, 0.0)
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        if not values and not self.label_name:
+            values = {"": 0.0}
+        for label_value, value in sorted(values.items()):
+            labels = {self.label_name: label_value} if self.label_name else {}
+            lines.append(f"{self.name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    """
+    Gauge read from a callback at scrape time, e.g. a queue depth.
+    """
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], float]):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+
+    def expose(self) -> List[str]:
+        try:
+            value = float(self.read())
+        except Exception:
+            value = float("nan")
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge",
+                f"{self.name} {_format_value(value)}"]
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram, optionally split by the value of one label.
+    Observing costs one bisect and one short critical section.
+    """
+
+    def __init__(self, name: str, documentation: str, label_name: str = None,
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_name = label_name
+        self.buckets = tuple(buckets)
+        # label value -> [per bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, label_value: str = "") -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, label_value: str = ""):
+        """
+        Observes the wall time spent in the with block.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, label_value)
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {label_value: (list(counts), total, count)
+                      for label_value, (counts, total, count) in self._series.items()}
+        for label_value, (counts, total, count) in sorted(series.items()):
+            labels = {self.label_name: label_value} if self.label_name else {}
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                bucket_labels = dict(labels, le=_format_value(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics exposed together in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, label_name: str = None) -> Counter:
+        return self._register(Counter(name, documentation, label_name))
+
+    def histogram(self, name: str, documentation: str, label_name: str = None,
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, label_name, buckets))
+
+    def gauge(self, name: str, documentation: str, read: Callable[[], float]) -> Gauge:
+        """
+        Registers a gauge, replacing any previous one of the same name so a new callback always wins.
+        """
+        gauge = Gauge(name, documentation, read)
+        with self._lock:
+            self._metrics[name] = gauge
+        return gauge
+
+    def expose(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+
+# Process wide registry and the metrics of the serving path
+metrics = MetricsRegistry()
+prediction_stage_seconds = metrics.histogram(
+    "vehicle_prediction_stage_seconds", "Time spent per stage of the prediction path.", label_name="stage")
+prediction_batch_rows = metrics.histogram(
+    "vehicle_prediction_batch_rows", "Number of rows scored per model call.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384))
+model_loads_total = metrics.counter(
+    "vehicle_model_loads_total", "Number of models made resident in memory.")
+inference_rejected_total = metrics.counter(
+    "vehicle_inference_executor_rejected_total", "Requests shed because inference was saturated.")
+prediction_errors_total = metrics.counter(
+    "vehicle_prediction_errors_total", "Number of failed prediction requests.", label_name="route")
+forest_rows_scored_total = metrics.counter(
+    "vehicle_forest_rows_scored_total", "Number of rows scored by the early-exit forest vote.")
+forest_trees_evaluated_total = metrics.counter(
+    "vehicle_forest_trees_evaluated_total", "Number of trees evaluated by the early-exit forest vote, "
+    "divided by vehicle_forest_rows_scored_total gives the trees evaluated per row.")
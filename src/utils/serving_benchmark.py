@@ -0,0 +1,372 @@
+import argparse
+import asyncio
+import json
+import logging as std_logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # not available on Windows, peak RSS is not reported there
+    resource = None
+
+from src.constants import (BENCHMARK_DATA_FILE_PATH, BENCHMARK_DIR, BENCHMARK_MODEL_FILE_NAME,
+                           MODEL_TRAINER_MIN_SAMPLES_LEAF, MODEL_TRAINER_MIN_SAMPLES_SPLIT,
+                           MIN_SAMPLES_SPLIT_CRITERION, MIN_SAMPLES_SPLIT_MAX_DEPTH, MIN_SAMPLES_SPLIT_RANDOM_STATE,
+                           SCHEMA_FILE_PATH, TARGET_COLUMN)
+from src.entity.estimator import MyModel
+from src.entity.model_artifact import ARRAY_MODEL_MAGIC, read_array_model
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import engineer_vehicle_features, load_object, read_yaml_file, save_object
+
+FORM_ENDPOINT = "form"
+JSON_ENDPOINT = "json"
+BATCH_ENDPOINT = "batch"
+CSV_ENDPOINT = "csv"
+ARROW_ENDPOINT = "arrow"
+CONCURRENCY_MODE = "concurrency"
+RATE_MODE = "rate"
+
+
+@dataclass
+class BenchmarkScenario:
+    endpoint: str
+    mode: str
+    # Number of clients for the concurrency mode, requests per second for the rate mode
+    level: float
+    duration_seconds: float
+
+
+@dataclass
+class BenchmarkResult:
+    endpoint: str
+    mode: str
+    level: float
+    duration_seconds: float
+    requests: int
+    errors: int
+    status_codes: Dict[str, int]
+    rows_per_request: int
+    throughput_rps: float
+    rows_per_second: float
+    latency_ms: Dict[str, float]
+    rss_mb: Optional[float]
+    peak_rss_mb: Optional[float]
+
+
+def current_rss_mb() -> Optional[float]:
+    """
+    Resident set size of this process, read from /proc on Linux.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def load_benchmark_rows(data_file_path: str = BENCHMARK_DATA_FILE_PATH, rows: int = 5000,
+                        seed: int = 42) -> pd.DataFrame:
+    """
+    Samples realistic raw customer rows from the exported collection.
+    """
+    try:
+        data = pd.read_csv(data_file_path)
+        return data.sample(n=min(rows, len(data)), random_state=seed).reset_index(drop=True)
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def fit_benchmark_model(data: pd.DataFrame, n_estimators: int) -> MyModel:
+    """
+    Fits a stand-in model with the preprocessing and hyperparameters of the training pipeline,
+    for machines without a trained model at hand. The training stack is only imported here.
+    """
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+    try:
+        schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
+        preprocessor = Pipeline(steps=[("Preprocessor", ColumnTransformer(
+            transformers=[("StandardScaler", StandardScaler(), schema_config["num_features"]),
+                          ("MinMaxScaler", MinMaxScaler(), schema_config["mm_columns"])],
+            remainder="passthrough"))])
+        features = engineer_vehicle_features(data)
+        model = RandomForestClassifier(n_estimators=n_estimators, min_samples_split=MODEL_TRAINER_MIN_SAMPLES_SPLIT,
+                                       min_samples_leaf=MODEL_TRAINER_MIN_SAMPLES_LEAF,
+                                       max_depth=MIN_SAMPLES_SPLIT_MAX_DEPTH, criterion=MIN_SAMPLES_SPLIT_CRITERION,
+                                       random_state=MIN_SAMPLES_SPLIT_RANDOM_STATE)
+        model.fit(preprocessor.fit_transform(features), data[TARGET_COLUMN])
+        my_model = MyModel(preprocessing_object=preprocessor, trained_model_object=model)
+        my_model.fuse_preprocessing()
+        return my_model
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def load_benchmark_model(model_file_path: Optional[str], data: pd.DataFrame, n_estimators: int) -> MyModel:
+    """
+    Loads a locally stored model, a pickled MyModel or an array model file.
+    When there is none yet a stand-in model is fitted and saved there, so later runs score the same model.
+    Without a path the stand-in model only lives in a temporary directory for the run.
+    """
+    try:
+        if model_file_path is None:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                return load_benchmark_model(os.path.join(tmp_dir, BENCHMARK_MODEL_FILE_NAME), data, n_estimators)
+        if not os.path.exists(model_file_path):
+            logging.warning(f"No model at {model_file_path}, fitting a stand-in model with {n_estimators} trees")
+            save_object(model_file_path, fit_benchmark_model(data, n_estimators))
+        with open(model_file_path, "rb") as file_obj:
+            is_array_model = file_obj.read(len(ARRAY_MODEL_MAGIC)) == ARRAY_MODEL_MAGIC
+        return read_array_model(model_file_path) if is_array_model else load_object(model_file_path)
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def build_request_factory(endpoint: str, data: pd.DataFrame, batch_size: int) -> Tuple[Callable[[int], dict], int]:
+    """
+    Prepares every request body up front so the timed loop only sends them.
+    Returns a function giving the httpx request arguments of the n-th request, and the rows per request.
+    """
+    features = engineer_vehicle_features(data)
+    records = features.to_dict(orient="records")
+    if endpoint == FORM_ENDPOINT:
+        bodies = [{"method": "POST", "url": "/", "data": {column: str(value) for column, value in record.items()}}
+                  for record in records]
+        rows_per_request = 1
+    elif endpoint == JSON_ENDPOINT:
+        bodies = [{"method": "POST", "url": "/predict", "json": record} for record in records]
+        rows_per_request = 1
+    elif endpoint == BATCH_ENDPOINT:
+        bodies = [{"method": "POST", "url": "/predict/batch", "json": {"records": records[start:start + batch_size]}}
+                  for start in range(0, len(records) - batch_size + 1, batch_size)]
+        rows_per_request = batch_size
+    elif endpoint == CSV_ENDPOINT:
+        raw = data.drop(columns=[TARGET_COLUMN], errors="ignore")
+        bodies = [{"method": "POST", "url": "/predict/csv",
+                   "content": raw.iloc[start:start + batch_size].to_csv(index=False).encode(),
+                   "headers": {"content-type": "text/csv"}}
+                  for start in range(0, len(raw) - batch_size + 1, batch_size)]
+        rows_per_request = batch_size
+    elif endpoint == ARROW_ENDPOINT:
+        import pyarrow as pa
+
+        bodies = []
+        for start in range(0, len(features) - batch_size + 1, batch_size):
+            table = pa.Table.from_pandas(features.iloc[start:start + batch_size], preserve_index=False)
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            bodies.append({"method": "POST", "url": "/predict/arrow", "content": sink.getvalue().to_pybytes(),
+                           "headers": {"content-type": "application/vnd.apache.arrow.stream"}})
+        rows_per_request = batch_size
+    else:
+        raise ValueError(f"Unknown endpoint: {endpoint}")
+    if not bodies:
+        raise ValueError(f"Not enough rows for one {endpoint} request of {batch_size} rows")
+    return (lambda n: bodies[n % len(bodies)]), rows_per_request
+
+
+async def _send(client, request: dict, latencies: List[float], statuses: Counter, started_at: float) -> None:
+    try:
+        response = await client.request(**request)
+        status = str(response.status_code)
+    except Exception as e:
+        status = type(e).__name__
+    if status.startswith("2"):
+        latencies.append(time.perf_counter() - started_at)
+    statuses[status] += 1
+
+
+async def run_concurrency_scenario(client, make_request: Callable[[int], dict], concurrency: int,
+                                   duration_seconds: float, latencies: List[float], statuses: Counter) -> None:
+    """
+    Closed loop: each of the concurrency clients sends its next request as soon as the previous one returned.
+    """
+    deadline = time.perf_counter() + duration_seconds
+
+    async def client_loop(client_index: int) -> None:
+        n = client_index
+        while time.perf_counter() < deadline:
+            await _send(client, make_request(n), latencies, statuses, time.perf_counter())
+            n += concurrency
+
+    await asyncio.gather(*(client_loop(index) for index in range(concurrency)))
+
+
+async def run_rate_scenario(client, make_request: Callable[[int], dict], rate: float,
+                            duration_seconds: float, latencies: List[float], statuses: Counter) -> None:
+    """
+    Open loop: requests are sent on a fixed schedule whatever the response times.
+    Latency is measured from the scheduled send time, so a server falling behind is not hidden
+    by requests the load generator sends late.
+    """
+    start = time.perf_counter()
+    tasks = []
+    n = 0
+    while True:
+        scheduled_at = start + n / rate
+        if scheduled_at >= start + duration_seconds:
+            break
+        delay = scheduled_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(_send(client, make_request(n), latencies, statuses, scheduled_at)))
+        n += 1
+    await asyncio.gather(*tasks)
+
+
+def summarise(scenario: BenchmarkScenario, elapsed_seconds: float, latencies: List[float], statuses: Counter,
+              rows_per_request: int) -> BenchmarkResult:
+    requests = sum(statuses.values())
+    succeeded = len(latencies)
+    latency_ms = {}
+    if latencies:
+        values = np.asarray(latencies) * 1000
+        latency_ms = {"mean": float(values.mean()), "p50": float(np.percentile(values, 50)),
+                      "p95": float(np.percentile(values, 95)), "p99": float(np.percentile(values, 99)),
+                      "max": float(values.max())}
+    return BenchmarkResult(endpoint=scenario.endpoint, mode=scenario.mode, level=scenario.level,
+                           duration_seconds=elapsed_seconds, requests=requests, errors=requests - succeeded,
+                           status_codes=dict(statuses), rows_per_request=rows_per_request,
+                           throughput_rps=succeeded / elapsed_seconds,
+                           rows_per_second=succeeded * rows_per_request / elapsed_seconds,
+                           latency_ms=latency_ms, rss_mb=current_rss_mb(), peak_rss_mb=peak_rss_mb())
+
+
+async def run_benchmark(app_module, model: MyModel, data: pd.DataFrame, scenarios: List[BenchmarkScenario],
+                        batch_size: int, warmup_requests: int = 20) -> List[BenchmarkResult]:
+    """
+    Drives the FastAPI app in-process through httpx's ASGI transport, no sockets involved,
+    with its lifespan (model holder, inference workers, batcher) running as in production.
+    The model registry poller is left off, it would swap the benchmarked model for the S3 champion.
+    """
+    import httpx
+
+    app_module.predictor_config.registry_poll_interval_seconds = 0
+    app_module.model_holder.set_model(model)
+    results = []
+    async with app_module.app.router.lifespan_context(app_module.app):
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            for scenario in scenarios:
+                make_request, rows_per_request = build_request_factory(scenario.endpoint, data, batch_size)
+                for n in range(warmup_requests):
+                    await client.request(**make_request(n))
+
+                latencies, statuses = [], Counter()
+                start = time.perf_counter()
+                if scenario.mode == CONCURRENCY_MODE:
+                    await run_concurrency_scenario(client, make_request, int(scenario.level),
+                                                   scenario.duration_seconds, latencies, statuses)
+                else:
+                    await run_rate_scenario(client, make_request, scenario.level,
+                                            scenario.duration_seconds, latencies, statuses)
+                result = summarise(scenario, time.perf_counter() - start, latencies, statuses, rows_per_request)
+                results.append(result)
+                print(format_result(result), flush=True)
+    return results
+
+
+def format_result(result: BenchmarkResult) -> str:
+    latency = result.latency_ms
+    return (f"{result.endpoint:>6} {result.mode:>11}={result.level:<7g} {result.requests:>7} req "
+            f"{result.errors:>5} err {result.throughput_rps:>9.1f} req/s {result.rows_per_second:>10.1f} rows/s  "
+            f"p50={latency.get('p50', float('nan')):.2f} p95={latency.get('p95', float('nan')):.2f} "
+            f"p99={latency.get('p99', float('nan')):.2f} ms  rss={result.rss_mb or float('nan'):.0f}MB")
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: List[str] = None) -> int:
+    """
+    Runs the serving benchmark and saves the results as JSON.
+    Run from the project root: python -m src.utils.serving_benchmark
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the prediction endpoints of the FastAPI app")
+    parser.add_argument("--model", default=None,
+                        help="Local model file, pickled MyModel or array model (fitted there when missing), "
+                             "a temporary stand-in model by default")
+    parser.add_argument("--data", default=BENCHMARK_DATA_FILE_PATH, help="CSV the request rows are sampled from")
+    parser.add_argument("--rows", type=int, default=5000, help="Number of rows sampled")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--n-estimators", type=int, default=200, help="Trees of a fitted stand-in model")
+    parser.add_argument("--endpoints", nargs="+", default=[FORM_ENDPOINT, JSON_ENDPOINT, BATCH_ENDPOINT, CSV_ENDPOINT],
+                        choices=[FORM_ENDPOINT, JSON_ENDPOINT, BATCH_ENDPOINT, CSV_ENDPOINT, ARROW_ENDPOINT],
+                        help="Endpoints benchmarked, arrow needs pyarrow")
+    parser.add_argument("--concurrency", type=int, nargs="*", default=[1, 16], help="Closed loop client counts")
+    parser.add_argument("--rates", type=float, nargs="*", default=[50.0, 200.0],
+                        help="Open loop request rates per second")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per scenario")
+    parser.add_argument("--batch-size", type=int, default=100, help="Rows per batch and CSV request")
+    parser.add_argument("--output", default=None, help="JSON result file, under benchmarks/ by default")
+    parser.add_argument("--log-level", default="WARNING", help="Log level while benchmarking")
+    args = parser.parse_args(argv)
+
+    # Per-request INFO logging would dominate the measurements
+    std_logging.getLogger().setLevel(args.log_level)
+    for handler in std_logging.getLogger().handlers:
+        handler.setLevel(args.log_level)
+
+    data = load_benchmark_rows(args.data, rows=args.rows, seed=args.seed)
+    model = load_benchmark_model(args.model, data, args.n_estimators)
+    scenarios = [BenchmarkScenario(endpoint, CONCURRENCY_MODE, concurrency, args.duration)
+                 for endpoint in args.endpoints for concurrency in args.concurrency]
+    scenarios += [BenchmarkScenario(endpoint, RATE_MODE, rate, args.duration)
+                  for endpoint in args.endpoints for rate in args.rates]
+
+    import app as app_module
+
+    rss_before = current_rss_mb()
+    results = asyncio.run(run_benchmark(app_module, model, data, scenarios, args.batch_size))
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "model": {"path": args.model, "type": str(model), "inference_backend": getattr(model, "inference_backend", None)},
+        "config": {key: value for key, value in vars(args).items() if key not in ("output",)},
+        "rss_mb_before": rss_before,
+        "results": [asdict(result) for result in results],
+    }
+    output = args.output or os.path.join(BENCHMARK_DIR, f"benchmark_{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as file_obj:
+        json.dump(report, file_obj, indent=2)
+    print(f"Results saved to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from src.constants import TRACING_TRACE_ID_HEADER
+from src.entity.config_entity import TracingConfig
+from src.logger import logging
+from src.utils.metrics import metrics
+
+traces_kept_total = metrics.counter(
+    "vehicle_traces_kept_total", "Traces kept in the trace buffer, by reason (slow, sampled or always).",
+    label_name="reason")
+
+
+class Span:
+    """
+    One timed operation of a trace. Times come from time.perf_counter, offsets are computed on export.
+    """
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start", "end", "attributes", "error")
+
+    def __init__(self, trace: "Trace", span_id: int, parent_id: Optional[int], name: str, attributes: dict):
+        self.trace = trace
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.error = None
+        self.start = time.perf_counter()
+        self.end = None
+
+    def set(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        return (self.end - self.start) * 1000 if self.end is not None else None
+
+
+class Trace:
+    """
+    Spans recorded for one request, model load or training run.
+    """
+
+    __slots__ = ("trace_id", "started_at", "spans", "always_keep", "max_spans", "dropped_spans", "_ids")
+
+    def __init__(self, always_keep: bool = False, max_spans: int = 256):
+        self.trace_id = os.urandom(8).hex()
+        self.started_at = time.time()
+        self.spans: List[Span] = []
+        self.always_keep = always_keep
+        self.max_spans = max_spans
+        self.dropped_spans = 0
+        self._ids = itertools.count(1)
+
+    def new_span(self, name: str, parent_id: Optional[int], attributes: dict) -> Span:
+        """
+        Starts a span, which is timed but not recorded once the trace holds max_spans spans.
+        """
+        span = Span(self, next(self._ids), parent_id, name, attributes)
+        if len(self.spans) < self.max_spans:
+            self.spans.append(span)
+        else:
+            self.dropped_spans += 1
+        return span
+
+    def to_dict(self, root: Span, kept: str) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": root.name,
+            "started_at": datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(),
+            "duration_ms": root.duration_ms,
+            "kept": kept,
+            "attributes": root.attributes,
+            "error": root.error,
+            "dropped_spans": self.dropped_spans,
+            "spans": [{"span_id": span.span_id, "parent_id": span.parent_id, "name": span.name,
+                       "offset_ms": (span.start - root.start) * 1000, "duration_ms": span.duration_ms,
+                       "attributes": span.attributes, "error": span.error}
+                      for span in sorted(self.spans, key=lambda span: span.start) if span is not root],
+        }
+
+
+# Innermost open span of the running request, copied into worker threads along with the context
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+class _SpanScope:
+    """
+    Context manager making a span the current one while its block runs.
+    """
+
+    __slots__ = ("span", "on_end", "_token")
+
+    def __init__(self, span: Span, on_end=None):
+        self.span = span
+        self.on_end = on_end
+        self._token = None
+
+    def __enter__(self) -> Span:
+        self._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.span.end = time.perf_counter()
+        if exc_type is not None:
+            self.span.error = exc_type.__name__
+        _current_span.reset(self._token)
+        if self.on_end is not None:
+            self.on_end(self.span)
+        return False
+
+
+class _NoSpan:
+    """
+    Stands for a span outside of any trace, so untraced code pays one context variable lookup.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+    def set(self, key: str, value) -> None:
+        pass
+
+
+NO_SPAN = _NoSpan()
+
+
+class Tracer:
+    """
+    In-process span tracer, so individual slow requests can be inspected without a tracing service.
+
+    Every request (model load, training run) is recorded as a trace of nested spans at the cost of a few
+    perf_counter calls. The keep decision is taken when the trace ends: traces slower than
+    slow_threshold_ms are always kept, the others with probability sample_rate. Kept traces go to a ring
+    buffer of the last buffer_size traces, served by the debug endpoint, and are appended to a JSON lines
+    file when export_file_path is set.
+    """
+
+    def __init__(self, tracing_config: TracingConfig = TracingConfig()):
+        """
+        :param tracing_config: Configuration of the sampling, slow threshold, buffer size and export file
+        """
+        self.tracing_config = tracing_config
+        self._buffer: deque = deque(maxlen=tracing_config.buffer_size)
+        self._export_lock = threading.Lock()
+        self._export_file = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.tracing_config.enabled
+
+    def span(self, name: str, **attributes):
+        """
+        Times the with block as a child of the current span, does nothing outside of a trace.
+        """
+        parent = _current_span.get()
+        if parent is None:
+            return NO_SPAN
+        return _SpanScope(parent.trace.new_span(name, parent.span_id, attributes))
+
+    def trace(self, name: str, always_keep: bool = False, **attributes):
+        """
+        Starts a new trace with the with block as its root span, or a child span when a trace is already open.
+
+        :param name: Name of the root span
+        :param always_keep: Keep the trace whatever its duration, for rare operations such as model loads
+        """
+        if _current_span.get() is not None:
+            return self.span(name, **attributes)
+        if not self.enabled:
+            return NO_SPAN
+        trace = Trace(always_keep=always_keep, max_spans=self.tracing_config.max_spans_per_trace)
+        return _SpanScope(trace.new_span(name, None, attributes), on_end=self._finish)
+
+    def collect(self, name: str, **attributes):
+        """
+        Records the with block into a detached trace that is never kept on its own, for work shared by
+        several requests. Its spans are copied into each of them with attach.
+        """
+        trace = Trace(max_spans=self.tracing_config.max_spans_per_trace)
+        return _SpanScope(trace.new_span(name, None, attributes))
+
+    @staticmethod
+    def attach(parent: Span, collected: Span) -> None:
+        """
+        Copies the spans of a collected trace under parent, in parent's trace.
+        """
+        trace = parent.trace
+        span_ids = {None: parent.span_id}
+        for span in sorted(collected.trace.spans, key=lambda span: span.start):
+            parent_id = span_ids.get(span.parent_id, parent.span_id)
+            copy = trace.new_span(span.name, parent_id, dict(span.attributes))
+            copy.start, copy.end, copy.error = span.start, span.end, span.error
+            span_ids[span.span_id] = copy.span_id
+
+    def _finish(self, root: Span) -> None:
+        trace = root.trace
+        if trace.always_keep:
+            kept = "always"
+        elif root.duration_ms >= self.tracing_config.slow_threshold_ms:
+            kept = "slow"
+        elif random.random() < self.tracing_config.sample_rate:
+            kept = "sampled"
+        else:
+            return
+        record = trace.to_dict(root, kept)
+        self._buffer.append(record)
+        traces_kept_total.inc(kept)
+        if self.tracing_config.export_file_path:
+            self._export(record)
+
+    def _export(self, record: dict) -> None:
+        """
+        Appends a kept trace to the export file as one JSON line. Only kept traces are written,
+        a small fraction of the requests, and a failing write never fails the request.
+        """
+        try:
+            line = json.dumps(record, default=str) + "\n"
+            with self._export_lock:
+                if self._export_file is None:
+                    export_dir = os.path.dirname(self.tracing_config.export_file_path)
+                    if export_dir:
+                        os.makedirs(export_dir, exist_ok=True)
+                    self._export_file = open(self.tracing_config.export_file_path, "a", encoding="utf-8")
+                self._export_file.write(line)
+                self._export_file.flush()
+        except Exception as e:
+            logging.error(f"Exporting trace {record['trace_id']} failed: {e}")
+
+    def recent(self, limit: int = 50, min_duration_ms: float = 0.0, slowest: bool = False) -> List[dict]:
+        """
+        Returns kept traces from the ring buffer, newest first or slowest first.
+        """
+        records = [record for record in reversed(self._buffer)
+                   if record["duration_ms"] is not None and record["duration_ms"] >= min_duration_ms]
+        if slowest:
+            records.sort(key=lambda record: record["duration_ms"], reverse=True)
+        return records[:limit]
+
+
+# Process wide tracer
+tracer = Tracer()
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening one trace per HTTP request and returning its id in a response header.
+    """
+
+    def __init__(self, app, request_tracer: Tracer = None, trace_id_header: str = TRACING_TRACE_ID_HEADER):
+        """
+        :param app: ASGI application to trace
+        :param request_tracer: Tracer recording the requests, the process wide one by default
+        :param trace_id_header: Response header carrying the trace id
+        """
+        self.app = app
+        self.tracer = request_tracer or tracer
+        self.trace_id_header = trace_id_header.lower().encode("latin-1")
+        self.excluded_paths = self.tracer.tracing_config.excluded_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.tracer.enabled or scope["path"].startswith(self.excluded_paths):
+            return await self.app(scope, receive, send)
+
+        with self.tracer.trace(f"{scope['method']} {scope['path']}") as root:
+            async def send_with_trace_id(message):
+                if message["type"] == "http.response.start":
+                    root.set("status", message["status"])
+                    message = dict(message, headers=list(message.get("headers", [])) +
+                                   [(self.trace_id_header, root.trace.trace_id.encode("latin-1"))])
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace_id)
+
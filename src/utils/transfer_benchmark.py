@@ -0,0 +1,181 @@
+import argparse
+import json
+import logging as std_logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import List, Optional
+
+from src.constants import (AWS_ACCESS_KEY_ID_ENV_KEY, AWS_SECRET_ACCESS_KEY_ENV_KEY, BENCHMARK_DIR, REGION_NAME,
+                           S3_STORAGE_BACKEND)
+from src.entity.config_entity import ModelCacheConfig, S3TransferConfig, StorageConfig
+from src.utils.serving_benchmark import git_commit
+
+MB = 1024 * 1024
+SINGLE_GET_DOWNLOAD = "single_get"
+RANGED_DOWNLOAD = "ranged_parallel"
+REVALIDATION = "revalidation"
+UPLOAD = "multipart_upload"
+
+
+@dataclass
+class TransferResult:
+    operation: str
+    size_mb: float
+    part_size_mb: float
+    concurrency: int
+    seconds: float
+    throughput_mb_s: float
+
+
+def start_local_s3() -> Optional[object]:
+    """
+    Starts a moto S3 server on a free local port and points boto3 at it, returns None when moto is not installed.
+    """
+    try:
+        from moto.server import ThreadedMotoServer
+    except ImportError:
+        return None
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    os.environ["AWS_ENDPOINT_URL"] = f"http://{host}:{port}"
+    return server
+
+
+def write_random_file(file_path: str, size_mb: float) -> None:
+    with open(file_path, "wb") as file_obj:
+        remaining = int(size_mb * MB)
+        while remaining > 0:
+            chunk = os.urandom(min(remaining, 16 * MB))
+            file_obj.write(chunk)
+            remaining -= len(chunk)
+
+
+def timed(operation: str, size_mb: float, transfer_config: S3TransferConfig, run) -> TransferResult:
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+    return TransferResult(operation, size_mb, transfer_config.part_size_bytes / MB, transfer_config.max_concurrency,
+                          seconds, size_mb / seconds if seconds > 0 else float("inf"))
+
+
+def run_transfer_benchmark(bucket_name: str, sizes_mb: List[float], part_size_mb: float,
+                           concurrencies: List[int], work_dir: str) -> List[TransferResult]:
+    """
+    Uploads a random artifact of every size, then downloads it with one GET read into memory (the previous
+    read_object path), with ranged parallel GETs into the model cache at every concurrency, and revalidates
+    the cached copy.
+    """
+    from src.cloud_storage.aws_storage import SimpleStorageService
+    from src.cloud_storage.model_cache import ModelCache
+
+    results = []
+    for size_mb in sizes_mb:
+        local_path = os.path.join(work_dir, f"artifact-{size_mb:g}mb.bin")
+        write_random_file(local_path, size_mb)
+        s3_key = f"benchmark/{os.path.basename(local_path)}"
+
+        for concurrency in concurrencies:
+            measured = len(results)
+            transfer_config = S3TransferConfig(part_size_bytes=int(part_size_mb * MB), max_concurrency=concurrency,
+                                               multipart_threshold_bytes=int(part_size_mb * MB))
+            cache_dir = os.path.join(work_dir, f"cache-{concurrency}")
+            storage = SimpleStorageService(model_cache=ModelCache(ModelCacheConfig(cache_dir=cache_dir,
+                                                                                   max_bytes=sys.maxsize)),
+                                           transfer_config=transfer_config,
+                                           storage_config=StorageConfig(backend=S3_STORAGE_BACKEND))
+            results.append(timed(UPLOAD, size_mb, transfer_config,
+                                 lambda: storage.upload_file(local_path, s3_key, bucket_name, remove=False)))
+            if concurrency == concurrencies[0]:
+                results.append(timed(SINGLE_GET_DOWNLOAD, size_mb, transfer_config, lambda: storage.backend.s3_client.get_object(
+                    Bucket=bucket_name, Key=s3_key)["Body"].read()))
+            results.append(timed(RANGED_DOWNLOAD, size_mb, transfer_config,
+                                 lambda: storage.get_cached_file(s3_key, bucket_name)))
+            results.append(timed(REVALIDATION, size_mb, transfer_config,
+                                 lambda: storage.get_cached_file(s3_key, bucket_name)))
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            for result in results[measured:]:
+                print(format_result(result), flush=True)
+        os.remove(local_path)
+    return results
+
+
+def format_result(result: TransferResult) -> str:
+    return (f"{result.operation:>16} {result.size_mb:>8g} MB  part={result.part_size_mb:g}MB "
+            f"concurrency={result.concurrency:<3} {result.seconds:>8.3f} s {result.throughput_mb_s:>9.1f} MB/s")
+
+
+def main(argv: List[str] = None) -> int:
+    """
+    Measures S3 upload and download throughput of SimpleStorageService and saves the results as JSON.
+    Runs against a local moto server unless --endpoint-url points at another S3 stand-in (e.g. MinIO).
+    Run from the project root: python -m src.utils.transfer_benchmark
+    """
+    parser = argparse.ArgumentParser(description="Benchmark S3 artifact transfers of SimpleStorageService")
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[10, 100, 1000], help="Artifact sizes")
+    parser.add_argument("--part-size-mb", type=float, default=16, help="Part size of uploads and ranged GETs")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8], help="Parallel parts in flight")
+    parser.add_argument("--endpoint-url", default=None, help="S3-compatible endpoint, a local moto server by default")
+    parser.add_argument("--bucket", default="transfer-benchmark")
+    parser.add_argument("--output", default=None, help="JSON result file, under benchmarks/ by default")
+    parser.add_argument("--log-level", default="WARNING", help="Log level while benchmarking")
+    args = parser.parse_args(argv)
+
+    std_logging.getLogger().setLevel(args.log_level)
+    for handler in std_logging.getLogger().handlers:
+        handler.setLevel(args.log_level)
+    # The local S3 server logs every request
+    std_logging.getLogger("werkzeug").setLevel(args.log_level)
+
+    server = None
+    if args.endpoint_url:
+        os.environ["AWS_ENDPOINT_URL"] = args.endpoint_url
+    else:
+        os.environ.setdefault(AWS_ACCESS_KEY_ID_ENV_KEY, "benchmark")
+        os.environ.setdefault(AWS_SECRET_ACCESS_KEY_ENV_KEY, "benchmark")
+        server = start_local_s3()
+        if server is None:
+            print("moto is not installed, pass --endpoint-url of an S3-compatible server")
+            return 1
+
+    from src.configuration.aws_connection import S3Client
+
+    s3_client = S3Client().s3_client
+    if args.bucket not in [bucket["Name"] for bucket in s3_client.list_buckets()["Buckets"]]:
+        s3_client.create_bucket(Bucket=args.bucket, **({} if REGION_NAME == "us-east-1" else
+                                {"CreateBucketConfiguration": {"LocationConstraint": REGION_NAME}}))
+
+    work_dir = tempfile.mkdtemp(prefix="transfer-benchmark-")
+    try:
+        results = run_transfer_benchmark(args.bucket, args.sizes_mb, args.part_size_mb, args.concurrency, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        if server is not None:
+            server.stop()
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "endpoint": os.environ["AWS_ENDPOINT_URL"] if server is None else "moto",
+        "config": {key: value for key, value in vars(args).items() if key not in ("output",)},
+        "results": [asdict(result) for result in results],
+    }
+    output = args.output or os.path.join(BENCHMARK_DIR, f"transfer_{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as file_obj:
+        json.dump(report, file_obj, indent=2)
+    print(f"Results saved to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
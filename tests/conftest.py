@@ -0,0 +1,110 @@
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from moto import mock_aws
+from sklearn.ensemble import RandomForestClassifier
+
+from src.components.data_transformation import DataTransformation
+from src.configuration.aws_connection import S3Client
+from src.constants import MODEL_FEATURE_COLUMNS, SCHEMA_FILE_PATH
+from src.entity.estimator import MyModel
+from src.utils.main_utils import read_yaml_file
+
+
+def make_vehicle_features(n_rows: int, seed: int) -> pd.DataFrame:
+    """
+    Engineered vehicle records in MODEL_FEATURE_COLUMNS order, with the value ranges of the training data.
+    """
+    rng = np.random.default_rng(seed)
+    vehicle_age = rng.integers(0, 3, n_rows)
+    return pd.DataFrame({
+        "Gender": rng.integers(0, 2, n_rows),
+        "Age": rng.integers(20, 85, n_rows),
+        "Driving_License": rng.choice([0, 1], n_rows, p=[0.02, 0.98]),
+        "Region_Code": rng.integers(0, 53, n_rows).astype(float),
+        "Previously_Insured": rng.integers(0, 2, n_rows),
+        "Annual_Premium": rng.uniform(2630, 100000, n_rows).round(),
+        "Policy_Sales_Channel": rng.integers(1, 164, n_rows).astype(float),
+        "Vintage": rng.integers(10, 300, n_rows),
+        "Vehicle_Age_lt_1_Year": (vehicle_age == 0).astype(int),
+        "Vehicle_Age_gt_2_Years": (vehicle_age == 2).astype(int),
+        "Vehicle_Damage_Yes": rng.integers(0, 2, n_rows),
+    }, columns=MODEL_FEATURE_COLUMNS)
+
+
+def records_of(features: pd.DataFrame) -> list:
+    """
+    JSON request records of engineered features, as a client sends them.
+    """
+    return json.loads(features.to_json(orient="records"))
+
+
+@pytest.fixture(scope="session")
+def vehicle_features() -> pd.DataFrame:
+    return make_vehicle_features(3000, seed=7)
+
+
+@pytest.fixture(scope="session")
+def vehicle_labels(vehicle_features) -> np.ndarray:
+    # Damaged, uninsured vehicles of middle-aged customers respond, with some noise
+    rng = np.random.default_rng(11)
+    score = 1.5 * vehicle_features["Vehicle_Damage_Yes"] - 2.0 * vehicle_features["Previously_Insured"] \
+        - np.abs(vehicle_features["Age"] - 45) / 20 + rng.normal(0, 0.7, len(vehicle_features))
+    return (score > 0).astype(int).to_numpy()
+
+
+@pytest.fixture(scope="session")
+def preprocessing_object(vehicle_features):
+    """
+    The preprocessing pipeline of the training pipeline, built from config/schema.yaml and fitted.
+    """
+    data_transformation = SimpleNamespace(_schema_config=read_yaml_file(SCHEMA_FILE_PATH))
+    pipeline = DataTransformation.get_data_transformer_object(data_transformation)
+    return pipeline.fit(vehicle_features)
+
+
+@pytest.fixture(scope="session")
+def random_forest(preprocessing_object, vehicle_features, vehicle_labels) -> RandomForestClassifier:
+    return RandomForestClassifier(n_estimators=40, max_depth=10, min_samples_leaf=6, random_state=1) \
+        .fit(preprocessing_object.transform(vehicle_features), vehicle_labels)
+
+
+@pytest.fixture
+def vehicle_model(preprocessing_object, random_forest) -> MyModel:
+    return MyModel(preprocessing_object=preprocessing_object, trained_model_object=random_forest)
+
+
+@pytest.fixture
+def app_module(vehicle_model, monkeypatch):
+    """
+    The FastAPI app serving the test model, without polling the model registry.
+    """
+    import app as app_module
+
+    monkeypatch.setattr(app_module.predictor_config, "registry_poll_interval_seconds", 0)
+    app_module.model_holder.set_model(vehicle_model)
+    return app_module
+
+
+@pytest.fixture
+def client(app_module):
+    with TestClient(app_module.app) as client:
+        yield client
+
+
+@pytest.fixture
+def moto_s3(monkeypatch):
+    """
+    Runs the test against moto's in-memory S3 and returns the S3 client every storage service connects with.
+    """
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    # S3Client keeps one connection per process, tests get a fresh one bound to the mock
+    monkeypatch.setattr(S3Client, "s3_client", None)
+    monkeypatch.setattr(S3Client, "s3_resource", None)
+    with mock_aws():
+        yield S3Client().s3_client
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from src.constants import MODEL_FEATURE_COLUMNS
+from src.pipline.arrow_prediction import ARROW_STREAM_MEDIA_TYPE, arrow_table_to_features, score_arrow_body
+
+pa = pytest.importorskip("pyarrow")
+feather = pytest.importorskip("pyarrow.feather")
+
+
+def to_stream(table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def to_file(table) -> bytes:
+    sink = pa.BufferOutputStream()
+    feather.write_feather(table, sink)
+    return sink.getvalue().to_pybytes()
+
+
+@pytest.fixture
+def feature_table(vehicle_features):
+    # Integer and float columns as pandas infers them, plus an id column
+    return pa.Table.from_pandas(vehicle_features.head(20).assign(id=np.arange(100, 120)), preserve_index=False)
+
+
+@pytest.mark.parametrize("serialise", [to_stream, to_file])
+def test_arrow_bodies_are_scored_with_their_ids(feature_table, vehicle_features, serialise):
+    content, features, predictions = score_arrow_body(serialise(feature_table),
+                                                      lambda matrix: (matrix[:, 1] > 40).astype(int))
+
+    result = pa.ipc.open_stream(content).read_all()
+    np.testing.assert_array_equal(features, vehicle_features.head(20).to_numpy(dtype=np.float64))
+    assert result.column("id").to_pylist() == list(range(100, 120))
+    assert result.column("prediction").to_pylist() == predictions.tolist()
+
+
+@pytest.mark.parametrize("change, message", [
+    (lambda table: table.drop_columns(["Age", "Vintage"]), r"missing the columns \['Age', 'Vintage'\]"),
+    (lambda table: table.set_column(1, "Age", pa.array([None] + [40] * 19, pa.int64())), "Age holds 1 null"),
+    (lambda table: table.set_column(0, "Gender", pa.array(["Male"] * 20)), "Gender must be numeric"),
+])
+def test_schema_errors_are_refused(feature_table, change, message):
+    with pytest.raises(ValueError, match=message):
+        arrow_table_to_features(change(feature_table))
+
+
+def test_arrow_endpoint_answers_422_on_schema_errors(client, feature_table, vehicle_model, vehicle_features):
+    scored = client.post("/predict/arrow", content=to_stream(feature_table),
+                         headers={"Content-Type": ARROW_STREAM_MEDIA_TYPE})
+    missing = client.post("/predict/arrow", content=to_stream(feature_table.drop_columns(["Age"])))
+    garbage = client.post("/predict/arrow", content=b"not an arrow body")
+
+    assert scored.status_code == 200
+    assert pa.ipc.open_stream(scored.content).read_all().column("prediction").to_pylist() == \
+        vehicle_model.predict(vehicle_features.head(20)).tolist()
+    assert (missing.status_code, garbage.status_code) == (422, 422)
+    assert "Age" in missing.json()["error"]
+
+
+def test_columns_are_read_in_model_order(feature_table):
+    shuffled = feature_table.select(list(reversed(feature_table.column_names)))
+
+    features, ids = arrow_table_to_features(shuffled)
+
+    assert features.shape == (20, len(MODEL_FEATURE_COLUMNS))
+    np.testing.assert_array_equal(features, arrow_table_to_features(feature_table)[0])
+    assert ids.tolist() == list(range(100, 120))
@@ -0,0 +1,46 @@
+import pytest
+
+from src.constants import PREDICTION_BATCH_MAX_RECORDS
+from tests.conftest import records_of
+
+
+def test_batch_predictions_come_back_in_record_order(client, vehicle_model, vehicle_features):
+    features = vehicle_features.head(40)
+
+    response = client.post("/predict/batch", json={"records": records_of(features)})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["predictions"] == vehicle_model.predict(features).tolist()
+    assert body["count"] == 40
+    assert set(body["timings_ms"]) == {"cache_ms", "build_ms", "predict_ms", "total_ms"}
+
+
+def test_batch_matches_single_predictions(client, vehicle_features):
+    records = records_of(vehicle_features.head(5))
+
+    batch = client.post("/predict/batch", json={"records": records}).json()["predictions"]
+
+    assert batch == [client.post("/predict", json=record).json()["prediction"] for record in records]
+
+
+@pytest.mark.parametrize("n_records", [0, PREDICTION_BATCH_MAX_RECORDS + 1])
+def test_batches_out_of_bounds_are_refused(client, vehicle_features, n_records):
+    records = records_of(vehicle_features.head(1)) * n_records
+
+    assert client.post("/predict/batch", json={"records": records}).status_code == 422
+
+
+def test_batch_with_an_invalid_record_is_refused(client, vehicle_features):
+    records = records_of(vehicle_features.head(3))
+    records[1]["Gender"] = 3
+
+    assert client.post("/predict/batch", json={"records": records}).status_code == 422
+
+
+def test_batch_waits_for_the_model(client, app_module, monkeypatch, vehicle_features):
+    monkeypatch.setattr(type(app_module.model_holder), "is_ready", property(lambda self: False))
+
+    response = client.post("/predict/batch", json={"records": records_of(vehicle_features.head(2))})
+
+    assert response.status_code == 503
@@ -0,0 +1,93 @@
+import asyncio
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.constants import BENCHMARK_DATA_FILE_PATH, TARGET_COLUMN
+from src.pipline.csv_prediction_stream import CSV_OUTPUT_FORMAT, NDJSON_OUTPUT_FORMAT, stream_csv_predictions
+from src.utils.main_utils import engineer_vehicle_features
+
+
+@pytest.fixture(scope="module")
+def raw_rows() -> pd.DataFrame:
+    return pd.read_csv(BENCHMARK_DATA_FILE_PATH, nrows=30).drop(columns=[TARGET_COLUMN])
+
+
+async def byte_pieces(body: bytes, piece_size: int):
+    # Pieces cutting through lines, like the chunks of an upload
+    for start in range(0, len(body), piece_size):
+        yield body[start:start + piece_size]
+
+
+async def score_by_age(features: pd.DataFrame) -> np.ndarray:
+    return (features["Age"].to_numpy() > 40).astype(int)
+
+
+def stream(body: bytes, score_chunk=score_by_age, output_format: str = CSV_OUTPUT_FORMAT) -> str:
+    async def collect():
+        return "".join([text async for text in stream_csv_predictions(byte_pieces(body, 7), score_chunk,
+                                                                      chunk_rows=8, output_format=output_format)])
+
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("line_end", ["\n", "\r\n"])
+def test_predictions_follow_the_upload_order(raw_rows, line_end):
+    body = raw_rows.to_csv(index=False, lineterminator=line_end).encode()
+
+    lines = stream(body).splitlines()
+
+    expected = (raw_rows["Age"] > 40).astype(int)
+    assert lines[0] == "id,prediction"
+    assert lines[1:] == [f"{row_id},{prediction}" for row_id, prediction in zip(raw_rows["id"], expected)]
+
+
+def test_rows_without_ids_are_numbered_by_position(raw_rows):
+    body = raw_rows.drop(columns=["id"]).to_csv(index=False).encode()
+
+    records = [json.loads(line) for line in stream(body, output_format=NDJSON_OUTPUT_FORMAT).splitlines()]
+
+    assert [record["id"] for record in records] == list(range(30))
+
+
+@pytest.mark.parametrize("output_format", [CSV_OUTPUT_FORMAT, NDJSON_OUTPUT_FORMAT])
+def test_failure_ends_the_stream_with_an_error_row(raw_rows, output_format):
+    calls = []
+
+    async def fail_second_chunk(features):
+        calls.append(len(features))
+        if len(calls) == 2:
+            raise ValueError("model exploded")
+        return await score_by_age(features)
+
+    lines = stream(raw_rows.to_csv(index=False).encode(), fail_second_chunk, output_format).splitlines()
+
+    if output_format == CSV_OUTPUT_FORMAT:
+        assert lines[1:9] == [f"{row_id},{int(age > 40)}" for row_id, age in zip(raw_rows["id"][:8], raw_rows["Age"])]
+        assert lines[9:] == ["# error after 8 rows: model exploded"]
+    else:
+        assert [json.loads(line)["id"] for line in lines[:8]] == raw_rows["id"][:8].tolist()
+        assert json.loads(lines[8]) == {"error": "model exploded", "rows_scored": 8}
+        assert len(lines) == 9
+
+
+def test_malformed_rows_become_an_error_row(raw_rows):
+    body = raw_rows.drop(columns=["Vehicle_Damage"]).to_csv(index=False).encode()
+
+    lines = stream(body).splitlines()
+
+    assert lines[0] == "id,prediction"
+    assert lines[1].startswith("# error after 0 rows:")
+    assert len(lines) == 2
+
+
+def test_csv_endpoint_streams_model_predictions(client, vehicle_model, raw_rows):
+    response = client.post("/predict/csv?format=ndjson", content=raw_rows.to_csv(index=False).encode())
+
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert response.status_code == 200
+    assert [record["id"] for record in records] == raw_rows["id"].tolist()
+    assert [record["prediction"] for record in records] == \
+        vehicle_model.predict(engineer_vehicle_features(raw_rows)).tolist()
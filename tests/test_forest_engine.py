@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from src.constants import COMPILED_INFERENCE_BACKEND, EARLY_EXIT_INFERENCE_BACKEND
+from src.entity.forest_engine import CompiledForest
+from tests.conftest import make_vehicle_features
+
+
+@pytest.fixture(scope="module")
+def scored_inputs(preprocessing_object):
+    # Records the forest was not fitted on, so the votes are not all unanimous
+    return preprocessing_object.transform(make_vehicle_features(5000, seed=23))
+
+
+def test_compiled_forest_matches_random_forest(random_forest, scored_inputs):
+    forest = CompiledForest.from_sklearn(random_forest)
+
+    np.testing.assert_array_equal(forest.predict_proba(scored_inputs), random_forest.predict_proba(scored_inputs))
+    np.testing.assert_array_equal(forest.predict(scored_inputs), random_forest.predict(scored_inputs))
+
+
+def test_compiled_forest_matches_random_forest_across_chunks(random_forest, scored_inputs):
+    forest = CompiledForest.from_sklearn(random_forest)
+    forest.chunk_size = 333
+
+    np.testing.assert_array_equal(forest.predict_proba(scored_inputs), random_forest.predict_proba(scored_inputs))
+
+
+@pytest.mark.parametrize("chunk_size", [CompiledForest.chunk_size, 700])
+def test_early_exit_labels_match_full_forest(random_forest, scored_inputs, chunk_size):
+    forest = CompiledForest.from_sklearn(random_forest)
+    forest.chunk_size = chunk_size
+
+    np.testing.assert_array_equal(forest.predict_early_exit(scored_inputs), forest.predict(scored_inputs))
+    np.testing.assert_array_equal(forest.predict_early_exit(scored_inputs), random_forest.predict(scored_inputs))
+
+
+@pytest.mark.parametrize("extra_rows", [-1, 0, 17])
+def test_early_exit_small_batches_match_full_forest(random_forest, scored_inputs, extra_rows):
+    # Batcher sized batches, around the row count where the vote starts exiting early
+    forest = CompiledForest.from_sklearn(random_forest)
+    rows = scored_inputs[:forest.early_exit_min_rows + extra_rows]
+
+    np.testing.assert_array_equal(forest.predict_early_exit(rows), random_forest.predict(rows))
+
+
+@pytest.mark.parametrize("inference_backend", [COMPILED_INFERENCE_BACKEND, EARLY_EXIT_INFERENCE_BACKEND])
+def test_model_backends_match_sklearn(vehicle_model, vehicle_features, inference_backend):
+    expected = vehicle_model.predict(vehicle_features)
+    vehicle_model.fuse_preprocessing()
+    vehicle_model.set_inference_backend(inference_backend)
+
+    np.testing.assert_array_equal(vehicle_model.predict(vehicle_features.to_numpy(dtype=np.float64)), expected)
@@ -0,0 +1,24 @@
+import numpy as np
+
+from src.constants import MODEL_FEATURE_COLUMNS
+from src.entity.fused_preprocessor import FusedPreprocessor
+from tests.conftest import make_vehicle_features
+
+
+def test_fused_preprocessor_matches_column_transformer(preprocessing_object):
+    features = make_vehicle_features(2000, seed=31)
+    fused = FusedPreprocessor.from_pipeline(preprocessing_object)
+
+    assert fused is not None
+    assert fused.feature_columns == MODEL_FEATURE_COLUMNS
+    np.testing.assert_allclose(fused.transform(features.to_numpy(dtype=np.float64)),
+                               preprocessing_object.transform(features), rtol=1e-12, atol=1e-12)
+
+
+def test_fused_preprocessor_accepts_dataframes(preprocessing_object):
+    features = make_vehicle_features(50, seed=37)
+    fused = FusedPreprocessor.from_pipeline(preprocessing_object)
+
+    # Columns are picked by name, whatever their order in the frame
+    np.testing.assert_allclose(fused.transform(features[MODEL_FEATURE_COLUMNS[::-1]]),
+                               preprocessing_object.transform(features), rtol=1e-12, atol=1e-12)
@@ -0,0 +1,51 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.entity.config_entity import InferenceExecutorConfig
+from src.pipline.inference_executor import InferenceExecutor, InferenceOverloadedError
+from tests.conftest import records_of
+
+
+def make_executor() -> InferenceExecutor:
+    return InferenceExecutor(InferenceExecutorConfig(max_workers=1, max_queue_size=1, retry_after_seconds=2.0))
+
+
+def test_calls_beyond_workers_and_queue_are_shed():
+    executor = make_executor()
+    release = threading.Event()
+
+    async def overload():
+        running = [asyncio.create_task(executor.run(release.wait, 5)) for _ in range(executor.capacity)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(InferenceOverloadedError) as overloaded:
+            await executor.run(sum, [1, 2])
+        # Admitted work waits for a worker instead of being shed
+        admitted = asyncio.create_task(executor.run(sum, [1, 2], shed=False))
+        release.set()
+        await asyncio.gather(*running)
+        return overloaded.value, await admitted, await executor.run(sum, [3, 4])
+
+    try:
+        error, admitted, after = asyncio.run(overload())
+    finally:
+        executor.shutdown()
+
+    assert error.retry_after_seconds == 2.0
+    assert executor.rejected == 1
+    assert (admitted, after) == (3, 7)
+    assert executor.pending == 0
+
+
+def test_overload_answers_503_with_retry_after(client, app_module, monkeypatch, vehicle_features):
+    executor = app_module.inference_executor
+    monkeypatch.setattr(executor, "pending", executor.capacity)
+    records = records_of(vehicle_features.head(2))
+
+    responses = [client.post("/predict/batch", json={"records": records}),
+                 client.post("/predict/csv", content=b"id,Gender\n1,Male\n")]
+
+    for response in responses:
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) >= 1
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from src.pipline.lead_ranking import TopKSelector
+
+
+def offer_in_chunks(selector: TopKSelector, ids: np.ndarray, scores: np.ndarray, chunk_rows: int) -> None:
+    for start in range(0, len(scores), chunk_rows):
+        selector.update(ids[start:start + chunk_rows], scores[start:start + chunk_rows])
+
+
+@pytest.mark.parametrize("chunk_rows", [7, 64, 1000])
+def test_top_k_across_chunks_matches_a_full_sort(chunk_rows):
+    rng = np.random.default_rng(3)
+    ids, scores = np.arange(1000), rng.random(1000)
+    selector = TopKSelector(25)
+
+    offer_in_chunks(selector, ids, scores, chunk_rows)
+
+    order = np.argsort(-scores)[:25]
+    assert [lead["id"] for lead in selector.result()] == ids[order].tolist()
+    assert selector.rows_seen == 1000
+
+
+def test_ties_keep_k_leads_with_the_top_scores():
+    # Six rows tie on the third highest score, any two of them may be kept
+    ids = np.arange(10)
+    scores = np.array([0.9, 0.5, 0.7, 0.5, 0.5, 0.95, 0.5, 0.5, 0.1, 0.5])
+    selector = TopKSelector(4)
+
+    offer_in_chunks(selector, ids, scores, chunk_rows=3)
+    leads = selector.result()
+
+    assert [lead["score"] for lead in leads] == [0.95, 0.9, 0.7, 0.5]
+    assert [lead["id"] for lead in leads[:3]] == [5, 0, 2]
+    assert leads[3]["id"] in {1, 3, 4, 6, 7, 9}
+    assert all(scores[lead["id"]] == lead["score"] for lead in leads)
+
+
+def test_k_larger_than_the_rows_returns_every_row_sorted():
+    selector = TopKSelector(50)
+
+    selector.update(["a", "b", "c"], [0.2, 0.8, 0.5])
+    selector.update([7], [0.6])
+
+    assert selector.result() == [{"id": "b", "score": 0.8}, {"id": 7, "score": 0.6},
+                                 {"id": "c", "score": 0.5}, {"id": "a", "score": 0.2}]
+    assert selector.rows_seen == 4
+
+
+def test_mismatched_chunk_and_bad_k_are_refused():
+    with pytest.raises(ValueError):
+        TopKSelector(0)
+    with pytest.raises(ValueError):
+        TopKSelector(3).update([1, 2], [0.5])
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from src.constants import MODEL_FEATURE_COLUMNS
+from src.entity.model_artifact import (ARRAY_MODEL_FORMAT_VERSION, read_array_header, read_array_model,
+                                       write_array_model)
+from src.exception import MyException
+
+
+@pytest.fixture
+def model_file(vehicle_model, tmp_path) -> str:
+    file_path = str(tmp_path / "model.vimodel")
+    write_array_model(vehicle_model, file_path, metadata={"registry_version": "v3"})
+    return file_path
+
+
+def rewrite(file_path: str, old: bytes, new: bytes) -> None:
+    # Same length replacement inside the JSON header, the buffers keep their offsets
+    with open(file_path, "rb") as file_obj:
+        data = file_obj.read()
+    assert len(old) == len(new) and data.count(old) == 1
+    with open(file_path, "wb") as file_obj:
+        file_obj.write(data.replace(old, new))
+
+
+def test_array_model_round_trip_scores_like_the_pickled_model(vehicle_model, vehicle_features, model_file):
+    expected = vehicle_model.predict(vehicle_features)
+
+    model = read_array_model(model_file)
+
+    np.testing.assert_array_equal(model.predict(vehicle_features), expected)
+    np.testing.assert_array_equal(model.predict(vehicle_features.to_numpy(dtype=np.float64)), expected)
+    # Read-only views of the mapped file, not copies
+    assert not model.compiled_model_object.feature.flags.writeable
+    assert model.metadata["registry_version"] == "v3"
+    assert model.metadata["format_version"] == ARRAY_MODEL_FORMAT_VERSION
+
+
+def test_model_for_other_feature_columns_is_refused(model_file):
+    reordered = [MODEL_FEATURE_COLUMNS[1], MODEL_FEATURE_COLUMNS[0]] + MODEL_FEATURE_COLUMNS[2:]
+
+    with pytest.raises(MyException, match="schema hash"):
+        read_array_model(model_file, feature_columns=reordered)
+    with pytest.raises(MyException, match="schema hash"):
+        read_array_model(model_file, feature_columns=MODEL_FEATURE_COLUMNS + ["Annual_Income"])
+
+
+def test_stored_schema_hash_mismatch_is_refused(model_file):
+    schema_hash = read_array_header(model_file)["schema_hash"]
+    rewrite(model_file, schema_hash.encode(), b"0" * len(schema_hash))
+
+    with pytest.raises(MyException, match="schema hash"):
+        read_array_model(model_file)
+
+
+def test_newer_format_versions_and_other_files_are_refused(model_file, tmp_path):
+    rewrite(model_file, f'"format_version": {ARRAY_MODEL_FORMAT_VERSION}'.encode(), b'"format_version": 9')
+    other_file = tmp_path / "model.pkl"
+    other_file.write_bytes(b"\x80\x04not an array model")
+
+    with pytest.raises(MyException, match="Unsupported array model format version 9"):
+        read_array_model(model_file)
+    with pytest.raises(MyException, match="not an array model file"):
+        read_array_model(str(other_file))
@@ -0,0 +1,145 @@
+import os
+
+import pytest
+
+from src.cloud_storage.model_cache import ModelCache, model_cache_hits_total, model_cache_misses_total
+from src.cloud_storage.s3_backend import S3StorageBackend
+from src.entity.config_entity import ModelCacheConfig, S3TransferConfig
+
+BUCKET_NAME = "vehicle-models"
+MODEL_KEY = "model-registry/model.pkl"
+PART_SIZE_BYTES = 64 * 1024
+
+
+@pytest.fixture
+def s3_requests(moto_s3):
+    """
+    Records the parameters of every GetObject request sent to moto's S3.
+    """
+    moto_s3.create_bucket(Bucket=BUCKET_NAME)
+    requests = []
+    moto_s3.meta.events.register("provide-client-params.s3.GetObject",
+                                 lambda params, **kwargs: requests.append(dict(params)))
+    return requests
+
+
+@pytest.fixture
+def storage(s3_requests, tmp_path) -> S3StorageBackend:
+    return S3StorageBackend(model_cache=ModelCache(ModelCacheConfig(cache_dir=str(tmp_path / "model_cache"))),
+                            transfer_config=S3TransferConfig(part_size_bytes=PART_SIZE_BYTES, max_concurrency=4))
+
+
+def put_model(storage: S3StorageBackend, body: bytes) -> None:
+    storage.s3_client.put_object(Bucket=BUCKET_NAME, Key=MODEL_KEY, Body=body)
+
+
+def read(path: str) -> bytes:
+    with open(path, "rb") as file_obj:
+        return file_obj.read()
+
+
+def test_current_copy_is_served_from_cache_on_304(storage, s3_requests):
+    body = os.urandom(1000)
+    put_model(storage, body)
+
+    misses = model_cache_misses_total.value()
+    first_path = storage.get_local_path(BUCKET_NAME, MODEL_KEY)
+    hits = model_cache_hits_total.value()
+    second_path = storage.get_local_path(BUCKET_NAME, MODEL_KEY)
+
+    assert read(first_path) == body
+    assert second_path == first_path
+    assert model_cache_misses_total.value() == misses + 1
+    assert model_cache_hits_total.value() == hits + 1
+    # The second request was conditional on the ETag of the cached copy
+    etag = storage.s3_client.head_object(Bucket=BUCKET_NAME, Key=MODEL_KEY)["ETag"]
+    assert "IfNoneMatch" not in s3_requests[0]
+    assert s3_requests[1]["IfNoneMatch"] == etag
+
+
+def test_new_version_replaces_cached_copy(storage):
+    put_model(storage, b"first model")
+    first_path = storage.get_local_path(BUCKET_NAME, MODEL_KEY)
+    put_model(storage, b"second model")
+
+    second_path = storage.get_local_path(BUCKET_NAME, MODEL_KEY)
+
+    assert second_path != first_path
+    assert read(second_path) == b"second model"
+    assert not os.path.exists(first_path)
+
+
+def test_large_object_is_downloaded_in_ranged_parts(storage, s3_requests):
+    body = os.urandom(PART_SIZE_BYTES * 3 + 123)
+    put_model(storage, body)
+
+    path = storage.get_local_path(BUCKET_NAME, MODEL_KEY)
+
+    assert read(path) == body
+    ranges = sorted(request["Range"] for request in s3_requests)
+    assert ranges == sorted(f"bytes={start}-{min(start + PART_SIZE_BYTES, len(body)) - 1}"
+                            for start in range(0, len(body), PART_SIZE_BYTES))
+    # Parts after the first are pinned to the ETag of the first answer
+    etag = storage.s3_client.head_object(Bucket=BUCKET_NAME, Key=MODEL_KEY)["ETag"]
+    assert all(request.get("IfMatch") == etag for request in s3_requests if request["Range"] != ranges[0])
+
+
+def test_empty_object_is_cached(storage):
+    put_model(storage, b"")
+
+    assert read(storage.get_local_path(BUCKET_NAME, MODEL_KEY)) == b""
+
+
+def write(path: str, body: bytes) -> None:
+    with open(path, "wb") as file_obj:
+        file_obj.write(body)
+
+
+@pytest.mark.parametrize("encryption, checked", [(None, True), ("AES256", True), ("aws:kms", False)])
+def test_etag_is_only_compared_as_md5_without_kms(tmp_path, encryption, checked):
+    cache = ModelCache(ModelCacheConfig(cache_dir=str(tmp_path)))
+
+    def store() -> dict:
+        # Well-formed MD5 ETag that is not the MD5 of the body, like the ETag of an SSE-KMS object
+        return cache.store(BUCKET_NAME, MODEL_KEY, "0" * 32, lambda path: write(path, b"model"),
+                           size=5, encryption=encryption)
+
+    if checked:
+        with pytest.raises(Exception, match="does not match its ETag"):
+            store()
+        assert cache.lookup(BUCKET_NAME, MODEL_KEY) is None
+    else:
+        assert read(store()["path"]) == b"model"
+
+
+def test_truncated_download_is_refused(tmp_path):
+    cache = ModelCache(ModelCacheConfig(cache_dir=str(tmp_path)))
+
+    with pytest.raises(Exception, match="bytes instead of 6"):
+        cache.store(BUCKET_NAME, MODEL_KEY, "etag-1", lambda path: write(path, b"model"), size=6)
+
+
+def test_lookup_hashes_only_touched_files(tmp_path, monkeypatch):
+    cache = ModelCache(ModelCacheConfig(cache_dir=str(tmp_path)))
+    path = cache.store(BUCKET_NAME, MODEL_KEY, "etag-1", lambda file_path: write(file_path, b"model"))["path"]
+    hashed = []
+    monkeypatch.setattr("src.cloud_storage.model_cache.file_sha256",
+                        lambda file_path: hashed.append(file_path) or "not the sha256")
+
+    assert cache.lookup(BUCKET_NAME, MODEL_KEY)["path"] == path
+    assert hashed == []
+
+    # Same size, new content and modification time: hashed again and found damaged
+    write(path, b"MODEL")
+    assert cache.lookup(BUCKET_NAME, MODEL_KEY) is None
+    assert hashed == [path]
+    assert not os.path.exists(path)
+
+
+def test_lookup_repairs_touched_but_intact_file(tmp_path):
+    cache = ModelCache(ModelCacheConfig(cache_dir=str(tmp_path)))
+    path = cache.store(BUCKET_NAME, MODEL_KEY, "etag-1", lambda file_path: write(file_path, b"model"))["path"]
+    os.utime(path, ns=(0, 0))
+
+    assert cache.lookup(BUCKET_NAME, MODEL_KEY)["mtime_ns"] == 0
+    assert cache.lookup(BUCKET_NAME, MODEL_KEY)["path"] == path
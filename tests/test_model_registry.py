@@ -0,0 +1,79 @@
+import pytest
+
+from src.cloud_storage.aws_storage import SimpleStorageService
+from src.cloud_storage.object_metadata import ObjectMetadataCache
+from src.constants import MODEL_BUCKET_NAME
+from src.entity.config_entity import VehiclePredictorConfig
+from src.entity.model_holder import ModelHolder
+from src.entity.model_registry import ModelRegistry
+from src.exception import MyException
+from src.utils.main_utils import save_object
+
+
+@pytest.fixture
+def registry(moto_s3, tmp_path, monkeypatch) -> ModelRegistry:
+    moto_s3.create_bucket(Bucket=MODEL_BUCKET_NAME)
+    # The model cache lives under the working directory, and the metadata cache is process wide
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(SimpleStorageService, "metadata_cache", ObjectMetadataCache())
+    return ModelRegistry(bucket_name=MODEL_BUCKET_NAME)
+
+
+@pytest.fixture
+def model_file(vehicle_model, tmp_path) -> str:
+    file_path = str(tmp_path / "trained" / "model.pkl")
+    save_object(file_path, vehicle_model)
+    return file_path
+
+
+def test_registered_versions_are_listed_and_immutable(registry, model_file):
+    registry.register_version(model_file, metrics={"f1_score": 0.81}, version="20260101T000000Z-aaaaaa")
+    registry.register_version(model_file, metrics={"f1_score": 0.84}, version="20260102T000000Z-bbbbbb")
+
+    assert registry.list_versions() == ["20260101T000000Z-aaaaaa", "20260102T000000Z-bbbbbb"]
+    assert registry.get_version("20260102T000000Z-bbbbbb")["metrics"] == {"f1_score": 0.84}
+    with pytest.raises(MyException, match="already registered"):
+        registry.register_version(model_file, metrics={}, version="20260101T000000Z-aaaaaa")
+
+
+def test_promotion_moves_the_champion_and_records_the_previous_one(registry, model_file):
+    first = registry.register_version(model_file, metrics={"f1_score": 0.81})
+    second = registry.register_version(model_file, metrics={"f1_score": 0.84})
+
+    assert registry.get_champion() is None
+    registry.promote(first)
+    champion = registry.promote(second)
+
+    assert registry.get_champion() == champion
+    assert champion["model_path"] == registry.model_path(second)
+    assert champion["previous_version"] == first
+    assert registry.promote(first)["previous_version"] == second
+
+
+def test_incomplete_versions_cannot_be_promoted(registry, model_file):
+    # Model uploaded but the metadata never written, like a push interrupted halfway
+    registry.s3.upload_file(model_file, registry.model_path("v-partial"), MODEL_BUCKET_NAME, remove=False)
+
+    assert registry.list_versions() == []
+    with pytest.raises(MyException, match="not registered or is incomplete"):
+        registry.promote("v-partial")
+
+
+def test_holder_serves_the_champion_and_swaps_in_a_new_one(registry, model_file):
+    first = registry.register_version(model_file, metrics={"f1_score": 0.81})
+    registry.promote(first)
+    model_holder = ModelHolder(VehiclePredictorConfig(shared_model_dir=""))
+
+    loaded = model_holder.load_snapshot()
+    unchanged = model_holder.refresh()
+    second = registry.register_version(model_file, metrics={"f1_score": 0.84})
+    registry.promote(second)
+    swapped = model_holder.refresh()
+    current = model_holder.get_snapshot()
+    registry.promote(first)
+    rolled_back = model_holder.refresh()
+
+    assert (loaded.registry_version, loaded.model_id) == (first, first)
+    assert (unchanged, swapped, rolled_back) == (False, True, True)
+    assert (current.registry_version, current.version) == (second, loaded.version + 1)
+    assert model_holder.registry_version == first
@@ -0,0 +1,101 @@
+import pytest
+
+from src.cloud_storage.aws_storage import SimpleStorageService
+from src.cloud_storage.object_metadata import ObjectMetadataCache
+from src.cloud_storage.storage_backend import LocalStorageBackend
+from src.entity.config_entity import S3MetadataCacheConfig
+
+BUCKET_NAME = "vehicle-models"
+MODEL_KEY = "model-registry/model.pkl"
+TTL_SECONDS = 30
+
+
+class CountingBackend(LocalStorageBackend):
+    def __init__(self, root_dir: str):
+        super().__init__(root_dir)
+        self.heads = []
+
+    def head_object(self, bucket_name: str, key: str):
+        self.heads.append(key)
+        return super().head_object(bucket_name, key)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr("src.cloud_storage.object_metadata.time.monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch, clock) -> SimpleStorageService:
+    # The metadata cache is process wide, every test gets a fresh one
+    monkeypatch.setattr(SimpleStorageService, "metadata_cache",
+                        ObjectMetadataCache(S3MetadataCacheConfig(ttl_seconds=TTL_SECONDS, max_entries=2)))
+    return SimpleStorageService(backend=CountingBackend(str(tmp_path / "store")))
+
+
+def upload(storage: SimpleStorageService, tmp_path, key: str, body: bytes = b"model") -> None:
+    local_file = tmp_path / "upload.bin"
+    local_file.write_bytes(body)
+    storage.upload_file(str(local_file), key, BUCKET_NAME, remove=True)
+
+
+def test_metadata_is_looked_up_once_per_ttl(storage, tmp_path, clock):
+    upload(storage, tmp_path, MODEL_KEY)
+
+    first = storage.get_object_metadata(BUCKET_NAME, MODEL_KEY)
+    clock.now += TTL_SECONDS - 1
+    cached = storage.get_object_metadata(BUCKET_NAME, MODEL_KEY)
+    clock.now += 2
+    refreshed = storage.get_object_metadata(BUCKET_NAME, MODEL_KEY)
+
+    assert first["size"] == 5
+    assert cached == first == refreshed
+    assert storage.backend.heads == [MODEL_KEY, MODEL_KEY]
+
+
+def test_missing_objects_are_cached_until_written(storage, tmp_path):
+    assert not storage.s3_key_path_available(BUCKET_NAME, MODEL_KEY)
+    assert not storage.s3_key_path_available(BUCKET_NAME, MODEL_KEY)
+    assert storage.backend.heads == [MODEL_KEY]
+
+    upload(storage, tmp_path, MODEL_KEY)
+
+    assert storage.s3_key_path_available(BUCKET_NAME, MODEL_KEY)
+    assert storage.backend.heads == [MODEL_KEY, MODEL_KEY]
+
+
+def test_keys_must_match_exactly(storage, tmp_path):
+    upload(storage, tmp_path, MODEL_KEY + ".bak")
+
+    assert not storage.s3_key_path_available(BUCKET_NAME, MODEL_KEY)
+    assert storage.s3_key_path_available(BUCKET_NAME, MODEL_KEY + ".bak")
+
+
+def test_deletes_and_json_writes_invalidate_their_key(storage, tmp_path):
+    upload(storage, tmp_path, MODEL_KEY)
+    assert storage.s3_key_path_available(BUCKET_NAME, MODEL_KEY)
+    storage.delete_file(MODEL_KEY, BUCKET_NAME)
+    assert not storage.s3_key_path_available(BUCKET_NAME, MODEL_KEY)
+
+    storage.upload_json({"champion": "v1"}, "model-registry/champion.json", BUCKET_NAME)
+    size = storage.get_object_metadata(BUCKET_NAME, "model-registry/champion.json")["size"]
+    storage.upload_json({"champion": "v10"}, "model-registry/champion.json", BUCKET_NAME)
+
+    assert storage.get_object_metadata(BUCKET_NAME, "model-registry/champion.json")["size"] == size + 1
+
+
+def test_oldest_entries_are_dropped_beyond_max_entries(storage):
+    for key in ("a.pkl", "b.pkl", "c.pkl", "a.pkl"):
+        storage.get_object_metadata(BUCKET_NAME, key)
+
+    assert storage.backend.heads == ["a.pkl", "b.pkl", "c.pkl", "a.pkl"]
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.entity.config_entity import InferenceExecutorConfig, PredictionBatcherConfig
+from src.pipline.inference_executor import InferenceExecutor
+from src.pipline.prediction_batcher import PredictionBatcher
+
+
+class RecordingModel:
+    """
+    Scores a record as ten times its value and records every batch, the first one can be held in flight.
+    """
+
+    def __init__(self, hold_first: bool = False):
+        self.batches = []
+        self.release = threading.Event()
+        if not hold_first:
+            self.release.set()
+
+    def __call__(self, records: list) -> list:
+        self.batches.append(list(records))
+        if len(self.batches) == 1:
+            self.release.wait(5)
+        return [record * 10 for record in records]
+
+
+def make_batcher(model: RecordingModel, max_batch_size: int = 64, max_wait_ms: float = 50) -> PredictionBatcher:
+    return PredictionBatcher(model, PredictionBatcherConfig(max_batch_size=max_batch_size, max_wait_ms=max_wait_ms,
+                                                            max_queue_size=1000),
+                             inference_executor=InferenceExecutor(InferenceExecutorConfig(max_workers=1,
+                                                                                          max_queue_size=10)))
+
+
+async def serve(batcher: PredictionBatcher, model: RecordingModel, records: list) -> list:
+    """
+    Sends record 0 first, then the others while its batch is still being scored.
+    """
+    batcher.start()
+    try:
+        first = asyncio.create_task(batcher.predict(records[0]))
+        while not model.batches:
+            await asyncio.sleep(0.001)
+        others = [asyncio.create_task(batcher.predict(record)) for record in records[1:]]
+        await asyncio.sleep(0.02)
+        model.release.set()
+        return await asyncio.gather(first, *others)
+    finally:
+        await batcher.stop()
+        batcher.inference_executor.shutdown()
+
+
+def test_idle_batcher_sends_a_request_at_once():
+    model = RecordingModel()
+    batcher = make_batcher(model, max_wait_ms=2000)
+
+    async def predict_one():
+        batcher.start()
+        try:
+            start = time.perf_counter()
+            return await batcher.predict(4), time.perf_counter() - start
+        finally:
+            await batcher.stop()
+            batcher.inference_executor.shutdown()
+
+    prediction, elapsed = asyncio.run(predict_one())
+
+    assert prediction == 40
+    assert elapsed < 1.0
+    assert model.batches == [[4]]
+
+
+def test_requests_arriving_during_a_batch_are_coalesced_in_order():
+    model = RecordingModel(hold_first=True)
+
+    predictions = asyncio.run(serve(make_batcher(model), model, list(range(11))))
+
+    assert predictions == [record * 10 for record in range(11)]
+    assert model.batches == [[0], list(range(1, 11))]
+
+
+def test_batches_are_bounded_by_max_batch_size():
+    model = RecordingModel(hold_first=True)
+
+    predictions = asyncio.run(serve(make_batcher(model, max_batch_size=4), model, list(range(11))))
+
+    assert predictions == [record * 10 for record in range(11)]
+    assert [len(batch) for batch in model.batches] == [1, 4, 4, 2]
+    assert [record for batch in model.batches for record in batch] == list(range(11))
+
+
+def test_failed_batch_fails_each_of_its_requests():
+    def failing_model(records):
+        raise ValueError("model exploded")
+
+    batcher = make_batcher(RecordingModel())
+    batcher.predict_batch = failing_model
+
+    async def predict_two():
+        batcher.start()
+        try:
+            return await asyncio.gather(batcher.predict(1), batcher.predict(2), return_exceptions=True)
+        finally:
+            await batcher.stop()
+            batcher.inference_executor.shutdown()
+
+    results = asyncio.run(predict_two())
+
+    assert [type(result) for result in results] == [ValueError, ValueError]
+
+
+def test_predict_before_start_is_refused():
+    with pytest.raises(RuntimeError):
+        asyncio.run(make_batcher(RecordingModel()).predict(1))
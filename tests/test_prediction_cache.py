@@ -0,0 +1,89 @@
+import pytest
+
+from src.entity.config_entity import PredictionCacheConfig
+from src.pipline.prediction_cache import PredictionCache
+
+KEY = (1.0,) * 11
+OTHER_KEY = (2.0,) * 11
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr("src.pipline.prediction_cache.time.monotonic", clock)
+    return clock
+
+
+def make_cache(max_entries: int = 100, ttl_seconds: float = 60) -> PredictionCache:
+    return PredictionCache(PredictionCacheConfig(max_entries=max_entries, ttl_seconds=ttl_seconds))
+
+
+def test_equal_records_share_a_key():
+    record = {"Gender": 1, "Age": 44, "Driving_License": 1, "Region_Code": 28, "Previously_Insured": 0,
+              "Annual_Premium": 40454, "Policy_Sales_Channel": 26, "Vintage": 217,
+              "Vehicle_Age_lt_1_Year": 0, "Vehicle_Age_gt_2_Years": 1, "Vehicle_Damage_Yes": 1}
+
+    assert PredictionCache.make_key(record) == PredictionCache.make_key({k: str(v) for k, v in record.items()})
+    assert PredictionCache.make_key(dict(record, Age="forty")) is None
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = make_cache(ttl_seconds=60)
+    cache.put(KEY, 1, model_version=1)
+
+    clock.now += 59
+    assert cache.get(KEY, model_version=1) == 1
+    clock.now += 2
+    assert cache.get(KEY, model_version=1) is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = make_cache(max_entries=2)
+    cache.put(KEY, 1, model_version=1)
+    cache.put(OTHER_KEY, 0, model_version=1)
+    # Reading KEY makes OTHER_KEY the least recently used
+    assert cache.get(KEY, model_version=1) == 1
+
+    cache.put((3.0,) * 11, 1, model_version=1)
+
+    assert cache.get(OTHER_KEY, model_version=1) is None
+    assert cache.get(KEY, model_version=1) == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_newer_version_replaces_the_entries_on_put(clock):
+    cache = make_cache()
+    cache.put(KEY, 1, model_version=1)
+
+    # Looking up under the new version misses without dropping anything yet
+    assert cache.get(KEY, model_version=2) is None
+    assert cache.stats()["size"] == 1
+
+    cache.put(OTHER_KEY, 0, model_version=2)
+
+    assert cache.get(KEY, model_version=2) is None
+    assert cache.get(OTHER_KEY, model_version=2) == 0
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_requests_on_an_older_version_do_not_reset_the_cache(clock):
+    cache = make_cache()
+    cache.put(KEY, 1, model_version=2)
+
+    # An in-flight request still holding version 1
+    assert cache.get(KEY, model_version=1) is None
+    cache.put(OTHER_KEY, 0, model_version=1)
+
+    assert cache.get(KEY, model_version=2) == 1
+    assert cache.get(OTHER_KEY, model_version=2) is None
+    assert cache.stats()["invalidations"] == 0
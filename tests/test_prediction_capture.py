@@ -0,0 +1,85 @@
+import asyncio
+
+import mongomock
+import numpy as np
+import pytest
+
+from src.constants import MODEL_FEATURE_COLUMNS
+from src.data_access.prediction_capture import PredictionCapture
+from src.entity.config_entity import PredictionCaptureConfig
+from tests.conftest import make_vehicle_features
+
+
+@pytest.fixture
+def collection():
+    return mongomock.MongoClient()["Proj1"]["Proj1-Predictions"]
+
+
+def capture_config(**overrides) -> PredictionCaptureConfig:
+    settings = dict(enabled=True, max_batch_size=100, flush_interval_seconds=0.05, max_buffered_rows=10000)
+    settings.update(overrides)
+    return PredictionCaptureConfig(**settings)
+
+
+def test_captured_predictions_are_written_as_documents(collection):
+    features = make_vehicle_features(250, seed=41).to_numpy(dtype=np.float64)
+    predictions = np.arange(250) % 2
+
+    async def serve():
+        prediction_capture = PredictionCapture(capture_config(), collection_factory=lambda: collection)
+        prediction_capture.start()
+        assert prediction_capture.capture(features[:1], predictions[:1], "20261017T000000Z-abcdef", 1.5, "json")
+        assert prediction_capture.capture(features[1:], predictions[1:], "model.pkl@etag", 20.0, "batch")
+        await prediction_capture.stop()
+        return prediction_capture
+
+    prediction_capture = asyncio.run(serve())
+
+    assert prediction_capture.buffered_rows == 0
+    assert collection.count_documents({}) == 250
+    assert collection.count_documents({"source": "batch", "model_id": "model.pkl@etag"}) == 249
+    document = collection.find_one({"source": "json"}, {"_id": 0})
+    assert document["model_id"] == "20261017T000000Z-abcdef"
+    assert document["prediction"] == 0
+    assert document["latency_ms"] == 1.5
+    assert [document[column] for column in MODEL_FEATURE_COLUMNS] == features[0].tolist()
+    assert "captured_at" in document
+
+
+def test_rows_are_flushed_in_the_background(collection):
+    features = make_vehicle_features(10, seed=43).to_numpy(dtype=np.float64)
+
+    async def serve():
+        prediction_capture = PredictionCapture(capture_config(), collection_factory=lambda: collection)
+        prediction_capture.start()
+        prediction_capture.capture(features, np.zeros(10), "model.pkl@etag", 3.0, "csv")
+        await asyncio.sleep(0.3)
+        written = collection.count_documents({})
+        await prediction_capture.stop()
+        return written
+
+    assert asyncio.run(serve()) == 10
+
+
+def test_full_buffer_drops_rows_instead_of_blocking(collection):
+    features = make_vehicle_features(30, seed=47).to_numpy(dtype=np.float64)
+
+    async def serve():
+        prediction_capture = PredictionCapture(capture_config(max_batch_size=1000, flush_interval_seconds=60,
+                                                              max_buffered_rows=50),
+                                               collection_factory=lambda: collection)
+        prediction_capture.start()
+        accepted = [prediction_capture.capture(features, np.ones(30), "model.pkl@etag", 1.0, "batch")
+                    for _ in range(2)]
+        await prediction_capture.stop()
+        return accepted
+
+    assert asyncio.run(serve()) == [True, False]
+    assert collection.count_documents({}) == 30
+
+
+def test_capture_is_a_no_op_before_start(collection):
+    prediction_capture = PredictionCapture(capture_config(), collection_factory=lambda: collection)
+
+    assert not prediction_capture.capture(np.zeros((1, len(MODEL_FEATURE_COLUMNS))), [0], None, 1.0, "json")
+    assert prediction_capture.buffered_rows == 0
@@ -0,0 +1,59 @@
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from src.entity.config_entity import VehiclePredictorConfig
+from src.entity.estimator import MyModel
+from src.entity.model_holder import ModelHolder
+from src.pipline.prediction_pipeline import VehicleDataClassifier, VehicleFeatureRow
+
+
+def make_classifier(vehicle_model, **identity) -> VehicleDataClassifier:
+    model_holder = ModelHolder(VehiclePredictorConfig(shared_model_dir=""))
+    model_holder.set_model(vehicle_model, **identity)
+    return VehicleDataClassifier(model_holder=model_holder)
+
+
+def test_rows_are_labeled_with_the_registry_version(vehicle_model, vehicle_features):
+    expected = vehicle_model.predict(vehicle_features.head(20)).tolist()
+    classifier = make_classifier(vehicle_model, model_path="model-registry/versions/v1/model.pkl",
+                                 registry_version="v1")
+    rows = [VehicleFeatureRow(values) for values in vehicle_features.head(20).to_numpy(dtype=np.float64)]
+
+    assert classifier.predict_identified_rows(rows) == [(prediction, "v1") for prediction in expected]
+
+
+def test_legacy_models_are_labeled_with_their_key_and_etag(vehicle_model, vehicle_features):
+    classifier = make_classifier(vehicle_model, model_path="model.pkl", model_id="model.pkl@abc123")
+    records = vehicle_features.head(5).to_dict(orient="records")
+
+    snapshot = classifier.model_holder.get_snapshot()
+    predictions, _ = classifier.predict_batch(records, snapshot)
+
+    assert snapshot.model_id == "model.pkl@abc123"
+    assert snapshot.registry_version is None
+    assert predictions == vehicle_model.predict(vehicle_features.head(5)).tolist()
+
+
+def test_snapshot_keeps_scoring_with_its_model_after_a_swap(vehicle_model, vehicle_features):
+    classifier = make_classifier(vehicle_model, registry_version="v1")
+    snapshot = classifier.model_holder.get_snapshot()
+    classifier.model_holder.set_model(vehicle_model, registry_version="v2")
+
+    classifier.predict_matrix(vehicle_features.head(5).to_numpy(dtype=np.float64), snapshot=snapshot)
+
+    assert snapshot.model_id == "v1"
+    assert classifier.model_holder.model_id == "v2"
+
+
+def test_scores_come_from_the_snapshot_model(vehicle_model, vehicle_features, vehicle_labels, preprocessing_object):
+    classifier = make_classifier(vehicle_model, registry_version="v1")
+    snapshot = classifier.model_holder.get_snapshot()
+    # A swapped-in model scoring the opposite class
+    flipped_forest = RandomForestClassifier(n_estimators=5, random_state=2) \
+        .fit(preprocessing_object.transform(vehicle_features), 1 - vehicle_labels)
+    classifier.model_holder.set_model(MyModel(preprocessing_object=preprocessing_object,
+                                              trained_model_object=flipped_forest), registry_version="v2")
+
+    scores = classifier.predict_scores(vehicle_features.head(50), snapshot)
+
+    np.testing.assert_allclose(scores, vehicle_model.predict_proba(vehicle_features.head(50))[:, 1])
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from src.cloud_storage.storage_backend import LocalStorageBackend, StorageBackend
+
+BUCKET_NAME = "vehicle-models"
+
+
+@pytest.fixture
+def backend(tmp_path) -> LocalStorageBackend:
+    return LocalStorageBackend(str(tmp_path / "store"))
+
+
+@pytest.mark.parametrize("key", ["../other-bucket/model.pkl", "../../etc/passwd", "models/../../escape.pkl",
+                                 "/etc/passwd", "..", "."])
+def test_keys_outside_the_bucket_are_refused(backend, tmp_path, key):
+    source = tmp_path / "model.pkl"
+    source.write_bytes(b"model")
+
+    with pytest.raises(ValueError, match="points outside of bucket"):
+        backend.upload_file(str(source), BUCKET_NAME, key)
+    with pytest.raises(ValueError, match="points outside of bucket"):
+        backend.get_local_path(BUCKET_NAME, key)
+    with pytest.raises(ValueError, match="points outside of bucket"):
+        backend.put_json({"version": "v1"}, BUCKET_NAME, key)
+    assert not os.path.exists(tmp_path / "store" / "other-bucket")
+
+
+def test_bucket_name_prefix_does_not_open_a_sibling_bucket(backend, tmp_path):
+    # "vehicle-models-old" starts with the bucket path but is another directory
+    backend.put_json({"version": "v0"}, BUCKET_NAME + "-old", "registry.json")
+
+    with pytest.raises(ValueError, match="points outside of bucket"):
+        backend.get_json(BUCKET_NAME, "../" + BUCKET_NAME + "-old/registry.json")
+
+
+def test_keys_inside_the_bucket_round_trip(backend, tmp_path):
+    source = tmp_path / "model.pkl"
+    source.write_bytes(b"model")
+
+    backend.upload_file(str(source), BUCKET_NAME, "registry/../model.pkl")
+    backend.put_json({"version": "v1"}, BUCKET_NAME, "registry/champion.json")
+
+    with open(backend.get_local_path(BUCKET_NAME, "model.pkl"), "rb") as file_obj:
+        assert file_obj.read() == b"model"
+    assert backend.get_json(BUCKET_NAME, "registry/champion.json") == {"version": "v1"}
+    assert backend.list_keys(BUCKET_NAME, "") == ["model.pkl", "registry/champion.json"]
+    assert backend.head_object(BUCKET_NAME, "registry") is None
+
+
+def test_backend_missing_an_operation_cannot_be_created():
+    class PartialBackend(StorageBackend):
+        def head_object(self, bucket_name, key):
+            return None
+
+    with pytest.raises(TypeError):
+        PartialBackend()
@@ -0,0 +1,107 @@
+import os
+import time
+
+import pytest
+
+import src.pipline.training_job_manager as training_job_manager
+from src.entity.config_entity import TrainingJobConfig
+from src.pipline.training_job_manager import TrainingJob, TrainingJobManager
+
+RELEASE_FILE_ENV_KEY = "TEST_TRAINING_RELEASE_FILE"
+
+
+def held_training_job(events) -> None:
+    """
+    Stand-in training process, reports a stage and succeeds once the release file exists.
+    """
+    events.put(("stage", "data_ingestion", time.time()))
+    while not os.path.exists(os.environ[RELEASE_FILE_ENV_KEY]):
+        time.sleep(0.01)
+    events.put(("stage", "model_trainer", time.time()))
+    events.put(("succeeded", {"model_accepted": True}, time.time()))
+
+
+def failing_training_job(events) -> None:
+    events.put(("stage", "data_validation", time.time()))
+    events.put(("failed", "schema mismatch", time.time()))
+
+
+def wait_for(manager: TrainingJobManager, job_id: str, **expected) -> dict:
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        status = manager.get_status(job_id)
+        if all(status[key] == value for key, value in expected.items()):
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} never reached {expected}, last status {status}")
+
+
+@pytest.fixture
+def release_file(tmp_path, monkeypatch) -> str:
+    path = str(tmp_path / "release")
+    # Inherited by the spawned training process
+    monkeypatch.setenv(RELEASE_FILE_ENV_KEY, path)
+    return path
+
+
+@pytest.fixture
+def job_dir(tmp_path) -> str:
+    return str(tmp_path / "jobs")
+
+
+def make_manager(job_dir: str) -> TrainingJobManager:
+    return TrainingJobManager(TrainingJobConfig(job_dir=job_dir, history_size=3))
+
+
+def test_trigger_while_a_job_runs_is_coalesced(job_dir, release_file, monkeypatch):
+    monkeypatch.setattr(training_job_manager, "run_training_job", held_training_job)
+    # Two managers sharing the job directory, like two uvicorn workers
+    manager, other_worker = make_manager(job_dir), make_manager(job_dir)
+
+    job, coalesced = manager.submit()
+    running, running_coalesced = other_worker.submit()
+    status = wait_for(other_worker, job.job_id, stage="data_ingestion")
+    open(release_file, "w").close()
+    finished = wait_for(other_worker, job.job_id, status="succeeded")
+
+    assert (coalesced, running_coalesced) == (False, True)
+    assert running.job_id == job.job_id
+    assert status["status"] == "running"
+    assert finished["result"] == {"model_accepted": True}
+    assert finished["stage"] is None
+    assert set(finished["stage_timings"]) == {"data_ingestion", "model_trainer"}
+
+
+def test_failed_job_keeps_its_stage_and_error(job_dir, monkeypatch):
+    monkeypatch.setattr(training_job_manager, "run_training_job", failing_training_job)
+    manager = make_manager(job_dir)
+
+    job, _ = manager.submit()
+    status = wait_for(manager, job.job_id, status="failed")
+
+    assert status["stage"] == "data_validation"
+    assert status["error"] == "schema mismatch"
+
+
+def test_job_of_a_dead_worker_is_reported_failed_and_not_coalesced(job_dir, release_file, monkeypatch):
+    monkeypatch.setattr(training_job_manager, "run_training_job", held_training_job)
+    manager = make_manager(job_dir)
+    os.makedirs(job_dir)
+    # Left running by a worker that died: nobody holds its monitor lock
+    orphan = TrainingJob(job_id="0" * 32, stage="model_trainer", pid=12345)
+    manager._save(orphan)
+
+    status = manager.get_status(orphan.job_id)
+    job, coalesced = manager.submit()
+    open(release_file, "w").close()
+    wait_for(manager, job.job_id, status="succeeded")
+
+    assert status["status"] == "failed"
+    assert "12345" in status["error"]
+    assert not coalesced
+    assert job.job_id != orphan.job_id
+
+
+@pytest.mark.parametrize("job_id", ["f" * 32, "../../etc/passwd", "not-a-job"])
+def test_unknown_jobs_have_no_status(job_dir, job_id):
+    assert make_manager(job_dir).get_status(job_id) is None